@@ -1,164 +1,224 @@
-# -*- coding: mbcs -*-
-from part import *
-from material import *
-from section import *
-from assembly import *
-from step import *
-from interaction import *
-from load import *
-from mesh import *
-from optimization import *
-from job import *
-from sketch import *
-from visualization import *
-from connectorBehavior import *
+# The Abaqus modules are imported in the functions which access the odb, so that this module and the criterion
+# in christensen_criterion can also be used outside of an Abaqus kernel (e.g. on exported stress data)
+import os
+import sys
+import json
 import numpy as np
 from datetime import datetime
+from contextlib import contextmanager
+import time
+from christensen_criterion import Christensen_class, calc_fail_ind, calc_fail_ind_batch, calc_fail_ind_sweep, reserve_factors
+from christensen_principal_stresses import stress_components
+from christensen_parallel import create_pool
+from christensen_cache import ResultCache, cache_key, changed_materials
+from christensen_reduction import CriticalPointReduction
+from christensen_nodal import ElementNodeMap, average, maximum_per_node
+from christensen_background import RunCancelled, start_background, background_odb, poll_background
+from christensen_region import RegionSelection, element_set
 
-class Christensen_class:
-    
-    def __init__(self, entries_of_stress_tensor, T=100., C=300.):
+try:
+    # names read from JSON (run options of a background run, batch manifests) are unicode in the Python 2 of Abaqus
+    string_types = basestring
+except NameError:
+    string_types = str
+
+FIELD_DESCRIPTION = 'This field shows the utilzation of the material according to the Christensen Failure Theory. A value of 1 indicates, that the material is on the edge of failure (plastic deformation or brittle rupture).'
+NODAL_DESCRIPTION = 'This field shows the utilzation of the material according to the Christensen Failure Theory, extrapolated from the integration points to the nodes and averaged at the nodes.'
+SECTION_DESCRIPTION = 'This field shows the utilzation of the material according to the Christensen Failure Theory at the section points of shells, or its maximum through the thickness and the section point where it occurred.'
+ENVELOPE_DESCRIPTION = 'This field shows the maximal utilzation of the material according to the Christensen Failure Theory over the frames of the step and the frame in which it occurred.'
+
+# Element sets through which the chunked mode reads the stresses, the rest of the name identifies the elements of the chunk
+CHUNK_SET_PREFIX = 'CHRISTENSEN_CHUNK_'
+# Largest number of integration points of one element (C3D27), the first chunk of an instance is sized with it
+MAX_POINTS_PER_ELEMENT = 27
+
+# Short names of the components which can be written as SCALAR FieldOutput Objects in the compact output mode
+OUTPUT_COMPONENTS = {'FI': 'Failure Index', 'FN': 'Failure Number', 'SEQ': 'Equivalent Stress', 'FRAME': 'Frame', 'SP': 'Section Point'}
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+class CompactOutput:
+
+    def __init__(self, components=('FI',), threshold=None):
         """
-        Creates a new Christensen_class Object which can calculate the failure index according to Christensen
-    
+        Compact output mode: instead of one VECTOR FieldOutput Object with all results, every selected component is written
+        as its own SCALAR FieldOutput Object (named <base name>_<component>) in single precision. With a threshold only the
+        elements (or nodes) with a failure index of at least the threshold are written, the odb then grows with the
+        critical region instead of the whole model.
+
         Parameters:
         ---------------
-            entries_of_stress_tensor: Array
-                has to have 6 entries for threedimensional stress states 
-    
-            T: Float
-                tensile strength of the material
+            components: List of Strings
+                short names of the written components, see OUTPUT_COMPONENTS; components which a field does not have
+                (e.g. FRAME outside of the envelope) are skipped
 
-            C: Float
-                tensile strength of the material
+            threshold: Float
+                optional, only elements with at least one integration point (nodes) with a failure index >= threshold are written
         """
-        self.T = T
-        self.C = C
-
-        if len(entries_of_stress_tensor) == 6:
-            self.S11 = entries_of_stress_tensor[0]
-            self.S22 = entries_of_stress_tensor[1]
-            self.S33 = entries_of_stress_tensor[2]
-            self.S12 = entries_of_stress_tensor[3]
-            self.S13 = entries_of_stress_tensor[4]
-            self.S23 = entries_of_stress_tensor[5]
-        elif len(entries_of_stress_tensor) == 4:
-            self.S11 = entries_of_stress_tensor[0]
-            self.S22 = entries_of_stress_tensor[1]
-            self.S33 = entries_of_stress_tensor[2]
-            self.S12 = entries_of_stress_tensor[3]
-            self.S13 = 0.
-            self.S23 = 0.
-
-    def calc_main(self):
-        
-        # 1. Calculation of the Principal Stresses
-        self.calc_PC()
-    
-        # 2. Calculation of the polar coordinates
-        self.calc_polar()
+        unknown = [component for component in components if component not in OUTPUT_COMPONENTS]
+        if unknown or len(components) == 0:
+            raise ValueError('The components have to be chosen from ' + ', '.join(sorted(OUTPUT_COMPONENTS)) + '.')
+        self.components = list(components)
+        self.threshold = threshold
 
-        # 3. Calculation of the two sub-criteria
-        self.calc_rho_invariant_criterion()
-        self.calc_fracture_criterion()
-    
-        # 4. calculation of the single failure index of the material
-        self.calc_failure_index()
+    def cache_parts(self):
+        # part of the cache key of the fields, a field written with other components or another threshold is not reused
+        return ['compact', sorted(self.components), self.threshold]
 
-        self.calc_fn()
+    def write(self, frame, instance, baseName, description, componentLabels, labels, data, fieldVarNames=None, position=None, sectionPoint=None):
+        """
+        Adds the selected components of data to their SCALAR FieldOutput Objects
 
-        return self.failure_index
+        Parameters:
+        ---------------
+            labels: Array
+                element label of each row of data (INTEGRATION_POINT, sorted as returned by read_integration_point_stresses)
+                or node label of each row (NODAL)
 
+            data: Array
+                shape (N, len(componentLabels))
 
-    
-    # 1. Calculation of the Principal Stresses
-    def calc_PC(self):
-        Stress_tens = np.array([(self.S11, self.S12, self.S13), (self.S12,self.S22,self.S23), (self.S13,self.S23,self.S33)])
-        self.Principal_Stresses, eigenvec = np.linalg.eig(Stress_tens)
+            fieldVarNames: Dictionary
+                optional, component -> name of the FieldOutput Object of a previous call (e.g. for further instances)
 
+            position: SymbolicConstant
+                INTEGRATION_POINT (default) or NODAL
 
-    # 2 Auxilary Method, calculates the polar coordinates in principal stress space
-    def calc_polar(self):
-        self.rho = np.sqrt(self.Principal_Stresses[0]**2 + self.Principal_Stresses[1]**2 + self.Principal_Stresses[2]**2)
-        self.theta = np.arctan2(np.sqrt(self.Principal_Stresses[0]**2 + self.Principal_Stresses[1]**2), self.Principal_Stresses[2])
-        self.phi = np.arctan2(self.Principal_Stresses[1], self.Principal_Stresses[0])
-    
-        self.sin_t = np.sin(self.theta)
-        self.cos_t = np.cos(self.theta)
-        self.sin_p = np.sin(self.phi)
-        self.cos_p = np.cos(self.phi)
-
-
-
-   # 3.1 Calculation of the Radius rho for the failure surface given the principal stresses and material strength
-    def calc_rho_invariant_criterion(self):
-        # Auxilary variables for the quadratic formula
-        aux_a_1 = 1./(2.*self.T*self.C)
-        aux_a_2 = ((self.sin_t * self.cos_p - self.sin_t * self.sin_p)**2 + (self.sin_t * self.cos_p - self.cos_t)**2 + (self.sin_t * self.sin_p - self.cos_t)**2)
-        self.aux_a = 1./(2.*self.T*self.C) * ((self.sin_t * self.cos_p - self.sin_t * self.sin_p)**2 + (self.sin_t * self.cos_p - self.cos_t)**2 + (self.sin_t * self.sin_p - self.cos_t)**2)
-        self.aux_b = (1./self.T-1/self.C) * (self.sin_t * self.sin_p + self.sin_t * self.cos_p + self.cos_t)
-        self.aux_c = -1.
-
-        if self.aux_a > 10**-20:   # if a is NOT extremely small, proceed with the usual 
-            rho = [np.abs((-self.aux_b + np.sqrt(self.aux_b**2 - 4*self.aux_a*self.aux_c))) / (2*self.aux_a), np.abs((-self.aux_b - np.sqrt(self.aux_b**2 - 4*self.aux_a*self.aux_c)) / (2*self.aux_a))]
-            if self.Principal_Stresses[0]+self.Principal_Stresses[1]+self.Principal_Stresses[2] > 0:
-                self.rho_invariant_criterion = min(rho)
+        Returns:
+        ---------------
+            Dictionary component -> name of the FieldOutput Object
+        """
+        from abaqusConstants import INTEGRATION_POINT, SCALAR
+        if position is None:
+            position = INTEGRATION_POINT
+        fieldVarNames = dict(fieldVarNames or {})
+        labels = np.asarray(labels)
+        data = np.asarray(data)
+        if self.threshold is not None and 'Failure Index' in componentLabels and len(labels) > 0:
+            # 1. Only whole elements can be added at the integration points, so an element is kept if one of its points is critical
+            with np.errstate(invalid='ignore'):
+                critical = data[:, list(componentLabels).index('Failure Index')] >= self.threshold
+            keep = np.isin(labels, np.unique(labels[critical])) if position == INTEGRATION_POINT else critical
+            labels = labels[keep]
+            data = data[keep]
+        if len(labels) == 0:
+            return fieldVarNames
+
+        fieldLabels = np.ascontiguousarray(np.unique(labels) if position == INTEGRATION_POINT else labels, dtype=np.int32)
+        for component in self.components:
+            if OUTPUT_COMPONENTS[component] not in componentLabels:
+                continue
+            # 2. One SCALAR field per component, the data is passed in single precision
+            if component not in fieldVarNames:
+                fieldVarNames[component] = setFieldVarName(frame, baseName + '_' + component)
+                field = frame.FieldOutput(name=fieldVarNames[component], description=OUTPUT_COMPONENTS[component] + ': ' + description, type=SCALAR)
             else:
-                self.rho_invariant_criterion = max(rho)
-        
-        # if a is extremely small -> hydrostatic stress situation
-        else:
-            # hydrostatic tension
-            if sum(self.Principal_Stresses) > 0:
-                # if T 0/= C
-                if self.aux_b != 0:
-                    self.rho_invariant_criterion = -self.aux_c/self.aux_b
-                else:
-                    self.rho_invariant_criterion = None 
-            
-            # hydrostatic compression
+                field = frame.fieldOutputs[fieldVarNames[component]]
+            column = np.ascontiguousarray(data[:, [list(componentLabels).index(OUTPUT_COMPONENTS[component])]], dtype=np.float32)
+            if sectionPoint is None:
+                field.addData(position=position, instance=instance, labels=fieldLabels, data=column)
             else:
-                self.rho_invariant_criterion = None # in the case of hydrostatic pressure, there is no failure
-        
-        return self.rho_invariant_criterion
+                field.addData(position=position, instance=instance, labels=fieldLabels, data=column, sectionPoint=sectionPoint)
+        return fieldVarNames
 
 
-    # 3.2
-    def calc_fracture_criterion(self):
-        self.max_ps = max(self.Principal_Stresses)
-        return self.max_ps
+class PhaseTimer:
 
+    def __init__(self):
+        """
+        Instrumentation of a run: accumulates the wall clock time and the number of calls of the phases
+        (open, index, read, compute, write, save), counters (e.g. evaluated points, NaN results, cached frames)
+        and the number of evaluated points per material. If a Progress (christensen_background) is set as progress, it is
+        updated after every evaluated chunk and can cancel the run there.
+        """
+        self.start = time.time()
+        self.times = {}
+        self.calls = {}
+        self.counters = {}
+        self.material_points = {}
+        self.max_failure_index = None
+        self.peak_memory = None
+        self.progress = None
 
-    # 4 Calculation of the Failure Index
-    def calc_failure_index(self):
-        
-        # If the stress situation is not one of hydrostostatic pressure or tension for von-Mises like materials
-        if self.rho_invariant_criterion != None: 
+    @contextmanager
+    def phase(self, name):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0.) + time.time() - start
+            self.calls[name] = self.calls.get(name, 0) + 1
 
-            # If T/C is smaller then .5, the fracture criterion is relevant
-            if self.T/self.C < 1/2:    
-                self.failure_index = max(self.rho / self.rho_invariant_criterion, self.max_ps / self.T)
-    
-            # Otherwise, the fracture criterion is not relevant
-            else:
-                self.failure_index = self.rho/self.rho_invariant_criterion
+    def count(self, name, number=1):
+        self.counters[name] = self.counters.get(name, 0) + int(number)
 
-        else:
-            self.failure_index = float('NaN')
-
-
-    # 5 Calculation of the Failure Number
-    def calc_fn(self):
-        principal_stresses_at_failure = [0., 0., 0.]
-        principal_stresses_at_failure[0] = (self.rho / self.failure_index) * self.sin_t * self.cos_p    
-        principal_stresses_at_failure[1] = (self.rho / self.failure_index) * self.sin_t * self.sin_p
-        principal_stresses_at_failure[2] = (self.rho / self.failure_index) * self.cos_t
-        
-        self.Fn = 1./2. * (3*self.T/self.C-(sum(principal_stresses_at_failure)/self.C))
-        if self.Fn > 1:
-            self.Fn = 1
-        elif self.Fn < 0:
-            self.Fn = 0
+    def count_points(self, section_index, pointLabels, elData, mat_dict):
+        """
+        Counts the evaluated points per material, the points without strengths in mat_dict (unassigned), the NaN results
+        and the hydrostatic points (NaN results of points with strengths, the stress state does not reach the envelope)
+        """
+        material_ids = section_index.material_ids(pointLabels)
+        counts = np.bincount(material_ids + 1, minlength=len(section_index.material_names) + 1)
+        for mat_name, number in zip(['(no material)'] + section_index.material_names, counts):
+            if number > 0:
+                self.material_points[mat_name] = self.material_points.get(mat_name, 0) + int(number)
+        known = np.isin(material_ids, [i for i, mat_name in enumerate(section_index.material_names) if mat_name in mat_dict])
+        nan = np.isnan(elData[:, 0])
+        self.count('points', len(pointLabels))
+        self.count('nan_points', np.sum(nan))
+        self.count('unassigned_points', np.sum(~known))
+        self.count('hydrostatic_points', np.sum(nan & known))
+        if not np.all(nan):
+            maximum = float(np.nanmax(elData[:, 0]))
+            self.max_failure_index = maximum if self.max_failure_index is None else max(self.max_failure_index, maximum)
+        if self.progress is not None:
+            self.progress.update(len(pointLabels))
+
+    def as_dict(self):
+        """
+        Returns the structured report of the run
+        """
+        total = time.time() - self.start
+        points = self.counters.get('points', 0)
+        compute = self.times.get('compute', 0.)
+        return {'total_time': total, 'times': dict(self.times), 'calls': dict(self.calls), 'counters': dict(self.counters),
+                'material_points': dict(self.material_points), 'max_failure_index': self.max_failure_index, 'peak_memory': self.peak_memory,
+                'points_per_second': points / total if total > 0 else None,
+                'compute_points_per_second': points / compute if compute > 0 else None}
+
+    def report(self):
+        for name in sorted(self.times):
+            print('Time spent in phase %s: %.2f s (%d calls)' % (name, self.times[name], self.calls[name]))
+        for name in sorted(self.counters):
+            print('%s: %d' % (name, self.counters[name]))
+        for mat_name in sorted(self.material_points):
+            print('Points of material %s: %d' % (mat_name, self.material_points[mat_name]))
+        total = time.time() - self.start
+        if total > 0:
+            print('Evaluated points per second: %.0f' % (self.counters.get('points', 0) / total))
+        if self.peak_memory is not None:
+            print('Peak memory of the process: %.1f MB' % (self.peak_memory / 1024.**2))
+
+
+def peak_rss():
+    """
+    Peak resident set size of this process in bytes (including the memory of the odb API), None if it cannot be measured.
+    Uses resource.getrusage on Linux and macOS and psutil (peak working set) on Windows. The operating system only keeps
+    the peak since the start of the process, so after an earlier, larger run in the same session the peak of that run is reported.
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return int(peak) if sys.platform == 'darwin' else int(peak) * 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        memory = psutil.Process().memory_info()
+        return int(getattr(memory, 'peak_wset', memory.rss))
+    except ImportError:
+        return None
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
@@ -183,71 +243,96 @@ def create_Christensen_field_variable_multiple_materials(odb_name, instance_name
             value: float-Array
                 includes the tensile strength [0] and the compressive strength [1] of the material 
     """
+    odb = openOdb(odb_name, readOnly=False)
+    add_Christensen_field_variable_multiple_materials(odb, instance_name, step_name, mat_dict)
 
-    # 0. Definition of utility variables
+    # Update the odb in the GUI
+    odb.save()
+    odb.close()
     odb = openOdb(odb_name, readOnly=False)
-    instance1 = odb.rootAssembly.instances[instance_name]
-    elData = []
-    lastFrame = odb.steps[step_name].frames[-1] 
-    elLabels = [el.label for el in instance1.elements]
-    stress = lastFrame.fieldOutputs['S']
-    stresses_at_int_points = stress.getSubset(position=INTEGRATION_POINT, region=instance1)
-    
-    #  1. Instantiation of a new FieldOutput Object
-    fieldVarName = setFieldVarName(lastFrame)    
-    RIFT = lastFrame.FieldOutput(name=fieldVarName, description='This field shows the utilzation of the material according to the Christensen Failure Theory. A value of 1 indicates, that the material is on the edge of failure (plastic deformation or brittle rupture).', 
-            type=VECTOR, componentLabels=['Failure Index', 'Failure Number', 'Equivalent Stress'])
+    print('The calculation is finished.')
+
+
+def add_Christensen_field_variable_multiple_materials(odb, instance_name, step_name, mat_dict, section_index=None, timer=None, pool=None, fieldVarName=None, cache=None, chunk_size=None, output=None, region=None):
+    """
+    Adds the Christensen FieldOutput Object to the last frame of a step of an already opened odb, without saving it.
+    Parameters as in create_Christensen_field_variable_multiple_materials, except
+
+    Parameters:
+    ---------------
+        odb: Odb
+            the odb opened with readOnly=False
+
+        section_index: SectionIndex
+            optional, index of the instance built by a previous call, if None it is built here
+
+        timer: PhaseTimer
+            optional, collects the time spent in the read, compute and write phase
+
+        pool: ChristensenPool
+            optional, the failure index is evaluated by its worker processes
+
+        fieldVarName: String
+            optional, name of an existing FieldOutput Object of the frame to which the data of this instance is added
 
-    #  2. Defining the field variable for each element as NaN
-    for el in instance1.elements:
-        elData.append([float('NaN'), float('NaN'), float('NaN')]) 
+        cache: ResultCache
+            optional, the results are taken from and stored in the cache, see evaluate_frame
+
+        chunk_size: Integer
+            optional, number of integration points per chunk: the stresses are evaluated and added to the field in chunks
+            of whole elements (see add_field_in_chunks), the cache is not used in this mode
+
+        output: CompactOutput
+            optional, the selected components are written as SCALAR FieldOutput Objects, fieldVarName is then a
+            Dictionary component -> name
+
+        region: OdbSet
+            optional, element set of the instance (see christensen_region.RegionSelection), only its elements are read,
+            evaluated and added to the field, None for the whole instance
+
+    Returns:
+    ---------------
+        name of the FieldOutput Object
+    """
+    if timer is None:
+        timer = PhaseTimer()
+
+    with timer.phase('read'):
+        # 0. Definition of utility variables
+        instance1 = odb.rootAssembly.instances[instance_name]
+        if section_index is None:
+            section_index = SectionIndex(odb, instance1)
+        step_frames = odb.steps[step_name].frames
+        lastFrame = step_frames[-1] 
+
+    def evaluate(labels, data):
+        #  1. + 3. Calculate the failure index of the elements with T and C of their material from mat_dict,
+        #  elements of other materials stay NaN
+        results = evaluate_integration_points(labels, data, section_index, mat_dict, pool)
+        timer.count_points(section_index, labels, results, mat_dict)
+        return results
 
     print('The calculation is running ...')
-    counter = 0
-   
-    #  3. Iterate over the sectionAssignment objects of the given instance
-    for sectasobj in instance1.sectionAssignments:
-        
-        #   4. Grab the ID of the section in the sectionAssignment object
-        sect = odb.sections[sectasobj.sectionName]
-        
-        #  5. Grab the material of the section
-        mat_name = sect.material
-
-        #  6. if T and C values for the material are known 
-        if mat_name in mat_dict:
-            #  7. Get T and C from the material dictionary  
-            T = mat_dict[mat_name][0]
-            T = 1
-            C = mat_dict[mat_name][1]
-            C = 2
-            #  8. Iterate over the elements in the SectionAssignment Object
-            for el in sectasobj.region.elements: 
-                #  9. Get stresses at the given element
-                stress = stresses_at_int_points.values[el.label-1]
-                #  10. Calculate the failure index of the element
-                ChristensenInst = Christensen_class(stress.data, T, C)
-                testf = ChristensenInst.calc_main()
-                elData[counter][0] = ChristensenInst.calc_main()
-                elData[counter][1] = ChristensenInst.Fn
-                elData[counter][2] = elData[counter][0] * T
-                counter +=1
-    
-    
+    if chunk_size:
+        #  2. + 4. Read, evaluate and add the stresses chunk by chunk
+        return add_field_in_chunks(lastFrame, instance1, 'Christensen', FIELD_DESCRIPTION, ['Failure Index', 'Failure Number', 'Equivalent Stress'],
+                evaluate, chunk_size, timer, fieldVarName, output, region)
+
+    #  2. Read the stresses of all elements in one bulk read and evaluate them
+    pointLabels, elData = evaluate_frame(lastFrame, instance1, section_index, mat_dict, evaluate, timer,
+            cache, frameCacheKey(odb, instance_name, step_name, len(step_frames) - 1, region), region)
 
-    # 11. Add the data to the FieldOutput Object
     print('Trying to add the data ...')
-    RIFT.addData(position=INTEGRATION_POINT, instance=instance1, labels=elLabels, data=elData)
+    with timer.phase('write'):
+        #  4. Add the data to a new FieldOutput Object
+        fieldVarName = add_integration_point_field(lastFrame, instance1, 'Christensen', FIELD_DESCRIPTION,
+                ['Failure Index', 'Failure Number', 'Equivalent Stress'], pointLabels, elData, fieldVarName, output=output)
 
-    # Update the odb in the GUI
-    odb.save()
-    odb.close()
-    odb = openOdb(odb_name, readOnly=False)
-    print('The calculation is finished.')
+    return fieldVarName
 
 #------------------------------------------------------------------------------------------------------------------------------------------- 
 
-def create_Christensen_field_variable_multiple_materials_also_for_quadratic_elements(odb_name, instance_name, step_name, mat_dict={}):
+def create_Christensen_field_variable_multiple_materials_also_for_quadratic_elements(odb_name, instance_name, step_name, mat_dict={}, section_index=None):
     """
     Creates a new FieldOutput Object which includes the failure index of a given material according to Christensen
     
@@ -267,52 +352,1399 @@ def create_Christensen_field_variable_multiple_materials_also_for_quadratic_elem
                 name of the Material
             value: float-Array
                 includes the tensile strength [0] and the compressive strength [1] of the material 
+
+        section_index: SectionIndex
+            optional, index of the instance built by a previous call, if None it is built here
     """
+    odb = openOdb(odb_name, readOnly=False)
+    add_Christensen_field_variable_multiple_materials_also_for_quadratic_elements(odb, instance_name, step_name, mat_dict, section_index)
 
-    # 0. Definition of utility variables
+    # update the odb in the GUI
+    odb.save()
+    odb.close()
     odb = openOdb(odb_name, readOnly=False)
-    instance1 = odb.rootAssembly.instances[instance_name]
-    elData = []
-    lastFrame = odb.steps[step_name].frames[-1] 
-    elLabels = [el.label for el in instance1.elements]
-    stress = lastFrame.fieldOutputs['S']
-    stresses_at_int_points = stress.getSubset(position=INTEGRATION_POINT, region=instance1)
-    
-    
-    #  1. Instantiation of a new FieldOutput Object
-    fieldVarName = setFieldVarName(lastFrame)    
-    RIFT = lastFrame.FieldOutput(name=fieldVarName, description='This field shows the utilzation of the material according to the Christensen Failure Theory. A value of 1 indicates, that the material is on the edge of failure (plastic deformation or brittle rupture).', 
-            type=VECTOR , componentLabels=['Failure Index', 'Failure Number', 'Equivalent Stress'])
+    print('The calculation is finished.')
+
 
-    #  2. Iterate over the stresses_at_int_points
+def add_Christensen_field_variable_multiple_materials_also_for_quadratic_elements(odb, instance_name, step_name, mat_dict, section_index=None, timer=None, pool=None, fieldVarName=None, cache=None, chunk_size=None, output=None, region=None):
+    """
+    Adds the Christensen FieldOutput Object to the last frame of a step of an already opened odb, without saving it.
+    The stresses are read and evaluated per integration point, so linear and quadratic elements are handled alike:
+    same as add_Christensen_field_variable_multiple_materials, see there for the parameters.
+    """
+    return add_Christensen_field_variable_multiple_materials(odb, instance_name, step_name, mat_dict, section_index, timer, pool,
+            fieldVarName, cache, chunk_size, output, region)
+
+#------------------------------------------------------------------------------------------------------------------------------------------- 
+
+def sectionPointNumber(block):
+    """
+    Returns the number of the section point of a bulk data block, 0 for elements without section points
+    """
+    sectionPoint = getattr(block, 'sectionPoint', None)
+    return sectionPoint.number if sectionPoint is not None else 0
+
+
+def checkSingleSectionPoint(blocks, instance):
+    """
+    Raises a ValueError if the bulk data blocks belong to more than one section point (shells, layups). Concatenated,
+    the section points would be read as additional integration points of the elements.
+    """
+    numbers = set([sectionPointNumber(block) for block in blocks])
+    if len(numbers) > 1:
+        raise ValueError('The stresses of ' + instance.name + ' are given at %d section points. Shells are evaluated per section point, '
+                         'see add_Christensen_section_point_field (option section_points).' % len(numbers))
+
+
+def hasSectionPoints(frame, instance, chunk_points=None):
+    """
+    Returns True if the stresses of the instance in the frame are given at more than one section point (shells, layups).
+    With chunk_points, the stresses are read in chunks (see iter_stress_blocks) instead of all at once.
+    """
+    from abaqusConstants import INTEGRATION_POINT
+    if not chunk_points:
+        blocks = frame.fieldOutputs['S'].getSubset(position=INTEGRATION_POINT, region=instance).bulkDataBlocks
+        return len(set([sectionPointNumber(block) for block in blocks])) > 1
+    numbers = set()
+    for blocks in iter_stress_blocks(frame, instance, chunk_points):
+        numbers.update([sectionPointNumber(block) for block in blocks])
+        if len(numbers) > 1:
+            return True
+    return False
+
+
+def read_integration_point_stresses(frame, instance):
+    """
+    Reads the stresses at the integration points of an instance (or of an element set, e.g. a region of interest) in the
+    given frame with FieldOutput.bulkDataBlocks, without creating one Python object per value. The points are sorted by
+    element label and integration point, which is the order expected by add_integration_point_field. Stresses at more than
+    one section point raise a ValueError, see read_section_point_stresses.
+
+    Returns:
+    ---------------
+        element label (Array of shape (N,)) and integration point number (Array of shape (N,)) of each point
+        and the stress data (Array of shape (N, 6), plane stress blocks are filled up with S13 = S23 = 0)
+    """
+    from abaqusConstants import INTEGRATION_POINT
+    stress = frame.fieldOutputs['S']
+    blocks = stress.getSubset(position=INTEGRATION_POINT, region=instance).bulkDataBlocks
+    checkSingleSectionPoint(blocks, instance)
+    if len(blocks) == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros((0, 6))
+    pointLabels = np.concatenate([np.asarray(block.elementLabels, dtype=int).ravel() for block in blocks])
+    intPoints = np.concatenate([np.asarray(block.integrationPoints, dtype=int).ravel() for block in blocks])
+    stressData = np.concatenate([stress_components(block.data) for block in blocks])
+    order = np.lexsort((intPoints, pointLabels))
+    return pointLabels[order], intPoints[order], stressData[order]
+
+
+def read_section_point_stresses(frame, instance):
+    """
+    Reads the stresses at all integration points and section points (e.g. SNEG and SPOS or the points of a layup) of
+    an instance (or of an element set) in one bulk read. The bulk data blocks of the odb are split by section point, so no getSubset pass per
+    section point is needed. The points are sorted by section point, element label and integration point.
+
+    Returns:
+    ---------------
+        element label, integration point and section point number (0 for elements without section points) of each point
+        (Arrays of shape (N,)), the stress data (Array of shape (N, 6), shell stresses S11, S22, S12 are filled up with
+        zeros) and a Dictionary section point number -> OdbSectionPoint object (None for 0)
+    """
+    from abaqusConstants import INTEGRATION_POINT
+    stress = frame.fieldOutputs['S']
+    blocks = stress.getSubset(position=INTEGRATION_POINT, region=instance).bulkDataBlocks
+    sectionPoints = {}
+    if len(blocks) == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros((0, 6)), sectionPoints
+    pointLabels = np.concatenate([np.asarray(block.elementLabels, dtype=int).ravel() for block in blocks])
+    intPoints = np.concatenate([np.asarray(block.integrationPoints, dtype=int).ravel() for block in blocks])
+    sectionNumbers = []
+    for block in blocks:
+        number = sectionPointNumber(block)
+        sectionPoints[number] = block.sectionPoint
+        sectionNumbers.append(np.full(len(block.elementLabels), number, dtype=int))
+    sectionNumbers = np.concatenate(sectionNumbers)
+    stressData = np.concatenate([stress_components(block.data) for block in blocks])
+    order = np.lexsort((intPoints, pointLabels, sectionNumbers))
+    return pointLabels[order], intPoints[order], sectionNumbers[order], stressData[order], sectionPoints
+
+
+def through_thickness_maximum(pointLabels, intPoints, sectionNumbers, elData):
+    """
+    Keeps for every integration point the section point with the largest failure index (a number is preferred over NaN)
+
+    Returns:
+    ---------------
+        element label, integration point, section point number and results of the kept rows, sorted by element label and
+        integration point
+    """
+    if len(pointLabels) == 0:
+        return pointLabels, intPoints, sectionNumbers, elData
+    num_points = int(intPoints.max()) + 1
+    keys, rows = maximum_per_node(pointLabels * num_points + intPoints, np.column_stack((elData, sectionNumbers)))
+    return keys // num_points, keys % num_points, rows[:, -1].astype(int), rows[:, :-1]
+
+
+def add_integration_point_field(frame, instance, baseName, description, componentLabels, pointLabels, data, fieldVarName=None, sectionPoint=None, output=None):
+    """
+    Creates a new FieldOutput Object in the frame and adds the data at the integration points in one call with contiguous arrays
+
+    Parameters:
+    ---------------
+        pointLabels: Array
+            element label of each row of data, sorted as returned by read_integration_point_stresses
+
+        data: Array
+            shape (N, len(componentLabels))
+
+        fieldVarName: String
+            optional, name of a FieldOutput Object of the frame to which the data is added (e.g. for further
+            instances), if None a new FieldOutput Object is created
+
+        sectionPoint: OdbSectionPoint
+            optional, section point of the data (shells), see read_section_point_stresses
+
+        output: CompactOutput
+            optional, the selected components are written as SCALAR FieldOutput Objects instead, fieldVarName is then a
+            Dictionary component -> name, see CompactOutput.write
+
+    Returns:
+    ---------------
+        name of the FieldOutput Object, None if there was no data and no FieldOutput Object was given
+    """
+    from abaqusConstants import INTEGRATION_POINT, VECTOR
+    if output is not None:
+        return output.write(frame, instance, baseName, description, componentLabels, pointLabels, data, fieldVarName, INTEGRATION_POINT, sectionPoint)
+    if len(pointLabels) == 0:
+        return fieldVarName
+    if fieldVarName is None:
+        fieldVarName = setFieldVarName(frame, baseName)
+        RIFT = frame.FieldOutput(name=fieldVarName, description=description, type=VECTOR, componentLabels=componentLabels)
+    else:
+        RIFT = frame.fieldOutputs[fieldVarName]
+    elLabels = np.ascontiguousarray(np.unique(pointLabels), dtype=np.int32)
+    if sectionPoint is None:
+        RIFT.addData(position=INTEGRATION_POINT, instance=instance, labels=elLabels, data=np.ascontiguousarray(data, dtype=float))
+    else:
+        RIFT.addData(position=INTEGRATION_POINT, instance=instance, labels=elLabels, data=np.ascontiguousarray(data, dtype=float),
+                     sectionPoint=sectionPoint)
+    return fieldVarName
+
+
+def evaluate_integration_points(pointLabels, stressData, section_index, mat_dict, pool=None):
+    """
+    Calculates failure index, failure number and equivalent stress of all integration points, the material of each point
+    is found with the section index. Points of materials which are not in mat_dict get [NaN, 0, 0].
+    If a ChristensenPool is given, the points are evaluated by its worker processes.
+    """
+    return submit_integration_points(pointLabels, stressData, section_index, mat_dict, pool)()
+
+
+def submit_integration_points(pointLabels, stressData, section_index, mat_dict, pool=None):
+    """
+    Same as evaluate_integration_points, but returns a function which returns the results, so that
+    further work can be done while the worker processes of the pool are calculating
+    """
+    T_values, C_values = section_index.strengths(pointLabels, mat_dict)
+    unknown = np.isnan(T_values)
+    if pool is None:
+        pending = calc_fail_ind_batch(stressData, T_values, C_values)
+    else:
+        pending = pool.submit(stressData, T_values, C_values)
+
+    def result():
+        elData = pending if pool is None else pending.get()
+        elData[unknown] = [float('NaN'), 0, 0]
+        return elData
+
+    return result
+
+
+def add_Christensen_envelope_field(odb, instance_name, step_name, mat_dict, section_index=None, frames=None, frame_stride=1, timer=None, pool=None, fieldVarName=None, cache=None, chunk_size=None, output=None, region=None):
+    """
+    Streams through the frames of a step one frame at a time and keeps the running maximum of the failure index of every
+    integration point. The envelope is added as a new FieldOutput Object to the last frame of the step, the odb is not saved.
+
+    Parameters:
+    ---------------
+        odb: Odb
+            the odb opened with readOnly=False
+
+        instance_name, step_name, mat_dict, section_index:
+            as in add_Christensen_field_variable_multiple_materials
+
+        frames: List of Integers
+            optional, indices of the frames to evaluate, by default every frame_stride-th frame
+
+        frame_stride: Integer
+            only every frame_stride-th frame is evaluated if frames is None, the last frame is always included
+
+        timer: PhaseTimer
+            optional, collects the time spent in the read, compute and write phase
+
+        pool: ChristensenPool
+            optional, the frames are evaluated by its worker processes while the next frames are read,
+            at most pool.workers frames are pending at the same time
+
+        fieldVarName: String
+            optional, name of an existing FieldOutput Object of the last frame to which the envelope of this instance is added
+
+        cache: ResultCache
+            optional, the results of every frame are taken from and stored in the cache, see evaluate_frame
+
+        chunk_size: Integer
+            optional, number of integration points per chunk: every frame is evaluated in chunks, only the envelope
+            itself is kept for all points, the cache is not used in this mode
+
+        output: CompactOutput
+            optional, compact output mode, see add_Christensen_field_variable_multiple_materials
+
+        region: OdbSet
+            optional, only the elements of this set of the instance are evaluated, see add_Christensen_field_variable_multiple_materials
+
+    Returns:
+    ---------------
+        name of the FieldOutput Object
+    """
+    if timer is None:
+        timer = PhaseTimer()
+
+    with timer.phase('read'):
+        instance1 = odb.rootAssembly.instances[instance_name]
+        if section_index is None:
+            section_index = SectionIndex(odb, instance1)
+        step_frames = odb.steps[step_name].frames
+        if frames is None:
+            frames = evaluatedFrames(len(step_frames), True, frame_stride)
+
+    # Running envelope: failure index, failure number at the maximum and the frame where it occurred
+    def evaluate(labels, data):
+        results = evaluate_integration_points(labels, data, section_index, mat_dict, pool)
+        timer.count_points(section_index, labels, results, mat_dict)
+        return results
+
+    envelope = None
+    pending = []
+    max_pending = 1 if pool is None else pool.workers
     print('The calculation is running ...')
-    for v in stresses_at_int_points.values:
-        # 3-7.
-        sectName = getSectionName(v.elementLabel, instance1)
-        sect = odb.sections[sectName]
-        # 8. Grab the Material of the section
-        mat_name = sect.material
-        # 9. 
-        if mat_name in mat_dict:
-            # 10.
-            T = mat_dict[mat_name][0]
-            C = mat_dict[mat_name][1]
-            # 11.
-            elData.append(calc_fail_ind(v.data, T, C))
+    if chunk_size:
+        return add_envelope_in_chunks(step_frames, frames, instance1, evaluate, chunk_size, timer, fieldVarName, output, region)
+
+    for i, frame_number in enumerate(frames):
+        if cache is not None:
+            # Frames with cached results are not read at all
+            pointLabels, elData = evaluate_frame(step_frames[frame_number], instance1, section_index, mat_dict,
+                    evaluate, timer,
+                    cache, frameCacheKey(odb, instance_name, step_name, frame_number, region), region)
+            with timer.phase('compute'):
+                envelope = update_envelope(envelope, elData.copy(), frame_number)
+            continue
+
+        with timer.phase('read'):
+            pointLabels, intPoints, stressData = read_integration_point_stresses(step_frames[frame_number], region if region is not None else instance1)
+
+        with timer.phase('compute'):
+            pending.append((frame_number, pointLabels, submit_integration_points(pointLabels, stressData, section_index, mat_dict, pool)))
+            # The frames are merged in their order, the last pending frames after the last read
+            while len(pending) >= max_pending or (pending and i == len(frames) - 1):
+                merged_frame, merged_labels, result = pending.pop(0)
+                elData = result()
+                timer.count_points(section_index, merged_labels, elData, mat_dict)
+                envelope = update_envelope(envelope, elData, merged_frame)
+
+    print('Trying to add the data ...')
+    with timer.phase('write'):
+        fieldVarName = add_integration_point_field(step_frames[-1], instance1, 'ChristensenEnvelope', ENVELOPE_DESCRIPTION,
+                ['Failure Index', 'Failure Number', 'Frame'], pointLabels, envelope, fieldVarName, output=output)
+
+    return fieldVarName
+
+def add_Christensen_nodal_field(odb, instance_name, step_name, mat_dict, policy='index', material_averaging=True, section_index=None, node_map=None, timer=None, pool=None, fieldVarName=None, output=None, region=None):
+    """
+    Adds the Christensen results at the nodes as a NODAL FieldOutput Object to the last frame of a step, without saving the odb.
+    The integration point values are extrapolated to the nodes of every element and averaged at the nodes in one vectorized
+    pass, see christensen_nodal.
+
+    Parameters:
+    ---------------
+        odb, instance_name, step_name, mat_dict, section_index, timer, pool, fieldVarName:
+            as in add_Christensen_field_variable_multiple_materials
+
+        policy: String
+            'index': the failure index is evaluated at the integration points and the results are extrapolated,
+            'stress': the stresses are extrapolated and averaged and the criterion is evaluated at the nodes
+
+        material_averaging: Boolean
+            if True, only the values of elements of the same material are averaged, nodes on the boundary of two materials
+            get the larger failure index of both. If False, all elements at a node are averaged (with the 'stress' policy the
+            averaged stress is evaluated with the strengths of every adjacent material and the largest failure index is kept).
+
+        node_map: ElementNodeMap
+            optional, element -> node relation of the instance built by a previous call, if None it is built here
+
+        output: CompactOutput
+            optional, compact output mode, the threshold applies to the failure index of every node
+
+        region: OdbSet
+            optional, only the elements of this set of the instance are evaluated and averaged at the nodes, so nodes on
+            the border of the region only get the values of its elements
+
+    Returns:
+    ---------------
+        name of the FieldOutput Object
+    """
+    from abaqusConstants import NODAL, VECTOR
+    if timer is None:
+        timer = PhaseTimer()
+
+    with timer.phase('read'):
+        instance1 = odb.rootAssembly.instances[instance_name]
+        if section_index is None:
+            section_index = SectionIndex(odb, instance1)
+        if node_map is None:
+            node_map = ElementNodeMap(instance1)
+        lastFrame = odb.steps[step_name].frames[-1]
+        pointLabels, intPoints, stressData = read_integration_point_stresses(lastFrame, region if region is not None else instance1)
+
+    print('The calculation is running ...')
+    with timer.phase('compute'):
+        num_materials = len(section_index.material_names) + 1
+        if policy == 'index':
+            # 1. Results at the integration points, extrapolated to the element nodes and averaged
+            elData = evaluate_integration_points(pointLabels, stressData, section_index, mat_dict, pool)
+            timer.count_points(section_index, pointLabels, elData, mat_dict)
+            nodes, elements, values = node_map.extrapolate(pointLabels, elData)
+            if material_averaging:
+                keys, averaged = average(nodes * num_materials + section_index.material_ids(elements) + 1, values)
+                nodes, nodeData = maximum_per_node(keys // num_materials, averaged)
+            else:
+                nodes, nodeData = average(nodes, values)
+        elif policy == 'stress':
+            # 1. Stresses extrapolated to the element nodes and averaged per node (and material)
+            nodes, elements, values = node_map.extrapolate(pointLabels, stressData)
+            materials = section_index.material_ids(elements) + 1
+            if material_averaging:
+                keys, stresses = average(nodes * num_materials + materials, values)
+            else:
+                node_keys, node_stresses = average(nodes, values)
+                keys = np.unique(nodes * num_materials + materials)
+                stresses = node_stresses[np.searchsorted(node_keys, keys // num_materials)]
+            # 2. Evaluation of every (node, material) pair with the strengths of the material
+            strengths = np.vstack(([np.nan, np.nan], section_index.strength_table(mat_dict)))[keys % num_materials]
+            if pool is not None:
+                results = pool.calc_fail_ind(stresses, strengths[:, 0], strengths[:, 1])
+            else:
+                results = calc_fail_ind_batch(stresses, strengths[:, 0], strengths[:, 1])
+            results[np.isnan(strengths[:, 0])] = [float('NaN'), 0, 0]
+            nodes, nodeData = maximum_per_node(keys // num_materials, results)
         else:
-            # 12.
-            elData.append([float('NaN'), 0, 0])
-   
+            raise ValueError("The policy has to be 'index' or 'stress'.")
 
-    # 11. Add the data to the FieldOutput Object
     print('Trying to add the data ...')
-    RIFT.addData(position=INTEGRATION_POINT, instance=instance1, labels=elLabels, data=elData)
+    with timer.phase('write'):
+        if output is not None:
+            return output.write(lastFrame, instance1, 'ChristensenNodal', NODAL_DESCRIPTION, ['Failure Index', 'Failure Number', 'Equivalent Stress'],
+                                node_map.node_labels[nodes], nodeData, fieldVarName, NODAL)
+        if len(nodes) == 0:
+            return fieldVarName
+        if fieldVarName is None:
+            fieldVarName = setFieldVarName(lastFrame, 'ChristensenNodal')
+            field = lastFrame.FieldOutput(name=fieldVarName, description=NODAL_DESCRIPTION, type=VECTOR,
+                                          componentLabels=['Failure Index', 'Failure Number', 'Equivalent Stress'])
+        else:
+            field = lastFrame.fieldOutputs[fieldVarName]
+        field.addData(position=NODAL, instance=instance1, labels=np.ascontiguousarray(node_map.node_labels[nodes], dtype=np.int32),
+                      data=np.ascontiguousarray(nodeData, dtype=float))
+    return fieldVarName
 
-    # update the odb in the GUI
-    odb.save()
-    odb.close()
-    odb = openOdb(odb_name, readOnly=False)
+
+def add_Christensen_section_point_field(odb, instance_name, step_name, mat_dict, mode='max', section_index=None, timer=None, pool=None, fieldVarName=None, output=None, region=None):
+    """
+    Adds the Christensen results at the section points of shells to the last frame of a step, without saving the odb. All
+    section points of all elements are read in one bulk pass and evaluated in one batch; the material of a point is the
+    material of the section assigned to its element.
+
+    Parameters:
+    ---------------
+        odb, instance_name, step_name, mat_dict, section_index, timer, pool, fieldVarName:
+            as in add_Christensen_field_variable_multiple_materials
+
+        mode: String
+            'all': the results of every section point are added (one addData call per section point),
+            'max': only the section point with the largest failure index of every integration point is kept, its number
+            is added as fourth component 'Section Point' (0 for elements without section points)
+
+        output: CompactOutput
+            optional, compact output mode, see add_Christensen_field_variable_multiple_materials
+
+        region: OdbSet
+            optional, only the elements of this set of the instance are evaluated, see add_Christensen_field_variable_multiple_materials
+
+    Returns:
+    ---------------
+        name of the FieldOutput Object
+    """
+    if mode not in ('all', 'max'):
+        raise ValueError("The mode has to be 'all' or 'max'.")
+    if timer is None:
+        timer = PhaseTimer()
+
+    with timer.phase('read'):
+        instance1 = odb.rootAssembly.instances[instance_name]
+        if section_index is None:
+            section_index = SectionIndex(odb, instance1)
+        lastFrame = odb.steps[step_name].frames[-1]
+        pointLabels, intPoints, sectionNumbers, stressData, sectionPoints = read_section_point_stresses(lastFrame, region if region is not None else instance1)
+
+    print('The calculation is running ...')
+    with timer.phase('compute'):
+        # 1. All section points in one batch
+        elData = evaluate_integration_points(pointLabels, stressData, section_index, mat_dict, pool)
+        timer.count_points(section_index, pointLabels, elData, mat_dict)
+        timer.count('section_points', len(sectionPoints))
+        if mode == 'max':
+            # 2. Maximum through the thickness
+            pointLabels, intPoints, sectionNumbers, elData = through_thickness_maximum(pointLabels, intPoints, sectionNumbers, elData)
+
+    print('Trying to add the data ...')
+    with timer.phase('write'):
+        if mode == 'max':
+            fieldVarName = add_integration_point_field(lastFrame, instance1, 'ChristensenSection', SECTION_DESCRIPTION,
+                    ['Failure Index', 'Failure Number', 'Equivalent Stress', 'Section Point'], pointLabels,
+                    np.column_stack((elData, sectionNumbers)), fieldVarName, output=output)
+        else:
+            # the rows of every section point are contiguous and sorted by element label and integration point
+            starts = np.searchsorted(sectionNumbers, sorted(sectionPoints))
+            stops = np.append(starts[1:], len(sectionNumbers))
+            for number, start, stop in zip(sorted(sectionPoints), starts, stops):
+                fieldVarName = add_integration_point_field(lastFrame, instance1, 'ChristensenSection', SECTION_DESCRIPTION,
+                        ['Failure Index', 'Failure Number', 'Equivalent Stress'], pointLabels[start:stop], elData[start:stop],
+                        fieldVarName, sectionPoints[number], output)
+    return fieldVarName
+
+
+def element_chunks(pointLabels, chunk_points):
+    """
+    Returns the (start, stop) index pairs of chunks of at most chunk_points sorted points, the chunks only end at element
+    boundaries (a single element with more than chunk_points points forms its own chunk)
+    """
+    # first point of every element and the end of the last element
+    element_starts = np.append(np.flatnonzero(np.diff(pointLabels)) + 1, len(pointLabels))
+    bounds = []
+    start = 0
+    while start < len(pointLabels):
+        # last element boundary which keeps the chunk within chunk_points
+        i = np.searchsorted(element_starts, start + chunk_points, side='right') - 1
+        if i < 0 or element_starts[i] <= start:
+            i = np.searchsorted(element_starts, start, side='right')
+        stop = int(element_starts[i])
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+def iter_stress_blocks(frame, instance, chunk_points, region=None):
+    """
+    Reads the stresses at the integration points of an instance (or of an element set of it) in groups of consecutive
+    element labels and yields the bulk data blocks of every group, so that only the stresses of one group are fetched
+    from the odb at a time. Every group is read with getSubset through an element set of its elements
+    (CHRISTENSEN_CHUNK_<hash of the labels>, an existing set with this name is reused; like the sets of a region, the
+    sets stay in the odb once it is saved). The first group is sized for MAX_POINTS_PER_ELEMENT points per element, the
+    following groups with the points per element of the previous one. An instance which fits into one group is read
+    without a set.
+    """
+    from abaqusConstants import INTEGRATION_POINT
+    if region is None:
+        region = instance
+    stresses = frame.fieldOutputs['S']
+    elementLabels = np.unique(np.array([element.label for element in region.elements], dtype=int))
+    elements_per_chunk = max(chunk_points // MAX_POINTS_PER_ELEMENT, 1)
+    start = 0
+    while start < len(elementLabels):
+        group = elementLabels[start:start + elements_per_chunk]
+        start += len(group)
+        subset = region if len(group) == len(elementLabels) else element_set(instance, group, CHUNK_SET_PREFIX)
+        blocks = stresses.getSubset(position=INTEGRATION_POINT, region=subset).bulkDataBlocks
+        yield blocks
+        points = sum([len(block.elementLabels) for block in blocks])
+        if points:
+            elements_per_chunk = max(int(chunk_points * len(group) // points), 1)
+
+
+def iter_stress_chunks(frame, instance, chunk_points, region=None):
+    """
+    Reads the stresses at the integration points of an instance (or of an element set of it) with iter_stress_blocks and
+    yields them in chunks of whole elements as (element labels, integration points, stress data (n, 6)), sorted like
+    read_integration_point_stresses within each chunk. Stresses at more than one section point raise a ValueError like
+    in read_integration_point_stresses.
+    """
+    for blocks in iter_stress_blocks(frame, instance, chunk_points, region):
+        checkSingleSectionPoint(blocks, instance)
+        if len(blocks) == 0:
+            continue
+        labels = np.concatenate([np.asarray(block.elementLabels, dtype=int).ravel() for block in blocks])
+        points = np.concatenate([np.asarray(block.integrationPoints, dtype=int).ravel() for block in blocks])
+        data = np.concatenate([stress_components(block.data) for block in blocks])
+        order = np.lexsort((points, labels))
+        labels = labels[order]
+        points = points[order]
+        data = data[order]
+        for start, stop in element_chunks(labels, chunk_points):
+            yield labels[start:stop], points[start:stop], data[start:stop]
+
+
+def add_field_in_chunks(frame, instance, baseName, description, componentLabels, evaluate, chunk_points, timer, fieldVarName=None, output=None, region=None):
+    """
+    Reads, evaluates and adds the results of one frame in chunks of whole elements, so that the working memory does not
+    grow with the size of the instance. Every chunk is added to the same FieldOutput Object with its own addData call,
+    the final field is the same as with a single call.
+
+    Parameters:
+    ---------------
+        evaluate: Function
+            returns the results (n, len(componentLabels)) for the element labels and stresses of a chunk
+
+        chunk_points: Integer
+            maximal number of integration points per chunk
+
+        region: OdbSet
+            optional, only the elements of this set of the instance are read, None for the whole instance
+
+    Returns:
+    ---------------
+        name of the FieldOutput Object
+    """
+    chunks = iter_stress_chunks(frame, instance, chunk_points, region)
+    while True:
+        with timer.phase('read'):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        pointLabels, intPoints, stressData = chunk
+        with timer.phase('compute'):
+            elData = evaluate(pointLabels, stressData)
+        with timer.phase('write'):
+            fieldVarName = add_integration_point_field(frame, instance, baseName, description, componentLabels, pointLabels, elData, fieldVarName, output=output)
+    return fieldVarName
+
+
+def add_envelope_in_chunks(step_frames, frames, instance, evaluate, chunk_points, timer, fieldVarName=None, output=None, region=None):
+    """
+    Chunked version of the envelope of add_Christensen_envelope_field: every frame is read and evaluated (with
+    evaluate(pointLabels, stressData)) in chunks of whole elements, only the envelope and the element labels are kept
+    for all points. The chunks of all frames have to contain the same points, as the mesh does not change between the
+    frames of a step. With a region (element set of the instance), only its elements are read.
+    """
+    envelope = []
+    chunk_labels = []
+    for frame_number in frames:
+        chunks = iter_stress_chunks(step_frames[frame_number], instance, chunk_points, region)
+        i = 0
+        while True:
+            with timer.phase('read'):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            pointLabels, intPoints, stressData = chunk
+            with timer.phase('compute'):
+                elData = evaluate(pointLabels, stressData)
+                if i == len(envelope):
+                    chunk_labels.append(pointLabels)
+                    envelope.append(update_envelope(None, elData, frame_number))
+                elif np.array_equal(chunk_labels[i], pointLabels):
+                    update_envelope(envelope[i], elData, frame_number)
+                else:
+                    raise ValueError('The points of frame %d differ from the points of the first evaluated frame.' % frame_number)
+            i += 1
+
+    print('Trying to add the data ...')
+    with timer.phase('write'):
+        for pointLabels, envelopeData in zip(chunk_labels, envelope):
+            fieldVarName = add_integration_point_field(step_frames[-1], instance, 'ChristensenEnvelope', ENVELOPE_DESCRIPTION,
+                    ['Failure Index', 'Failure Number', 'Frame'], pointLabels, envelopeData, fieldVarName, output=output)
+    return fieldVarName
+
+
+def evaluate_frame(frame, instance, section_index, mat_dict, evaluate, timer, cache=None, key=None, region=None):
+    """
+    Reads the stresses of the instance in the frame and evaluates them with evaluate(pointLabels, stressData).
+    With a ResultCache, the frame is not read at all if the cached results were calculated with the same strengths
+    of all materials, and only the points of the materials whose strengths changed are evaluated again.
+
+    Parameters:
+    ---------------
+        mat_dict: Dictionary
+            the strengths used by evaluate, compared with the strengths of the cache entry
+
+        evaluate: Function
+            returns the (N, 3) results for the given element labels and stresses
+
+        timer: PhaseTimer
+
+        cache: ResultCache
+            optional
+
+        key: String
+            key of the frame in the cache, see cache_key
+
+        region: OdbSet
+            optional, only the stresses of the elements of this set of the instance are read, None for the whole instance
+
+    Returns:
+    ---------------
+        the element label of every point and the (N, 3) results
+    """
+    strengths = section_index.strength_table(mat_dict)
+    entry = cache.load(key) if cache is not None else None
+    changed = changed_materials(entry, section_index.material_names, strengths)
+    if changed is not None and len(changed) == 0:
+        timer.count('cached_frames')
+        print('The results of this frame are taken from the cache')
+        return entry['labels'], entry['results']
+
+    with timer.phase('read'):
+        pointLabels, intPoints, stressData = read_integration_point_stresses(frame, region if region is not None else instance)
+
+    with timer.phase('compute'):
+        material_ids = section_index.material_ids(pointLabels)
+        if changed is not None and np.array_equal(entry['labels'], pointLabels):
+            # Only the materials with changed strengths are evaluated again
+            results = entry['results']
+            recompute = np.isin(material_ids, changed)
+            results[recompute] = evaluate(pointLabels[recompute], stressData[recompute])
+        else:
+            results = evaluate(pointLabels, stressData)
+
+    if cache is not None:
+        cache.store(key, pointLabels, results, material_ids, section_index.material_names, strengths)
+    return pointLabels, results
+
+
+def evaluatedFrames(num_frames, all_frames=True, frame_stride=1):
+    """
+    Indices of the evaluated frames of a step with num_frames frames: only the last frame, or with all_frames every
+    frame_stride-th frame and always the last frame
+    """
+    if not all_frames:
+        return [num_frames - 1]
+    frames = list(range(0, num_frames, frame_stride))
+    if frames[-1] != num_frames - 1:
+        frames.append(num_frames - 1)
+    return frames
+
+
+def frameCacheKey(odb, instance_name, step_name, frame_number, region=None):
+    # the results of a region are cached separately from the results of the whole instance
+    parts = [odbIdentity(odb), instance_name, step_name, frame_number]
+    if region is not None:
+        parts += ['region', region.name]
+    return cache_key(*parts)
+
+
+def odbIdentity(odb):
+    """
+    Identifies the results of an odb for the ResultCache by its path and the creation time of the analysis job,
+    the identity does not change when fields are added to the odb
+    """
+    jobData = getattr(odb, 'jobData', None)
+    return os.path.abspath(odb.path) + '|' + str(getattr(jobData, 'creationTime', ''))
+
+
+def update_envelope(envelope, elData, frame_number):
+    """
+    Merges the results of one frame into the envelope (failure index, failure number and frame of the maximum)
+    """
+    if envelope is None:
+        envelope = np.full((len(elData), 3), np.nan)
+    # NaN never replaces a value, but every number replaces NaN
+    larger = (elData[:, 0] > envelope[:, 0]) | (np.isnan(envelope[:, 0]) & ~np.isnan(elData[:, 0]))
+    envelope[larger, 0] = elData[larger, 0]
+    envelope[larger, 1] = elData[larger, 1]
+    envelope[larger, 2] = frame_number
+    return envelope
+
+#------------------------------------------------------------------------------------------------------------------------------------------- 
+
+def create_Christensen_fields(odb_name, instance_name, step_names, mat_dict, quadratic_elements=None, section_index=None, all_frames=False, frame_stride=1, workers=1, cache=None, chunk_size=None, report_file=None, profile=None, nodal_policy=None, material_averaging=True, section_points=None, outputs=None, output_threshold=None, progress=None, element_sets=None, bounding_box=None, mises_threshold=None, reopen=True):
+    """
+    Adds the Christensen FieldOutput Object to the last frame of each given step for one or several instances in a
+    single odb session, the odb is opened and saved only once. All instances of a step share one FieldOutput Object.
+
+    Parameters:
+    ---------------
+        odb_name: String
+            needed to open an Abaqus .odb file, depending on the working directory this also needs to include the path 
+
+        instance_name: String or List of Strings
+            name(s) of the instance(s) for which the new field variables will be implemented,
+            None or 'ALL' for all instances, see getInstanceNames
+
+        step_names: List of Strings
+            names of the steps for which the new field variables will be implemented, None or 'ALL' for all steps
+
+        mat_dict: Dictionary
+            key: name of the Material, value: tensile strength [0] and compressive strength [1] of the material
+
+        quadratic_elements: Boolean
+            if True, the evaluation per integration point (also for quadratic elements) is used,
+            if False the evaluation with one value per element, if None it is decided for each instance
+            whether it has one integration point per element
+
+        section_index: SectionIndex or Dictionary
+            optional, the index of the instance or a dictionary instance name -> SectionIndex, reused for all steps;
+            missing indices are built once
+
+        all_frames: Boolean
+            if True, every frame_stride-th frame of each step is evaluated and the envelope (maximal failure index
+            and the frame where it occurred) is added to the last frame, see add_Christensen_envelope_field
+
+        frame_stride: Integer
+            stride of the evaluated frames in the all_frames mode
+
+        workers: Integer
+            if larger than 1, the failure index is evaluated by this number of worker processes (see ChristensenPool; only
+            in abaqus python, inside the Abaqus/CAE kernel the points are evaluated in the kernel process, see create_pool),
+            the odb is still read and written only by this process
+
+        cache: ResultCache, String or Boolean
+            optional, cache of the results (a ResultCache, the directory of the cache or True for the default directory
+            next to the odb). Frames whose inputs are unchanged are not read or evaluated again, only materials with
+            changed strengths are recalculated. If the field of a step was written by a previous run with the same inputs
+            and still exists, it is kept instead of adding a duplicate. A field whose inputs changed cannot be
+            overwritten in the odb, so a new field is added in that case.
+
+        chunk_size: Integer
+            optional, number of integration points per chunk. The stresses are then converted, evaluated and added in chunks
+            of whole elements instead of all points of an instance at once, the fields are the same. This bounds the arrays
+            of the evaluation, not the memory of the read: the bulk data of a whole block (all elements of one type) is
+            still fetched at once. The cache is not used in this mode.
+
+        nodal_policy: String
+            optional, 'index' or 'stress': the results are also extrapolated to the nodes and added as a NODAL FieldOutput Object
+            to the last frame of each step, see add_Christensen_nodal_field (not in the all_frames mode)
+
+        material_averaging: Boolean
+            averaging at the nodes only within each material, see add_Christensen_nodal_field
+
+        section_points: String
+            optional, 'all' or 'max': the results at every section point of shells or their maximum through the thickness
+            are also added to the last frame of each step, see add_Christensen_section_point_field (not in the all_frames mode).
+            Instances whose stresses are given at section points only get this field ('max' if no mode is given), they are
+            skipped in the all_frames mode.
+
+        outputs: List of Strings
+            optional, compact output mode: only these components (e.g. ['FI'], see OUTPUT_COMPONENTS) are written, each as
+            a SCALAR FieldOutput Object in single precision, see CompactOutput. None writes the VECTOR fields.
+
+        output_threshold: Float
+            optional, in the compact output mode only elements (nodes) with a failure index of at least this value are written
+
+        element_sets: List of Strings
+            optional, region of interest: only the elements of these element sets (of the instance or the assembly) are read,
+            evaluated and written, see christensen_region.RegionSelection. Instances without selected elements are skipped.
+
+        bounding_box: List
+            optional, region of interest: [[xmin, ymin, zmin], [xmax, ymax, zmax]], only elements whose centroid lies in the box
+            are evaluated, combined with element_sets both have to be met
+
+        mises_threshold: Float
+            optional, prefilter of the region of interest: only elements with a von Mises stress of at least this value at one of
+            their integration points in the last frame of the step are evaluated (in the all_frames mode in one of the
+            evaluated frames)
+
+        progress: Progress
+            optional, progress of the run (see christensen_background), updated after every evaluated chunk. If it is
+            cancelled, the run stops after the current chunk and the odb is closed without saving, it keeps its state from
+            before the run.
+
+        reopen: Boolean
+            the odb is opened again after it was saved, so that the session shows the new fields (False for a run in a
+            separate process)
+
+        report_file: String or Boolean
+            optional, the report is also written as JSON to this file, True for <odb name>_christensen_report.json
+
+        profile: String or Boolean
+            optional, the run is profiled with cProfile, the statistics are written to this file (True for
+            <odb name>_christensen.prof) and the functions with the largest cumulative time are printed
+
+    Returns:
+    ---------------
+        Dictionary with the report of the run (see PhaseTimer.as_dict): time and number of calls of the phases open, index,
+        read, compute, write and save, the counters of evaluated, NaN, hydrostatic and unassigned points and cached frames,
+        the points per material, the points per second and the peak memory of the process in bytes, and whether the run
+        was cancelled
+    """
+    timer = PhaseTimer()
+    timer.progress = progress
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if chunk_size:
+        cache = None
+    if cache is True:
+        cache = ResultCache(defaultCacheDirectory(odb_name))
+    elif cache and not isinstance(cache, ResultCache):
+        cache = ResultCache(cache)
+    else:
+        cache = cache or None
+    output = CompactOutput(outputs, output_threshold) if outputs else None
+    selection = RegionSelection(element_sets, bounding_box, mises_threshold) if element_sets or bounding_box is not None or mises_threshold is not None else None
+    with timer.phase('open'):
+        odb = openOdb(odb_name, readOnly=False)
+        if step_names is None or step_names == 'ALL':
+            step_names = odb.steps.keys()
+    with timer.phase('index'):
+        instance_names = getInstanceNames(odb, instance_name)
+
+        # Section index and evaluation type are determined once per instance and shared by all steps
+        if section_index is None:
+            section_index = {}
+        elif not isinstance(section_index, dict):
+            section_index = {instance_names[0]: section_index}
+        section_indices = {}
+        quadratic = {}
+        shells = {}
+        units = {}
+        for name in instance_names:
+            instance = odb.rootAssembly.instances[name]
+            section_indices[name] = section_index.get(name) or SectionIndex(odb, instance)
+            # Instances with section points (shells) only get the section point field
+            shells[name] = hasSectionPoints(odb.steps[step_names[-1]].frames[-1], instance, chunk_size)
+            units[name] = int(not shells[name]) + int(bool(nodal_policy and not all_frames and not shells[name])) + int(bool((section_points or shells[name]) and not all_frames))
+            if shells[name]:
+                if all_frames:
+                    print('Instance ' + name + ': the stresses are given at section points, which are not supported in the all_frames mode, the instance is skipped')
+                else:
+                    print('Instance ' + name + ': the stresses are given at section points, the function add_Christensen_section_point_field is beeing used')
+                continue
+            if quadratic_elements is None and chunk_size:
+                # the chunked mode always evaluates per integration point and does not read the whole instance at once
+                quadratic[name] = True
+            elif quadratic_elements is None:
+                quadratic[name] = not hasOnePointPerElement(odb.steps[step_names[-1]].frames[-1], instance)
+            else:
+                quadratic[name] = quadratic_elements
+            if not all_frames:
+                if quadratic[name]:
+                    print('Instance ' + name + ': the function create_christensen_field_variable_multiple_materials_also _for_quadratic_elements is beeing used')
+                else:
+                    print('Instance ' + name + ': the function create_christensen_field_variable_multiple_materials is beeing used')
+
+    if progress is not None:
+        # one unit per instance, step and field
+        progress.set_total(len(step_names) * sum(units.values()))
+    pool = create_pool(workers)
+    node_maps = {}
+    cancelled = False
+    try:
+        for step_name in step_names:
+            # Region of interest of every instance, the von Mises prefilter depends on the step
+            # (None: the whole instance), instances without selected elements are skipped
+            regions = dict((name, None) for name in instance_names)
+            step_instances = list(instance_names)
+            if selection is not None:
+                with timer.phase('index'):
+                    step_frames = odb.steps[step_name].frames
+                    # the prefilter uses the maximum over the frames of the envelope
+                    frames = [step_frames[frame_number] for frame_number in evaluatedFrames(len(step_frames), all_frames, frame_stride)]
+                    for name in instance_names:
+                        instance = odb.rootAssembly.instances[name]
+                        region = selection.region(odb, instance, frames)
+                        if region is None:
+                            print('Step: ' + step_name + ', Instance: ' + name + ', no element is selected, the instance is skipped')
+                            step_instances.remove(name)
+                            if progress is not None:
+                                for unit in range(units[name]):
+                                    progress.finish_unit()
+                        elif region is not instance:
+                            regions[name] = region
+                            timer.count('region_elements', len(region.elements))
+            main_instances = [name for name in step_instances if not shells[name]]
+
+            section_instances = [name for name in step_instances if section_points or shells[name]] if not all_frames else []
+
+            # Fields of a previous run with the same inputs, the main, nodal and section point fields are checked on their own
+            field_keys = {}
+            kept_fields = {}
+            if cache is not None:
+                field_info = dict((name, {'material_names': section_indices[name].material_names,
+                                          'strengths': strengthsToJson(section_indices[name].strength_table(mat_dict))})
+                                  for name in step_instances)
+                field_keys['main'] = fieldCacheKeys(odb, main_instances, step_name, ['envelope' if all_frames else 'last', frame_stride if all_frames else 1], output, regions)
+                if nodal_policy and not all_frames:
+                    field_keys['nodal'] = fieldCacheKeys(odb, main_instances, step_name, ['nodal', nodal_policy, bool(material_averaging)], output, regions)
+                field_keys['section'] = fieldCacheKeys(odb, section_instances, step_name, ['section', section_points or 'max'], output, regions)
+                for field in field_keys:
+                    if field_keys[field]:
+                        kept_fields[field] = unchangedField(cache, odb.steps[step_name].frames[-1], field_keys[field], field_info)
+                    if kept_fields.get(field) is not None:
+                        fieldNames = ', '.join(sorted(kept_fields[field].values())) if isinstance(kept_fields[field], dict) else kept_fields[field]
+                        print('Step: ' + step_name + ', the inputs are unchanged, the field ' + fieldNames + ' is kept')
+
+            fieldVarName = None
+            if kept_fields.get('main') is None:
+                for name in main_instances:
+                    print('Step: ' + step_name + ', Instance: ' + name)
+                    if all_frames:
+                        fieldVarName = add_Christensen_envelope_field(odb, name, step_name, mat_dict, section_indices[name], frame_stride=frame_stride, timer=timer, pool=pool, fieldVarName=fieldVarName, cache=cache, chunk_size=chunk_size, output=output, region=regions[name])
+                    elif quadratic[name]:
+                        fieldVarName = add_Christensen_field_variable_multiple_materials_also_for_quadratic_elements(odb, name, step_name, mat_dict, section_indices[name], timer, pool, fieldVarName, cache, chunk_size, output, regions[name])
+                    else:
+                        fieldVarName = add_Christensen_field_variable_multiple_materials(odb, name, step_name, mat_dict, section_indices[name], timer, pool, fieldVarName, cache, chunk_size, output, regions[name])
+                    if progress is not None:
+                        progress.finish_unit()
+            elif progress is not None:
+                # the units of a kept field are finished as well
+                for name in main_instances:
+                    progress.finish_unit()
+
+            nodalFieldVarName = None
+            if nodal_policy and not all_frames:
+                if kept_fields.get('nodal') is None:
+                    for name in main_instances:
+                        if name not in node_maps:
+                            with timer.phase('index'):
+                                node_maps[name] = ElementNodeMap(odb.rootAssembly.instances[name])
+                        nodalFieldVarName = add_Christensen_nodal_field(odb, name, step_name, mat_dict, nodal_policy, material_averaging, section_indices[name],
+                                node_maps[name], timer, pool, nodalFieldVarName, output, regions[name])
+                        if progress is not None:
+                            progress.finish_unit()
+                elif progress is not None:
+                    for name in main_instances:
+                        progress.finish_unit()
+
+            sectionFieldVarName = None
+            for name in section_instances:
+                if kept_fields.get('section') is None:
+                    # shells are evaluated with the maximum through the thickness unless a mode is given
+                    sectionFieldVarName = add_Christensen_section_point_field(odb, name, step_name, mat_dict, section_points or 'max', section_indices[name],
+                            timer, pool, sectionFieldVarName, output, regions[name])
+                if progress is not None:
+                    progress.finish_unit()
+
+            written = {'main': fieldVarName, 'nodal': nodalFieldVarName, 'section': sectionFieldVarName}
+            for field in field_keys:
+                if kept_fields.get(field) is None:
+                    for name in field_keys[field]:
+                        cache.set_info(field_keys[field][name], fieldVarName=written[field], **field_info[name])
+    except RunCancelled as error:
+        print(str(error))
+        cancelled = True
+    finally:
+        if pool is not None:
+            pool.close()
+        timer.peak_memory = peak_rss()
+
+    with timer.phase('save'):
+        # update the odb in the GUI, the fields of a cancelled run are discarded by closing the odb without saving
+        if not cancelled:
+            odb.save()
+        odb.close()
+        if reopen:
+            odb = openOdb(odb_name, readOnly=False)
+    print('The calculation was cancelled, the odb was not changed.' if cancelled else 'The calculation is finished.')
+    timer.report()
+    report = timer.as_dict()
+    report['cancelled'] = cancelled
+
+    if profile:
+        profiler.disable()
+        import pstats
+        report['profile_file'] = profile if isinstance(profile, string_types) else os.path.splitext(os.path.abspath(odb_name))[0] + '_christensen.prof'
+        profiler.dump_stats(report['profile_file'])
+        pstats.Stats(report['profile_file']).sort_stats('cumulative').print_stats(15)
+    if report_file:
+        report['report_file'] = report_file if isinstance(report_file, string_types) else os.path.splitext(os.path.abspath(odb_name))[0] + '_christensen_report.json'
+        with open(report['report_file'], 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def sweep_Christensen_strengths(odb_name, instance_name, step_name, strengths, materials=None, frame_number=-1, threshold=1.):
+    """
+    Evaluates the stresses of one frame for a grid of strength pairs without writing any field. The stresses are read and
+    decomposed into principal stresses once, only the criterion itself is evaluated per (T, C) pair.
+
+    Parameters:
+    ---------------
+        odb_name: String
+
+        instance_name: String or List of Strings
+            name of the instance, 'ALL' or several names, see getInstanceNames
+
+        step_name: String
+
+        strengths: List of Tuples
+            (T, C) pairs, e.g. from christensen_criterion.strength_grid
+
+        materials: List of Strings
+            optional, the materials which get the strengths of the sweep, by default all materials of the instances.
+            Points of other materials are not evaluated.
+
+        frame_number: Integer
+            index of the frame in the step, by default the last frame
+
+        threshold: Float
+            points with a failure index of at least threshold count as failed
+
+    Returns:
+    ---------------
+        List with one dictionary per strength pair: T, C, max_failure_index, failed_points, nan_points and the location of
+        the maximum (instance, element, integration_point, material), which is None if all points are NaN
+    """
+    odb = openOdb(odb_name, readOnly=True)
+    try:
+        frame = odb.steps[step_name].frames[frame_number]
+
+        # 1. Stresses of the points of the swept materials of all instances
+        stresses = []
+        locations = []
+        for name in getInstanceNames(odb, instance_name):
+            instance = odb.rootAssembly.instances[name]
+            section_index = SectionIndex(odb, instance)
+            pointLabels, intPoints, stressData = read_integration_point_stresses(frame, instance)
+            material_ids = section_index.material_ids(pointLabels)
+            swept = [i for i, mat_name in enumerate(section_index.material_names) if materials is None or mat_name in materials]
+            mask = np.isin(material_ids, swept)
+            stresses.append(stress_components(stressData[mask]))
+            material_names = np.array(section_index.material_names + [None], dtype=object)
+            locations.extend(zip([name] * int(np.sum(mask)), pointLabels[mask], intPoints[mask], material_names[material_ids[mask]]))
+    finally:
+        odb.close()
+    stresses = np.concatenate(stresses) if len(stresses) > 0 else np.zeros((0, 6))
+
+    # 2. One decomposition for all strength pairs
+    print('The sweep over %d strength pairs is running ...' % len(strengths))
+    summaries = calc_fail_ind_sweep(stresses, strengths, threshold)
+    for summary in summaries:
+        critical_point = summary.pop('critical_point')
+        if critical_point is None:
+            summary['location'] = None
+        else:
+            name, label, intPoint, mat_name = locations[critical_point]
+            summary['location'] = {'instance': name, 'element': int(label), 'integration_point': int(intPoint), 'material': mat_name}
+        print('T = %g, C = %g: maximal failure index %.4f, %d failed points' % (summary['T'], summary['C'], summary['max_failure_index'], summary['failed_points']))
+    return summaries
+
+
+def find_critical_points(odb_name, instance_name, step_names, mat_dict, top_k=10, all_frames=False, frame_stride=1, bins=None, threshold=1., workers=1, chunk_size=None):
+    """
+    Read-only reduction mode: evaluates the Christensen criterion like create_Christensen_fields, but instead of writing
+    a field it streams over the points and keeps only the top_k points with the largest failure index and per material
+    a histogram of the failure index and the number of exceedances. The odb is neither changed nor saved.
+
+    Parameters:
+    ---------------
+        odb_name, instance_name, step_names, mat_dict, all_frames, frame_stride, workers, chunk_size:
+            as in create_Christensen_fields; without all_frames the last frame of every step is evaluated
+
+        top_k: Integer
+            number of reported critical points
+
+        bins: Array
+            optional, edges of the histogram bins, see christensen_reduction.DEFAULT_BINS
+
+        threshold: Float
+            failure index above which a point counts as exceedance
+
+    Returns:
+    ---------------
+        Dictionary with the critical points ('top': instance, element, integration point, coordinates, material, failure index,
+        failure number, step and frame), the statistics per material ('materials') and the run report ('run', see PhaseTimer.as_dict).
+        The coordinates are those of the integration point if the field COORD was written, otherwise the centroid of the element.
+    """
+    timer = PhaseTimer()
+    reduction = CriticalPointReduction(top_k, bins, threshold)
+    with timer.phase('open'):
+        odb = openOdb(odb_name, readOnly=True)
+        if step_names is None or step_names == 'ALL':
+            step_names = odb.steps.keys()
+    with timer.phase('index'):
+        instance_names = getInstanceNames(odb, instance_name)
+        section_indices = dict((name, SectionIndex(odb, odb.rootAssembly.instances[name])) for name in instance_names)
+
+    pool = create_pool(workers)
+    print('The calculation is running ...')
+    try:
+        for step_name in step_names:
+            step_frames = odb.steps[step_name].frames
+            frames = evaluatedFrames(len(step_frames), all_frames, frame_stride)
+            for name in instance_names:
+                instance = odb.rootAssembly.instances[name]
+                section_index = section_indices[name]
+                for frame_number in frames:
+                    if chunk_size:
+                        chunks = iter_stress_chunks(step_frames[frame_number], instance, chunk_size)
+                    else:
+                        chunks = iter([read_integration_point_stresses(step_frames[frame_number], instance)])
+                    while True:
+                        with timer.phase('read'):
+                            chunk = next(chunks, None)
+                        if chunk is None:
+                            break
+                        pointLabels, intPoints, stressData = chunk
+                        with timer.phase('compute'):
+                            elData = evaluate_integration_points(pointLabels, stressData, section_index, mat_dict, pool)
+                            timer.count_points(section_index, pointLabels, elData, mat_dict)
+                            # points of materials without strengths are not part of the statistics
+                            material_ids = section_index.material_ids(pointLabels)
+                            material_ids[np.isnan(section_index.strengths(pointLabels, mat_dict)[0])] = -1
+                            reduction.add(name, step_name, frame_number, pointLabels, intPoints, material_ids,
+                                          section_index.material_names, elData)
+
+        with timer.phase('coordinates'):
+            report = reduction.report(pointCoordinates(odb))
+    finally:
+        if pool is not None:
+            pool.close()
+        odb.close()
+    report['run'] = timer.as_dict()
+    print('The calculation is finished.')
+    for point in report['top']:
+        print('Failure index %.4f: instance %s, element %d, integration point %d, step %s, frame %d, material %s'
+              % (point['failure_index'], point['instance'], point['element'], point['integration_point'], point['step'], point['frame'], point['material']))
+    return report
+
+
+def calc_Christensen_reserve_factors(odb_name, instance_name, step_names, mat_dict, all_frames=False, frame_stride=1, workers=1, return_arrays=False):
+    """
+    Read-only calculation of the reserve factors (load factors until the Christensen surface is reached, see
+    christensen_criterion.reserve_factors) of every integration point for many load cases (steps and frames). For every
+    load case and instance the minimal reserve factor and its location are returned, sorted from the most to the least
+    critical load case. The odb is not changed.
+
+    Parameters:
+    ---------------
+        odb_name, instance_name, step_names, mat_dict, all_frames, frame_stride, workers:
+            as in create_Christensen_fields; without all_frames only the last frame of every step is a load case
+
+        return_arrays: Boolean
+            if True, the element labels, integration points and reserve factors of all points are returned as well
+
+    Returns:
+    ---------------
+        List with one dictionary per load case and instance: step, frame, instance, minimum (minimal reserve factor, None if
+        no point has strengths), element, integration_point and material of the minimum, the number of points which never
+        reach the surface (never_failing_points, reserve factor inf) and optionally labels, integration_points and reserve_factors
+    """
+    odb = openOdb(odb_name, readOnly=True)
+    if step_names is None or step_names == 'ALL':
+        step_names = odb.steps.keys()
+    instance_names = getInstanceNames(odb, instance_name)
+    section_indices = dict((name, SectionIndex(odb, odb.rootAssembly.instances[name])) for name in instance_names)
+
+    load_cases = []
+    pool = create_pool(workers)
+    print('The calculation is running ...')
+    try:
+        for step_name in step_names:
+            step_frames = odb.steps[step_name].frames
+            frames = evaluatedFrames(len(step_frames), all_frames, frame_stride)
+            for frame_number in frames:
+                for name in instance_names:
+                    section_index = section_indices[name]
+                    pointLabels, intPoints, stressData = read_integration_point_stresses(step_frames[frame_number], odb.rootAssembly.instances[name])
+                    elData = evaluate_integration_points(pointLabels, stressData, section_index, mat_dict, pool)
+                    T_values, C_values = section_index.strengths(pointLabels, mat_dict)
+                    factors = reserve_factors(elData[:, 0], T_values, C_values)
+
+                    load_case = {'step': step_name, 'frame': frame_number, 'instance': name, 'minimum': None, 'element': None,
+                                 'integration_point': None, 'material': None, 'never_failing_points': int(np.sum(np.isinf(factors)))}
+                    if not np.all(np.isnan(factors)):
+                        i = int(np.nanargmin(factors))
+                        load_case.update({'minimum': float(factors[i]), 'element': int(pointLabels[i]), 'integration_point': int(intPoints[i]),
+                                          'material': section_index.material_names[section_index.material_ids(pointLabels[i:i + 1])[0]]})
+                    if return_arrays:
+                        load_case.update({'labels': pointLabels, 'integration_points': intPoints, 'reserve_factors': factors})
+                    load_cases.append(load_case)
+    finally:
+        if pool is not None:
+            pool.close()
+        odb.close()
+
+    # most critical load case first, load cases without a minimum last
+    load_cases.sort(key=lambda load_case: (load_case['minimum'] is None, load_case['minimum']))
     print('The calculation is finished.')
+    for load_case in load_cases[:10]:
+        if load_case['minimum'] is not None:
+            print('Step %s, frame %d, instance %s: minimal reserve factor %.4f at element %d, integration point %d'
+                  % (load_case['step'], load_case['frame'], load_case['instance'], load_case['minimum'], load_case['element'], load_case['integration_point']))
+    return load_cases
+
+
+def pointCoordinates(odb):
+    """
+    Returns a function which gives the coordinates of an integration point, from the field COORD of the frame if it was
+    written, otherwise the centroid of the element. Only meant for a few points, every call looks up the element.
+    """
+    from abaqusConstants import INTEGRATION_POINT
+
+    def coordinates(instance_name, label, intPoint, step_name, frame_number):
+        instance = odb.rootAssembly.instances[instance_name]
+        element = instance.getElementFromLabel(label)
+        frame = odb.steps[step_name].frames[frame_number]
+        if 'COORD' in frame.fieldOutputs.keys():
+            for value in frame.fieldOutputs['COORD'].getSubset(position=INTEGRATION_POINT, region=element).values:
+                if value.integrationPoint == intPoint:
+                    return [float(x) for x in value.data]
+        nodes = [instance.getNodeFromLabel(node_label).coordinates for node_label in element.connectivity]
+        return [float(x) for x in np.mean(nodes, axis=0)]
+
+    return coordinates
+
+
+def defaultCacheDirectory(odb_name):
+    return os.path.splitext(os.path.abspath(odb_name))[0] + '_christensen_cache'
+
+
+def strengthsToJson(table):
+    # NaN is replaced by None, so that the table can be compared with the one stored in the cache index
+    return [[None if np.isnan(value) else float(value) for value in row] for row in table]
+
+
+def fieldCacheKeys(odb, instance_names, step_name, parts, output=None, regions=None):
+    """
+    Returns the cache keys (instance name -> key) of a field which create_Christensen_fields writes to the last frame of a step.
+    The parts identify the field and its options (e.g. ['last', 1] or ['nodal', 'index', True]), the compact output and the
+    region of every instance are added.
+    """
+    regions = regions or {}
+    return dict((name, cache_key(*([odbIdentity(odb), name, step_name] + list(parts)
+                                   + (output.cache_parts() if output is not None else [])
+                                   + (['region', regions[name].name] if regions.get(name) is not None else []))))
+                for name in instance_names)
+
+
+def unchangedField(cache, frame, field_keys, field_info):
+    """
+    Returns the name of the field in the frame which a previous run wrote with the same inputs for all instances, otherwise None.
+    In the compact output mode the name is a Dictionary component -> name and all fields have to exist.
+    """
+    names = set()
+    for name in field_keys:
+        info = cache.info(field_keys[name])
+        if info.get('material_names') != field_info[name]['material_names'] or info.get('strengths') != field_info[name]['strengths']:
+            return None
+        names.add(json.dumps(info.get('fieldVarName'), sort_keys=True))
+    if len(names) != 1:
+        return None
+    fieldVarName = json.loads(names.pop())
+    if not fieldVarName:
+        return None
+    if isinstance(fieldVarName, dict):
+        if not all([fieldName in frame.fieldOutputs for fieldName in fieldVarName.values()]):
+            return None
+    elif fieldVarName not in frame.fieldOutputs:
+        return None
+    return fieldVarName
+
+
+def getInstanceNames(odb, instance_name=None):
+    """
+    Returns the list of instance names for the given selection: a single name, a comma separated list of names,
+    a list of names, or None / 'ALL' for all instances of the odb
+    """
+    all_names = odb.rootAssembly.instances.keys()
+    if instance_name is None or instance_name == 'ALL':
+        return list(all_names)
+    if isinstance(instance_name, string_types):
+        instance_name = [name.strip() for name in instance_name.split(',') if name.strip()]
+    for name in instance_name:
+        if name not in all_names:
+            raise ValueError('The instance ' + name + ' does not exist in the odb.')
+    return list(instance_name)
+
+
+def hasOnePointPerElement(frame, instance):
+    """
+    Returns True if the stresses of the instance in the frame have one integration point per element, section points
+    of shells are not counted
+    """
+    from abaqusConstants import INTEGRATION_POINT
+    blocks = frame.fieldOutputs['S'].getSubset(position=INTEGRATION_POINT, region=instance).bulkDataBlocks
+    if len(blocks) == 0:
+        return len(instance.elements) == 0
+    pointLabels = np.concatenate([np.asarray(block.elementLabels, dtype=np.int64).ravel() for block in blocks])
+    intPoints = np.concatenate([np.asarray(block.integrationPoints, dtype=np.int64).ravel() for block in blocks])
+    # every (element, integration point) pair is counted once, whatever the number of section points
+    amountIntPoints = len(np.unique(pointLabels * (intPoints.max() + 1) + intPoints))
+    return len(instance.elements) == amountIntPoints
+
+class SectionIndex:
+
+    def __init__(self, odb, instance):
+        """
+        Creates a lookup from element labels to the section and material of an instance. It is built once
+        by a single pass over the sectionAssignments and can be reused for all steps and frames.
+
+        Parameters:
+        ---------------
+            odb: Odb
+                the opened odb, needed to find the material of each section
+
+            instance: OdbInstance
+                instance for which the index is built
+        """
+        self.section_names = []
+        self.material_names = []
+        labels = []
+        section_ids = []
+        material_ids = []
+        for sectasobj in instance.sectionAssignments:
+            mat_name = odb.sections[sectasobj.sectionName].material
+            if mat_name not in self.material_names:
+                self.material_names.append(mat_name)
+            region_labels = [el.label for el in sectasobj.region.elements]
+            labels.extend(region_labels)
+            section_ids.extend([len(self.section_names)] * len(region_labels))
+            material_ids.extend([self.material_names.index(mat_name)] * len(region_labels))
+            self.section_names.append(sectasobj.sectionName)
+
+        # Dense arrays indexed by the element label, -1 marks labels without section assignment
+        max_label = max(labels) if labels else 0
+        self.section_of_label = np.full(max_label + 1, -1, dtype=int)
+        self.material_of_label = np.full(max_label + 1, -1, dtype=int)
+        self.section_of_label[labels] = section_ids
+        self.material_of_label[labels] = material_ids
+
+    def material_ids(self, labels):
+        """
+        Returns the position of the material in self.material_names for each given element label, -1 if unknown
+        """
+        labels = np.asarray(labels, dtype=int)
+        ids = np.full(labels.shape, -1, dtype=int)
+        known = (labels >= 0) & (labels < len(self.material_of_label))
+        ids[known] = self.material_of_label[labels[known]]
+        return ids
+
+    def section_name(self, label):
+        if label < 0 or label >= len(self.section_of_label) or self.section_of_label[label] < 0:
+            return None
+        return self.section_names[self.section_of_label[label]]
+
+    def strength_table(self, mat_dict):
+        """
+        Returns the tensile and compressive strength of the materials in self.material_names as Array of shape
+        (number of materials, 2), NaN for materials which are not in mat_dict
+        """
+        table = np.full((len(self.material_names), 2), np.nan)
+        for i, mat_name in enumerate(self.material_names):
+            if mat_name in mat_dict:
+                table[i] = mat_dict[mat_name][0], mat_dict[mat_name][1]
+        return table
+
+    def strengths(self, labels, mat_dict):
+        """
+        Returns the arrays of the tensile and compressive strength for each given element label,
+        NaN for elements whose material is not in mat_dict
+        """
+        # The additional last row is NaN, so that the id -1 of unknown elements gathers NaN
+        table = np.vstack((self.strength_table(mat_dict), [np.nan, np.nan]))
+        ids = self.material_ids(labels)
+        return table[ids, 0], table[ids, 1]
+
 
 def getSectionName(label, instance):
     for secAsObj in instance.sectionAssignments:
@@ -321,11 +1753,6 @@ def getSectionName(label, instance):
                 return secAsObj.sectionName
 
 
-def calc_fail_ind(data, T=100., C=300.):
-    ChristensenInst = Christensen_class(data, T, C)
-    return [ChristensenInst.calc_main(), ChristensenInst.Fn, ChristensenInst.calc_main() * T]
-    
-
 # def addMaterial(matName, T, C):
 #     if Mat_dict not in globals():
 #         Mat_dict = {}
@@ -335,16 +1762,22 @@ def calc_fail_ind(data, T=100., C=300.):
 #         Mat_dict = {matName, [T, C]}
 
 
+# Lazy wrapper around odbAccess.openOdb, also used by the GUI (Christensen_Plugin_Backend.openOdb)
+def openOdb(*args, **kwargs):
+    from odbAccess import openOdb as abaqusOpenOdb
+    return abaqusOpenOdb(*args, **kwargs)
+
+
 def open_Odb(odbName):
     openOdb(odbName, readOnly=False)
 
 
 # Auxiliary function to set the name of the field variable
-def setFieldVarName(frame_obj):
-    fieldVarName = "Christensen"
+def setFieldVarName(frame_obj, baseName='Christensen'):
+    fieldVarName = baseName
     i = 1
     while fieldVarName in frame_obj.fieldOutputs:
-        fieldVarName = 'Christensen' + str(i)
+        fieldVarName = baseName + str(i)
         i += 1
 
     return fieldVarName
@@ -368,7 +1801,15 @@ def setFieldVarName(frame_obj):
 
 
 
-def outerMethod(odb_name='kein ODB Name uebergeben', instance_name='kein Instance name uebergeben', material_entries='kein Material uebergeben', step0=False, step1=False, step2=False, step3=False, step4=False, step5=False, step6=False, step7=False, step8=False, step9=False):
+def outerMethod(odb_name='kein ODB Name uebergeben', instance_name='kein Instance name uebergeben', material_entries='kein Material uebergeben', step0=False, step1=False, step2=False, step3=False, step4=False, step5=False, step6=False, step7=False, step8=False, step9=False, all_frames=False, frame_stride=1, use_cache=False, chunk_size=0, write_report=False, profile=False, nodal_policy='', material_averaging=True, section_points='', outputs='', output_threshold=0., background=False, element_sets='', bounding_box='', mises_threshold=0.):
+    from abaqus import session
+    if background_odb() == os.path.abspath(odb_name):
+        raise RuntimeError('The odb is being evaluated in the background, wait until the run is finished (status in the Plug-ins menu) or cancel it.')
+    if odb_name not in session.odbs.keys():
+        # closed by a background run which has finished, but was not polled by the GUI yet
+        poll_background()
+    if odb_name not in session.odbs.keys():
+        openOdb(odb_name, readOnly=False)
     print('User Input:')
     print('ODB', odb_name, type(odb_name))
     print('Instance', instance_name, type(instance_name))
@@ -409,20 +1850,29 @@ def outerMethod(odb_name='kein ODB Name uebergeben', instance_name='kein Instanc
     
     print('Materialdict', mat_dict, type(mat_dict), type(mat_dict[material_names[0]]))
 
-    instance1 = session.odbs[odb_name].rootAssembly.instances[instance_name]
-    lastFrame = session.odbs[odb_name].steps[steplist_names[-1]].frames[-1] 
-    amountElements = len(instance1.elements)
-
-    stress = lastFrame.fieldOutputs['S']
-    stresses_at_int_points = stress.getSubset(position=INTEGRATION_POINT, region=instance1)
-    amountIntPoints = len(stresses_at_int_points.values)
+    # Instances: a single name, 'ALL' or a comma separated list of names
+    instance_names = getInstanceNames(session.odbs[odb_name], instance_name)
+    print('Instances', instance_names)
 
+    # All steps and instances are processed in one odb session, which is saved only once at the end.
+    # Whether one value per element or per integration point is used is decided for each instance.
+    if all_frames:
+        print('All frames are evaluated, the envelope of the failure index is added to the last frame of each step')
 
-    if amountElements == amountIntPoints:
-        print('The function create_christensen_field_variable_multiple_materials is beeing used')
-        for step in steplist_names:
-            create_Christensen_field_variable_multiple_materials(odb_name=odb_name, instance_name=instance_name, step_name=step, mat_dict=mat_dict)
-    else:
-        print('The function create_christensen_field_variable_multiple_materials_also _for_quadratic_elements is beeing used')
-        for step in steplist_names:
-            create_Christensen_field_variable_multiple_materials_also_for_quadratic_elements(odb_name=odb_name, instance_name=instance_name, step_name=step, mat_dict=mat_dict)
\ No newline at end of file
+    # Region of interest: comma separated element set names and the corners of the bounding box (4 values in 2D, 6 in 3D)
+    box = [float(value) for value in bounding_box.replace(';', ',').split(',') if value.strip()]
+    if len(box) not in (0, 4, 6):
+        raise ValueError('The bounding box needs the minimal and maximal coordinates: xmin, ymin, (zmin,) xmax, ymax, (zmax).')
+    options = dict(odb_name=odb_name, instance_name=instance_names, step_names=steplist_names, mat_dict=mat_dict, quadratic_elements=None, all_frames=all_frames, frame_stride=max(int(frame_stride), 1), cache=bool(use_cache),
+                   chunk_size=int(chunk_size) or None, report_file=bool(write_report), profile=bool(profile),
+                   nodal_policy=nodal_policy if nodal_policy in ('index', 'stress') else None, material_averaging=bool(material_averaging),
+                   section_points=section_points if section_points in ('all', 'max') else None,
+                   outputs=[component.strip().upper() for component in outputs.split(',') if component.strip()] or None,
+                   output_threshold=float(output_threshold) or None,
+                   element_sets=[set_name.strip().upper() for set_name in element_sets.split(',') if set_name.strip()] or None,
+                   bounding_box=[box[:len(box) // 2], box[len(box) // 2:]] if box else None, mises_threshold=float(mises_threshold) or None)
+    if background:
+        # the kernel command returns at once, the run is a separate abaqus python process, see christensen_background
+        start_background(options)
+        return None
+    return create_Christensen_fields(**options)
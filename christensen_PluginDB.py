@@ -101,12 +101,13 @@ class FailureIndex2(AFXDataDialog):
         okBtn = self.getActionButton(self.ID_CLICKED_OK)
         okBtn.setText('Calculate Christensen Field Variable')
 
-        # Instance Selection        
-        ComboBox_2 = AFXComboBox(p=self, ncols=0, nvis=1, text='Choose Instance:', tgt=form.instance_nameKw) #, sel=0)
+        # Instance Selection, ALL evaluates every instance in one run
+        ComboBox_2 = AFXComboBox(p=self, ncols=0, nvis=1, text='Choose Instance (ALL for all instances):', tgt=form.instance_nameKw) #, sel=0)
         ComboBox_2.setMaxVisible(10)
      
         instances = session.odbs[odb_name].rootAssembly.instances.keys()
         instances.sort()
+        ComboBox_2.appendItem('ALL')
         for instance in instances:
             ComboBox_2.appendItem(instance)
 
@@ -116,6 +117,39 @@ class FailureIndex2(AFXDataDialog):
         for i in range(len(steps)):
             FXCheckButton(p=self, text=steps[i], tgt=form.Steps_Keywords[i])
 
+        # Frame Selection
+        FXCheckButton(p=self, text='Evaluate all frames (maximal failure index over the step)', tgt=form.all_framesKw)
+        AFXTextField(p=self, ncols=6, labelText='Use every n-th frame:', tgt=form.frame_strideKw, sel=0,
+            opts=AFXTEXTFIELD_INTEGER)
+        FXCheckButton(p=self, text='Reuse cached results of previous runs', tgt=form.use_cacheKw)
+        AFXTextField(p=self, ncols=6, labelText='Evaluate in chunks of n integration points (0 = all at once):', tgt=form.chunk_sizeKw, sel=0,
+            opts=AFXTEXTFIELD_INTEGER)
+        FXCheckButton(p=self, text='Write a report of the run (JSON) next to the odb', tgt=form.write_reportKw)
+        FXCheckButton(p=self, text='Profile the run with cProfile', tgt=form.profileKw)
+
+        # Nodal field
+        ComboBox_3 = AFXComboBox(p=self, ncols=0, nvis=1, text='Nodal field (extrapolate the index or the stresses):', tgt=form.nodal_policyKw)
+        for policy in ('none', 'index', 'stress'):
+            ComboBox_3.appendItem(policy)
+        FXCheckButton(p=self, text='Average at the nodes only within each material', tgt=form.material_averagingKw)
+
+        # Section points of shells
+        ComboBox_4 = AFXComboBox(p=self, ncols=0, nvis=1, text='Shell section points (all or maximum through the thickness):', tgt=form.section_pointsKw)
+        for mode in ('none', 'all', 'max'):
+            ComboBox_4.appendItem(mode)
+
+        # Compact output, e.g. FI or FI,FN as separate scalar fields in single precision
+        AFXTextField(p=self, ncols=12, labelText='Scalar outputs FI, FN, SEQ, FRAME, SP (empty = vector field):', tgt=form.outputsKw, sel=0)
+        AFXTextField(p=self, ncols=6, labelText='Write only elements with a failure index above (0 = all):', tgt=form.output_thresholdKw, sel=0,
+            opts=AFXTEXTFIELD_FLOAT)
+
+        # Region of interest, e.g. the element set of a bolted joint or a notch
+        AFXTextField(p=self, ncols=12, labelText='Evaluate only the element sets (comma separated, empty = all):', tgt=form.element_setsKw, sel=0)
+        AFXTextField(p=self, ncols=12, labelText='Evaluate only the box xmin, ymin, zmin, xmax, ymax, zmax (empty = all):', tgt=form.bounding_boxKw, sel=0)
+        AFXTextField(p=self, ncols=6, labelText='Evaluate only elements with a von Mises stress above (0 = all):', tgt=form.mises_thresholdKw, sel=0,
+            opts=AFXTEXTFIELD_FLOAT)
+        FXCheckButton(p=self, text='Run in the background (status and cancel in the Plug-ins menu)', tgt=form.backgroundKw)
+
         # Material Parameters Definition
         self.materialLabel = FXLabel(p=self, text="Please fill out the table. If you dont want to calculate the failure index \n for a material, put in 0 as the tensile and compression strength.")
         materials = session.odbs[odb_name].materials.keys()
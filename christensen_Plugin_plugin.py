@@ -11,7 +11,8 @@ class Christensen_Plugin_plugin(AFXForm):
 
     [
         ID_1,
-    ] = range(AFXForm.ID_LAST, AFXForm.ID_LAST + 1)
+        ID_POLL,
+    ] = range(AFXForm.ID_LAST, AFXForm.ID_LAST + 2)
 
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
     def __init__(self, owner):
@@ -33,9 +34,30 @@ class Christensen_Plugin_plugin(AFXForm):
 
         FXMAPFUNC(self, SEL_COMMAND, self.ID_1,
                   Christensen_Plugin_plugin.getNextDialog)
+        # timer which follows a run in the background
+        FXMAPFUNC(self, SEL_TIMEOUT, self.ID_POLL,
+                  Christensen_Plugin_plugin.onPoll)
+        self.statusFile = None
 
         self.materials_Keyword = AFXTableKeyword(self.cmd, 'material_entries', True, 0, -1)
 
+        # Evaluation of all frames (envelope of the failure index)
+        self.all_framesKw = AFXBoolKeyword(self.cmd, 'all_frames', AFXBoolKeyword.TRUE_FALSE, True, False)
+        self.frame_strideKw = AFXIntKeyword(self.cmd, 'frame_stride', True, 1)
+        self.use_cacheKw = AFXBoolKeyword(self.cmd, 'use_cache', AFXBoolKeyword.TRUE_FALSE, True, False)
+        self.chunk_sizeKw = AFXIntKeyword(self.cmd, 'chunk_size', True, 0)
+        self.write_reportKw = AFXBoolKeyword(self.cmd, 'write_report', AFXBoolKeyword.TRUE_FALSE, True, False)
+        self.profileKw = AFXBoolKeyword(self.cmd, 'profile', AFXBoolKeyword.TRUE_FALSE, True, False)
+        self.nodal_policyKw = AFXStringKeyword(self.cmd, 'nodal_policy', True, 'none')
+        self.material_averagingKw = AFXBoolKeyword(self.cmd, 'material_averaging', AFXBoolKeyword.TRUE_FALSE, True, True)
+        self.section_pointsKw = AFXStringKeyword(self.cmd, 'section_points', True, 'none')
+        self.outputsKw = AFXStringKeyword(self.cmd, 'outputs', True, '')
+        self.output_thresholdKw = AFXFloatKeyword(self.cmd, 'output_threshold', True, 0.)
+        self.backgroundKw = AFXBoolKeyword(self.cmd, 'background', AFXBoolKeyword.TRUE_FALSE, True, False)
+        self.element_setsKw = AFXStringKeyword(self.cmd, 'element_sets', True, '')
+        self.bounding_boxKw = AFXStringKeyword(self.cmd, 'bounding_box', True, '')
+        self.mises_thresholdKw = AFXFloatKeyword(self.cmd, 'mises_threshold', True, 0.)
+
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
     def getFirstDialog(self):
 
@@ -81,6 +103,29 @@ class Christensen_Plugin_plugin(AFXForm):
                 pass
         return True
 
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def doCustomTasks(self):
+
+        # A run in the background is polled with a timer, which shows its progress in the prompt area
+        # and opens the odb again once the run is finished
+        if self.backgroundKw.getValue():
+            import christensen_background
+            self.statusFile = os.path.join(christensen_background.run_directory(self.odbKw.getValue()),
+                                           christensen_background.STATUS_FILE)
+            getAFXApp().addTimeout(christensen_background.POLL_INTERVAL, self, self.ID_POLL)
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def onPoll(self, sender, sel, ptr):
+
+        import christensen_background
+        # the status is read before the kernel is polled, so the last poll after the run has finished
+        # still opens the odb and prints the result
+        finished = christensen_background.read_status(self.statusFile).get('finished', False)
+        sendCommand('import christensen_background; christensen_background.poll_background()')
+        if not finished:
+            getAFXApp().addTimeout(christensen_background.POLL_INTERVAL, self, self.ID_POLL)
+        return 1
+
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
     def okToCancel(self):
 
@@ -110,3 +155,23 @@ toolset.registerGuiMenuButton(
     description='This Plugin allows the User to calculate the Failure Index in an .odb File according to the Christensen Failure Criterion',
     helpUrl='https://www.cld.uni-rostock.de'
 )
+
+# status and cancellation of a run in the background
+toolset.registerKernelMenuButton(
+    buttonText='Christensen Plugin: Status of the background run',
+    moduleName='christensen_background',
+    functionName='background_status()',
+    applicableModules=ALL,
+    version='1.0',
+    author='Mathis Hach',
+    description='Prints the progress of the Christensen run in the background and opens the odb again once it is finished'
+)
+toolset.registerKernelMenuButton(
+    buttonText='Christensen Plugin: Cancel the background run',
+    moduleName='christensen_background',
+    functionName='cancel_background()',
+    applicableModules=ALL,
+    version='1.0',
+    author='Mathis Hach',
+    description='Cancels the Christensen run in the background after the current chunk, the odb is not changed'
+)
@@ -0,0 +1,375 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Background execution of Christensen_Plugin_Backend.create_Christensen_fields in a separate `abaqus python` process:
+# the Abaqus scripting interface is not thread-safe, so the kernel of the GUI does not touch the odb while the run writes
+# to it. The kernel command returns at once and the session stays usable. The odb is closed in the session before the
+# run starts and opened again once it is finished; no other run can use it in the meantime.
+# The process and the kernel communicate with files in the run directory next to the odb: the options of the run, a
+# status file with the progress (evaluated points, throughput and ETA), which the process rewrites after its chunks,
+# and a cancel file. cancel_background() creates the cancel file, the process stops after the chunk which is currently
+# evaluated and closes the odb without saving, so it keeps its state from before the run.
+
+# Minimal time in seconds between two progress reports
+REPORT_INTERVAL = 2.
+
+# Interval in milliseconds of the GUI timer which polls the status of a run
+POLL_INTERVAL = 2000
+
+# Name of the status file in the run directory
+STATUS_FILE = 'status.json'
+
+# Command which starts the Abaqus Python interpreter, e.g. the full path of abaqus.bat or of a versioned command (abq2023)
+ABAQUS_COMMAND = os.environ.get('CHRISTENSEN_ABAQUS_COMMAND', 'abaqus')
+
+# The run of this kernel session, only one run can be active at a time
+current_run = None
+
+
+class RunCancelled(Exception):
+    pass
+
+
+def show_in_prompt_area(status):
+    """
+    Shows the progress as milestone in the prompt area, only inside Abaqus and once the number of units is known
+    """
+    try:
+        from abaqus import milestone
+        if status.get('total_units'):
+            milestone('Christensen: %d points' % status['points'], 'instances and steps', status['units_done'], status['total_units'])
+    except Exception:
+        pass
+
+
+def report_progress(status):
+    """
+    Default report of Progress: a line in the message area and, inside Abaqus, a milestone in the prompt area
+    """
+    print(status['message'])
+    show_in_prompt_area(status)
+
+
+def write_status(status_file):
+    """
+    Returns a report function for Progress which writes the status as JSON to status_file
+    """
+    def report(status):
+        with open(status_file, 'w') as f:
+            json.dump(status, f)
+    return report
+
+
+class Progress:
+
+    def __init__(self, total_units=0, report=report_progress, interval=REPORT_INTERVAL, cancel_file=None):
+        """
+        Progress of a run, updated after every evaluated chunk (see PhaseTimer.count_points). The ETA is estimated from the
+        points of the finished units (one unit per instance and step and field) and the throughput so far.
+
+        Parameters:
+        ---------------
+            total_units: Integer
+                number of units of the run, can be set later with set_total
+
+            report: Function
+                called with the status (see status()) at most every interval seconds, None for no reports
+
+            interval: Float
+                minimal time between two reports in seconds
+
+            cancel_file: String
+                optional, the run is also cancelled once this file exists (run in a separate process)
+        """
+        self.total_units = total_units
+        self.units_done = 0
+        self.points = 0
+        self.points_of_units = 0
+        self.start = time.time()
+        self.last_report = self.start
+        self.report = report
+        self.interval = interval
+        self.cancel_file = cancel_file
+        self.cancel_requested = False
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def cancelled(self):
+        if not self.cancel_requested and self.cancel_file is not None and os.path.exists(self.cancel_file):
+            self.cancel_requested = True
+        return self.cancel_requested
+
+    def set_total(self, total_units):
+        self.total_units = total_units
+
+    def update(self, points):
+        """
+        Adds the points of an evaluated chunk, raises RunCancelled if the run was cancelled
+        """
+        self.points += int(points)
+        if self.cancelled():
+            raise RunCancelled('The run was cancelled after %d points.' % self.points)
+        self.report_if_due()
+
+    def finish_unit(self):
+        self.units_done += 1
+        self.points_of_units = self.points
+        self.report_if_due()
+
+    def report_if_due(self):
+        if self.report is not None and time.time() - self.last_report >= self.interval:
+            self.last_report = time.time()
+            self.report(self.status())
+
+    def status(self):
+        """
+        Returns the progress as Dictionary: points, units_done, total_units, elapsed time, points_per_second,
+        eta (seconds, None while no unit is finished) and a message line
+        """
+        elapsed = time.time() - self.start
+        points_per_second = self.points / elapsed if elapsed > 0 else None
+        eta = None
+        if self.units_done > 0 and self.total_units and points_per_second:
+            expected_points = float(self.points_of_units) / self.units_done * self.total_units
+            eta = max(expected_points - self.points, 0.) / points_per_second
+        message = 'Christensen: %d points, %d/%d instances and steps, %.0f points/s' % (
+            self.points, self.units_done, self.total_units, points_per_second or 0.)
+        if eta is not None:
+            message += ', about %.0f s left' % eta
+        return {'points': self.points, 'units_done': self.units_done, 'total_units': self.total_units, 'elapsed': elapsed,
+                'points_per_second': points_per_second, 'eta': eta, 'message': message}
+
+
+def run_directory(odb_name):
+    """
+    Default directory of the run files of an odb, <odb name>_christensen_run next to the odb
+    """
+    return os.path.splitext(os.path.abspath(odb_name))[0] + '_christensen_run'
+
+
+def read_status(status_file):
+    """
+    Returns the status written by the process (see Progress.status), an empty Dictionary if it is not written yet or
+    being written
+    """
+    try:
+        with open(status_file) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+
+def close_in_session(odb_name):
+    """
+    Closes the odb in the session of the Abaqus kernel, returns False outside of Abaqus or if it is not open
+    """
+    try:
+        from abaqus import session
+    except ImportError:
+        return False
+    path = os.path.abspath(odb_name)
+    for name in list(session.odbs.keys()):
+        if os.path.abspath(session.odbs[name].path) == path:
+            session.odbs[name].close()
+            return True
+    return False
+
+
+def open_in_session(odb_name):
+    """
+    Opens the odb again in the session of the Abaqus kernel, so that the new fields are shown
+    """
+    try:
+        from odbAccess import openOdb
+    except ImportError:
+        return False
+    openOdb(odb_name, readOnly=False)
+    return True
+
+
+class BackgroundRun:
+
+    def __init__(self, options, directory=None, command=None):
+        """
+        Run of create_Christensen_fields(**options) in a separate process
+
+        Parameters:
+        ---------------
+            options: Dictionary
+                keyword arguments of create_Christensen_fields, they have to be JSON serializable
+
+            directory: String
+                optional, directory of the run files, by default run_directory(odb name)
+
+            command: List of Strings
+                optional, command which runs this module with the run file as argument, by default
+                [ABAQUS_COMMAND, 'python', <this module>]
+        """
+        self.options = options
+        self.odb_name = os.path.abspath(options['odb_name'])
+        self.directory = directory or run_directory(self.odb_name)
+        self.run_file = os.path.join(self.directory, 'run.json')
+        self.status_file = os.path.join(self.directory, STATUS_FILE)
+        self.cancel_file = os.path.join(self.directory, 'cancel')
+        self.log_file = os.path.join(self.directory, 'log.txt')
+        self.command = command or [ABAQUS_COMMAND, 'python', os.path.splitext(os.path.abspath(__file__))[0] + '.py']
+        self.process = None
+        self.reopened = False
+        # the result of the finished run was printed
+        self.reported = False
+        self.last_status = {}
+
+    def start(self):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        for file_name in (self.status_file, self.cancel_file):
+            if os.path.exists(file_name):
+                os.remove(file_name)
+        with open(self.run_file, 'w') as f:
+            json.dump({'options': self.options, 'status_file': self.status_file, 'cancel_file': self.cancel_file}, f, indent=2)
+        command = list(self.command) + [self.run_file]
+        with open(self.log_file, 'w') as log:
+            # abaqus is a batch file on Windows, which is only found by the shell
+            if os.name == 'nt':
+                self.process = subprocess.Popen(subprocess.list2cmdline(command), stdout=log, stderr=subprocess.STDOUT, shell=True)
+            else:
+                self.process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+        return self
+
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def cancel(self):
+        open(self.cancel_file, 'w').close()
+
+    def status(self):
+        """
+        Returns the last status written by the process (see Progress.status), after the run also finished, cancelled and error
+        """
+        status = read_status(self.status_file)
+        if status:
+            self.last_status = status
+        return dict(self.last_status)
+
+    def join(self, timeout=None):
+        """
+        Waits until the process has finished (at most timeout seconds) and returns the status
+        """
+        start = time.time()
+        while self.running() and (timeout is None or time.time() - start < timeout):
+            time.sleep(0.1)
+        return self.status()
+
+
+def run_in_process(run_file):
+    """
+    Entry point of the separate process: runs create_Christensen_fields with the options of the run file. The progress
+    is written to the status file, the final status also holds finished, cancelled, error and the report of the run.
+    """
+    with open(run_file) as f:
+        run = json.load(f)
+    report = write_status(run['status_file'])
+    progress = Progress(report=report, cancel_file=run['cancel_file'])
+    status = {}
+    try:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        from Christensen_Plugin_Backend import create_Christensen_fields
+        options = dict((str(key), value) for key, value in run['options'].items())
+        result = create_Christensen_fields(progress=progress, reopen=False, **options)
+        status = progress.status()
+        status.update({'finished': True, 'cancelled': result['cancelled'], 'error': None, 'report': result})
+    except Exception as error:
+        import traceback
+        traceback.print_exc()
+        status = progress.status()
+        status.update({'finished': True, 'cancelled': False, 'error': str(error)})
+    report(status)
+    return 1 if status['error'] else 0
+
+
+def background_odb():
+    """
+    Returns the path of the odb of the active run, None if no run is active
+    """
+    if current_run is not None and current_run.running():
+        return current_run.odb_name
+    return None
+
+
+def start_background(options, directory=None, command=None):
+    """
+    Starts create_Christensen_fields(**options) in a separate process and returns the BackgroundRun. The odb is closed
+    in the session until the run has finished.
+    """
+    global current_run
+    if background_odb() is not None:
+        raise RuntimeError('A Christensen run is still active, cancel it first or wait until it is finished.')
+    close_in_session(options['odb_name'])
+    current_run = BackgroundRun(options, directory, command).start()
+    print('The Christensen run was started in the background, the odb is closed until it is finished (log: %s).' % current_run.log_file)
+    return current_run
+
+
+def cancel_background():
+    """
+    Cancels the active run after its current chunk, its odb is not saved
+    """
+    if current_run is None or not current_run.running():
+        print('There is no active Christensen run.')
+        return False
+    current_run.cancel()
+    print('The Christensen run is cancelled after the current chunk.')
+    return True
+
+
+def background_status():
+    """
+    Prints and returns the status of the last run (see Progress.status), None if there was no run. Once the run is
+    finished, its odb is opened again in the session.
+    """
+    if current_run is None:
+        print('There is no Christensen run.')
+        return None
+    running = current_run.running()
+    status = current_run.status()
+    status['running'] = running
+    status.setdefault('message', 'Christensen: the run is starting')
+    if not running:
+        if not status.get('finished'):
+            # the final status is written for the process, so that the timer of the GUI stops as well
+            status.update({'finished': True, 'cancelled': False, 'error': 'The process ended without a result, see %s' % current_run.log_file})
+            write_status(current_run.status_file)(status)
+        if not current_run.reopened:
+            current_run.reopened = open_in_session(current_run.odb_name)
+    report_progress(status)
+    if not running:
+        print('The Christensen run is ' + ('cancelled, the odb was not changed.' if status.get('cancelled') else 'finished.')
+              if not status.get('error') else 'The Christensen run failed: ' + status['error'])
+        current_run.reported = True
+    return status
+
+
+def poll_background():
+    """
+    Called by the timer of the GUI every POLL_INTERVAL while a run is active: shows its progress in the prompt area. Once
+    the run has finished, its odb is opened again and the result is printed once, see background_status.
+
+    Returns:
+    ---------------
+        True while the run is active
+    """
+    if current_run is None or current_run.reported:
+        return False
+    if current_run.running():
+        show_in_prompt_area(current_run.status())
+        return True
+    background_status()
+    return False
+
+
+if __name__ == '__main__':
+    sys.exit(run_in_process(sys.argv[1]))
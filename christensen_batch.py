@@ -0,0 +1,190 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from christensen_cache import cache_key
+
+# Headless batch processing of many odbs, run with the Python of Abaqus, e.g.
+#     abaqus python christensen_batch.py campaign.json --workers 4
+# The manifest is a JSON file with default settings and one entry per odb, the entries override the defaults:
+#     {"defaults": {"instances": "ALL", "steps": "ALL", "materials": {"STEEL": [100, 300]}, "options": {"all_frames": false}},
+#      "odbs": [{"path": "job1.odb"}, {"path": "job2.odb", "steps": ["Step-2"], "materials": {"ALU": [50, 200]}}]}
+# The options are passed to Christensen_Plugin_Backend.create_Christensen_fields, every odb is closed after it was saved.
+# Every finished odb is appended to the checkpoint file, a restarted campaign skips the odbs which were already done with
+# the same settings and have not changed since (modification time and size of the odb file).
+
+SUMMARY_COLUMNS = ['odb', 'status', 'seconds', 'points', 'max_failure_index', 'nan_points', 'error']
+
+
+def load_jobs(manifest_path):
+    """
+    Returns the jobs of a manifest, one dictionary per odb with the keys path, instances, steps, materials, options and key
+    (identifies the odb and its settings in the checkpoint)
+    """
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    defaults = manifest.get('defaults', {})
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    jobs = []
+    for entry in manifest['odbs']:
+        if not isinstance(entry, dict):
+            entry = {'path': entry}
+        job = {'path': os.path.join(base, entry['path']),
+               'instances': entry.get('instances', defaults.get('instances', 'ALL')),
+               'steps': entry.get('steps', defaults.get('steps', 'ALL')),
+               'materials': dict(defaults.get('materials', {}), **entry.get('materials', {})),
+               'options': dict(defaults.get('options', {}), **entry.get('options', {}))}
+        job['key'] = cache_key(job['path'], job['instances'], job['steps'], sorted(job['materials'].items()), sorted(job['options'].items()))
+        jobs.append(job)
+    return jobs
+
+
+def odb_identity(path):
+    """
+    Returns [modification time, size] of the odb file, None if it does not exist. The record of a job stores the identity
+    after the run, since the run itself changes the file when it saves the fields.
+    """
+    if not os.path.exists(path):
+        return None
+    return [os.path.getmtime(path), os.path.getsize(path)]
+
+
+def load_checkpoint(checkpoint_path):
+    """
+    Returns the records of the checkpoint file (one JSON record per line), key: job key, the last record of a job wins
+    """
+    records = {}
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # an interrupted write only loses the last record
+                    continue
+                records[record['key']] = record
+    return records
+
+
+def process_odb(job):
+    """
+    Task of the work queue: adds the Christensen fields to one odb and returns the record for the checkpoint and the summary
+    """
+    record = {'key': job['key'], 'odb': job['path'], 'status': 'failed', 'seconds': 0., 'points': 0,
+              'max_failure_index': None, 'nan_points': 0, 'error': ''}
+    start = time.time()
+    try:
+        from Christensen_Plugin_Backend import create_Christensen_fields
+        # there is no session to show the fields in, the odb is not opened again after it was saved
+        options = dict(job['options'], reopen=False)
+        report = create_Christensen_fields(job['path'], job['instances'], job['steps'], job['materials'], **options)
+        record['status'] = 'done'
+        record['points'] = report['counters'].get('points', 0)
+        record['nan_points'] = report['counters'].get('nan_points', 0)
+        record['max_failure_index'] = report['max_failure_index']
+    except Exception:
+        record['error'] = traceback.format_exc().strip().splitlines()[-1]
+    record['seconds'] = time.time() - start
+    record['odb_identity'] = odb_identity(job['path'])
+    return record
+
+
+def write_summary(summary_path, records):
+    with open(summary_path, 'w') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(SUMMARY_COLUMNS)
+        for record in records:
+            writer.writerow([record[column] if record[column] is not None else '' for column in SUMMARY_COLUMNS])
+
+
+def print_summary(records):
+    print('%-40s %-7s %9s %12s %10s' % ('odb', 'status', 'seconds', 'points', 'max index'))
+    for record in records:
+        max_index = '%10.4f' % record['max_failure_index'] if record['max_failure_index'] is not None else '%10s' % '-'
+        print('%-40s %-7s %9.1f %12d %s %s' % (os.path.basename(record['odb'])[-40:], record['status'], record['seconds'],
+                                              record['points'], max_index, record['error']))
+
+
+def run_campaign(manifest_path, workers=1, checkpoint_path=None, summary_path=None, retry_failed=True):
+    """
+    Processes all odbs of a manifest through a work queue
+
+    Parameters:
+    ---------------
+        manifest_path: String
+
+        workers: Integer
+            number of odbs processed at the same time, every odb is processed in its own worker process
+
+        checkpoint_path: String
+            optional, by default <manifest>_checkpoint.jsonl
+
+        summary_path: String
+            optional, CSV summary table, by default <manifest>_summary.csv
+
+        retry_failed: Boolean
+            if False, odbs which failed in a previous run are skipped as well
+
+    Returns:
+    ---------------
+        List of the records of all odbs of the manifest
+    """
+    base = os.path.splitext(manifest_path)[0]
+    checkpoint_path = checkpoint_path or base + '_checkpoint.jsonl'
+    summary_path = summary_path or base + '_summary.csv'
+
+    jobs = load_jobs(manifest_path)
+    finished = load_checkpoint(checkpoint_path)
+    # an odb is only skipped if it was not changed (e.g. by a new analysis) after its record was written
+    skipped = [job for job in jobs if job['key'] in finished and finished[job['key']].get('odb_identity') == odb_identity(job['path'])
+               and (finished[job['key']]['status'] == 'done' or not retry_failed)]
+    todo = [job for job in jobs if job not in skipped]
+    print('%d odbs in the manifest, %d already processed, %d to do' % (len(jobs), len(skipped), len(todo)))
+
+    with open(checkpoint_path, 'a') as checkpoint:
+        def finish(record):
+            finished[record['key']] = record
+            checkpoint.write(json.dumps(record) + '\n')
+            checkpoint.flush()
+            print('%s: %s (%.1f s) %s' % (record['odb'], record['status'], record['seconds'], record['error']))
+
+        if workers > 1:
+            # a fresh process per odb, so that the memory of an odb is released before the next one
+            pool = multiprocessing.Pool(workers, maxtasksperchild=1)
+            try:
+                for record in pool.imap_unordered(process_odb, todo):
+                    finish(record)
+                pool.close()
+            except BaseException:
+                pool.terminate()
+                raise
+            pool.join()
+        else:
+            for job in todo:
+                finish(process_odb(job))
+
+    records = [finished[job['key']] for job in jobs]
+    write_summary(summary_path, records)
+    print_summary(records)
+    print('Summary written to ' + summary_path)
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Adds the Christensen fields to all odbs of a manifest')
+    parser.add_argument('manifest', help='JSON manifest of the odbs, instances, steps, materials and options')
+    parser.add_argument('--workers', type=int, default=1, help='number of odbs processed at the same time')
+    parser.add_argument('--checkpoint', default=None, help='checkpoint file, by default <manifest>_checkpoint.jsonl')
+    parser.add_argument('--summary', default=None, help='CSV summary table, by default <manifest>_summary.csv')
+    parser.add_argument('--skip-failed', action='store_true', help='do not retry odbs which failed in a previous run')
+    args = parser.parse_args(argv)
+    records = run_campaign(args.manifest, args.workers, args.checkpoint, args.summary, not args.skip_failed)
+    return 0 if all([record['status'] == 'done' for record in records]) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
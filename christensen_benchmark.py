@@ -0,0 +1,199 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+import time
+import numpy as np
+
+# Benchmark of the Christensen criterion kernels and of the odb pipeline on a fake odb (christensen_fake_odb).
+# Runs with plain Python and NumPy, e.g.
+#     python christensen_benchmark.py --output benchmark.json
+# The results are written as JSON, one record per measurement.
+
+STRESS_CASES = ['random', 'uniaxial', 'pure_shear', 'hydrostatic', 'plane_stress']
+# T/C ratios on both sides of the switch of the fracture criterion at T/C = 1/2
+TC_RATIOS = [0.2, 0.4, 0.5, 0.6, 1.0]
+
+
+def synthetic_stresses(case, n, rng):
+    """
+    Creates n stress states of the given case ('random', 'uniaxial', 'pure_shear', 'hydrostatic' or 'plane_stress'),
+    plane stress states have 4 components, all others 6
+    """
+    amplitude = 100. * rng.standard_normal(n)
+    if case == 'random':
+        return 100. * rng.standard_normal((n, 6))
+    if case == 'plane_stress':
+        return 100. * rng.standard_normal((n, 4))
+    stresses = np.zeros((n, 6))
+    if case == 'uniaxial':
+        stresses[:, 0] = amplitude
+    elif case == 'pure_shear':
+        stresses[:, 3] = amplitude
+    elif case == 'hydrostatic':
+        stresses[:, :3] = amplitude[:, None]
+    else:
+        raise ValueError('Unknown stress case ' + case)
+    return stresses
+
+
+def timed(function, repeat=1):
+    """
+    Returns the shortest wall clock time of repeat calls of function
+    """
+    best = float('inf')
+    for i in range(repeat):
+        start = time.time()
+        function()
+        best = min(best, time.time() - start)
+    return best
+
+
+def record(results, benchmark, seconds, points, **parameters):
+    entry = {'benchmark': benchmark, 'seconds': seconds, 'points': points,
+             'points_per_second': points / seconds if seconds > 0 else None}
+    entry.update(parameters)
+    results.append(entry)
+    print('%-28s %10d points %10.4f s  %s' % (benchmark, points, seconds, parameters))
+
+
+def benchmark_kernels(results, sizes, max_scalar_points, repeat, rng):
+    from christensen_criterion import Christensen_class, calc_fail_ind, calc_fail_ind_batch
+    T = 100.
+    for ratio in TC_RATIOS:
+        C = T / ratio
+        for case in STRESS_CASES:
+            for n in sizes:
+                stresses = synthetic_stresses(case, n, rng)
+                seconds = timed(lambda: calc_fail_ind_batch(stresses, T, C), repeat)
+                record(results, 'calc_fail_ind_batch', seconds, n, case=case, tc_ratio=ratio)
+
+                # The per point paths are only measured up to max_scalar_points
+                if n > max_scalar_points:
+                    continue
+                seconds = timed(lambda: [Christensen_class(s, T, C).calc_main() for s in stresses], repeat)
+                record(results, 'Christensen_class.calc_main', seconds, n, case=case, tc_ratio=ratio)
+                seconds = timed(lambda: [calc_fail_ind(s, T, C) for s in stresses], repeat)
+                record(results, 'calc_fail_ind', seconds, n, case=case, tc_ratio=ratio)
+
+
+def benchmark_principal_stresses(results, sizes, repeat, rng):
+    from christensen_principal_stresses import principal_stresses
+    for n in sizes:
+        stresses = synthetic_stresses('random', n, rng)
+        seconds = timed(lambda: principal_stresses(stresses), repeat)
+        record(results, 'principal_stresses', seconds, n)
+
+
+def benchmark_workers(results, sizes, workers, element_counts, points_per_element, repeat, rng):
+    """
+    Evaluation in the calling process (workers=1) against the process pool of christensen_parallel, for the kernel alone
+    and for create_Christensen_fields on a fake odb. The pool is started once per number of workers and is not part of
+    the measured time, the transfer of the arrays to the workers is.
+    """
+    from christensen_criterion import calc_fail_ind_batch
+    from christensen_parallel import ChristensenPool
+    import christensen_fake_odb
+    christensen_fake_odb.install()
+    import Christensen_Plugin_Backend as backend
+    mat_dict = {'STEEL': [100., 300.], 'ALU': [50., 200.]}
+
+    # 1. Kernel
+    for n in sizes:
+        stresses = synthetic_stresses('random', n, rng)
+        serial = timed(lambda: calc_fail_ind_batch(stresses, 100., 300.), repeat)
+        record(results, 'workers', serial, n, workers=1, speedup=1.)
+        for count in workers:
+            if count <= 1:
+                continue
+            with ChristensenPool(count) as pool:
+                seconds = timed(lambda: pool.calc_fail_ind(stresses, 100., 300.), repeat)
+            record(results, 'workers', seconds, n, workers=count, speedup=serial / seconds if seconds > 0 else None)
+
+    # 2. Whole pipeline, the pool is started by create_Christensen_fields and is part of the time here
+    for num_elements in element_counts:
+        path = 'benchmark_workers_%d.odb' % num_elements
+        christensen_fake_odb.create_fake_odb(path, num_elements, points_per_element, ('Step-1', 'Step-2'))
+        points = 2 * num_elements * points_per_element
+        serial = timed(lambda: backend.create_Christensen_fields(path, 'PART-1-1', ['Step-1', 'Step-2'], mat_dict), repeat)
+        record(results, 'create_Christensen_fields', serial, points, elements=num_elements, workers=1, speedup=1.)
+        for count in workers:
+            if count <= 1:
+                continue
+            seconds = timed(lambda: backend.create_Christensen_fields(path, 'PART-1-1', ['Step-1', 'Step-2'], mat_dict, workers=count), repeat)
+            record(results, 'create_Christensen_fields', seconds, points, elements=num_elements, workers=count,
+                   speedup=serial / seconds if seconds > 0 else None)
+
+
+def benchmark_pipeline(results, element_counts, points_per_element, lookups, repeat):
+    import christensen_fake_odb
+    christensen_fake_odb.install()
+    import Christensen_Plugin_Backend as backend
+    mat_dict = {'STEEL': [100., 300.], 'ALU': [50., 200.]}
+    for num_elements in element_counts:
+        path = 'benchmark_%d.odb' % num_elements
+        odb = christensen_fake_odb.create_fake_odb(path, num_elements, points_per_element, ('Step-1', 'Step-2'))
+        instance = odb.rootAssembly.instances['PART-1-1']
+        points = num_elements * points_per_element
+
+        seconds = timed(lambda: backend.SectionIndex(odb, instance), repeat)
+        record(results, 'SectionIndex', seconds, num_elements, elements=num_elements)
+
+        # getSectionName walks all section assignments for every lookup
+        labels = np.linspace(1, num_elements, lookups).astype(int)
+        seconds = timed(lambda: [backend.getSectionName(label, instance) for label in labels], repeat)
+        record(results, 'getSectionName', seconds, lookups, elements=num_elements,
+               seconds_per_lookup=seconds / lookups)
+
+        for quadratic_elements in (True, False):
+            seconds = timed(lambda: backend.create_Christensen_fields(path, 'PART-1-1', ['Step-1', 'Step-2'], mat_dict,
+                            quadratic_elements=quadratic_elements), repeat)
+            record(results, 'create_Christensen_fields', seconds, 2 * points, elements=num_elements,
+                   quadratic_elements=quadratic_elements)
+
+        seconds = timed(lambda: backend.create_Christensen_field_variable_multiple_materials_also_for_quadratic_elements(
+                        path, 'PART-1-1', 'Step-1', mat_dict), repeat)
+        record(results, 'create_..._also_for_quadratic_elements', seconds, points, elements=num_elements)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark of the Christensen criterion and of the odb pipeline')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10**3, 10**4, 10**5, 10**6, 10**7],
+                        help='numbers of stress states for the kernel benchmarks')
+    parser.add_argument('--max-scalar-points', type=int, default=10**4,
+                        help='largest size for which the per point paths (Christensen_class, calc_fail_ind) are measured')
+    parser.add_argument('--elements', type=int, nargs='+', default=[10**3, 10**4, 10**5],
+                        help='numbers of elements of the fake odbs for the pipeline benchmarks')
+    parser.add_argument('--points-per-element', type=int, default=4)
+    parser.add_argument('--lookups', type=int, default=100, help='number of getSectionName calls per fake odb')
+    parser.add_argument('--repeat', type=int, default=1, help='the best of repeat runs is reported')
+    parser.add_argument('--skip-kernels', action='store_true')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, max(multiprocessing.cpu_count(), 2)],
+                        help='numbers of worker processes compared with the evaluation in the calling process')
+    parser.add_argument('--skip-pipeline', action='store_true')
+    parser.add_argument('--skip-workers', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='christensen_benchmark.json', help='path of the JSON result file')
+    args = parser.parse_args(argv)
+
+    rng = np.random.RandomState(args.seed)
+    results = []
+    if not args.skip_kernels:
+        benchmark_principal_stresses(results, args.sizes, args.repeat, rng)
+        benchmark_kernels(results, args.sizes, args.max_scalar_points, args.repeat, rng)
+    if not args.skip_pipeline:
+        benchmark_pipeline(results, args.elements, args.points_per_element, args.lookups, args.repeat)
+    if not args.skip_workers:
+        benchmark_workers(results, args.sizes, sorted(set(args.workers)), args.elements, args.points_per_element, args.repeat, rng)
+
+    report = {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(), 'cpus': multiprocessing.cpu_count(),
+              'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'arguments': vars(args), 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print('Results written to ' + args.output)
+    return report
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
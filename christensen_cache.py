@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import time
+import numpy as np
+
+# Default upper bound of the size of a cache directory
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+
+def cache_key(*parts):
+    """
+    Returns the key of a cache entry for the given parts, e.g. (odb identity, instance, step, frame)
+    """
+    return hashlib.sha1(json.dumps([str(part) for part in parts]).encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Persistent cache of the Christensen results of a frame. Every entry is a compressed .npz file with the element labels,
+        the results, the material id of every point and the (T, C) table the results were calculated with. A JSON index keeps
+        the size and the last access of the entries, the least recently used entries are removed if the directory gets
+        larger than max_bytes.
+
+        Parameters:
+        ---------------
+            directory: String
+                directory of the cache, it is created if it does not exist
+
+            max_bytes: Integer
+                upper bound of the size of all entries
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, 'index.json')
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.index = {}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path) as f:
+                    self.index = json.load(f)
+            except ValueError:
+                # a broken index only costs a recalculation
+                self.index = {}
+
+    def save_index(self):
+        with open(self.index_path, 'w') as f:
+            json.dump(self.index, f)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def load(self, key):
+        """
+        Returns the entry as a dictionary with the keys labels, results, material_ids, material_names, strengths
+        and info, or None if there is no entry
+        """
+        if key not in self.index or not os.path.exists(self.path(key)):
+            return None
+        with np.load(self.path(key)) as data:
+            entry = dict((name, data[name]) for name in ('labels', 'results', 'material_ids', 'strengths'))
+        entry['material_names'] = self.index[key]['material_names']
+        entry['info'] = self.index[key].get('info', {})
+        self.index[key]['last_access'] = time.time()
+        self.save_index()
+        return entry
+
+    def store(self, key, labels, results, material_ids, material_names, strengths, info=None):
+        """
+        Stores the results of a frame, strengths is the (number of materials, 2) table of T and C (NaN for materials which are not evaluated)
+        """
+        np.savez_compressed(self.path(key), labels=np.asarray(labels, dtype=np.int32), results=np.asarray(results, dtype=float),
+                            material_ids=np.asarray(material_ids, dtype=np.int32), strengths=np.asarray(strengths, dtype=float))
+        self.index[key] = {'size': os.path.getsize(self.path(key)), 'last_access': time.time(),
+                           'material_names': list(material_names), 'info': info or {}}
+        self.evict()
+        self.save_index()
+
+    def set_info(self, key, **info):
+        """
+        Adds information to an entry, e.g. the name of the FieldOutput Object the results were written to.
+        Keys without results (e.g. of a whole field) get an entry of size 0 in the index.
+        """
+        if key not in self.index:
+            self.index[key] = {'size': 0, 'last_access': time.time(), 'material_names': [], 'info': {}}
+        self.index[key].setdefault('info', {}).update(info)
+        self.index[key]['last_access'] = time.time()
+        self.save_index()
+
+    def info(self, key):
+        if key not in self.index:
+            return {}
+        return self.index[key].get('info', {})
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache is not larger than max_bytes
+        """
+        total = sum([entry['size'] for entry in self.index.values()])
+        for key in sorted(self.index, key=lambda k: self.index[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            total -= self.index[key]['size']
+            if os.path.exists(self.path(key)):
+                os.remove(self.path(key))
+            del self.index[key]
+
+
+def changed_materials(entry, material_names, strengths):
+    """
+    Compares a cache entry with the current material names and (T, C) table
+
+    Returns:
+    ---------------
+        None if the entry cannot be reused (no entry or other materials), otherwise the Array of the ids of the
+        materials whose strengths changed (empty if the results are still valid)
+    """
+    if entry is None or list(entry['material_names']) != list(material_names):
+        return None
+    old = entry['strengths']
+    new = np.asarray(strengths, dtype=float)
+    same = (old == new) | (np.isnan(old) & np.isnan(new))
+    return np.nonzero(~np.all(same, axis=1))[0]
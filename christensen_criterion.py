@@ -0,0 +1,352 @@
+import numpy as np
+from christensen_principal_stresses import principal_stresses, stress_components
+
+class Christensen_class:
+    
+    def __init__(self, entries_of_stress_tensor, T=100., C=300.):
+        """
+        Creates a new Christensen_class Object which can calculate the failure index according to Christensen
+    
+        Parameters:
+        ---------------
+            entries_of_stress_tensor: Array
+                has to have 6 entries for threedimensional stress states, 4 for plane stress states (S11, S22, S33, S12)
+                or 3 for the section points of shells (S11, S22, S12)
+    
+            T: Float
+                tensile strength of the material
+
+            C: Float
+                tensile strength of the material
+        """
+        self.T = T
+        self.C = C
+
+        if len(entries_of_stress_tensor) == 6:
+            self.S11 = entries_of_stress_tensor[0]
+            self.S22 = entries_of_stress_tensor[1]
+            self.S33 = entries_of_stress_tensor[2]
+            self.S12 = entries_of_stress_tensor[3]
+            self.S13 = entries_of_stress_tensor[4]
+            self.S23 = entries_of_stress_tensor[5]
+        elif len(entries_of_stress_tensor) == 4:
+            self.S11 = entries_of_stress_tensor[0]
+            self.S22 = entries_of_stress_tensor[1]
+            self.S33 = entries_of_stress_tensor[2]
+            self.S12 = entries_of_stress_tensor[3]
+            self.S13 = 0.
+            self.S23 = 0.
+        elif len(entries_of_stress_tensor) == 3:
+            self.S11 = entries_of_stress_tensor[0]
+            self.S22 = entries_of_stress_tensor[1]
+            self.S33 = 0.
+            self.S12 = entries_of_stress_tensor[2]
+            self.S13 = 0.
+            self.S23 = 0.
+
+    def calc_main(self):
+        
+        # 1. Calculation of the Principal Stresses
+        self.calc_PC()
+    
+        # 2. Calculation of the polar coordinates
+        self.calc_polar()
+
+        # 3. Calculation of the two sub-criteria
+        self.calc_rho_invariant_criterion()
+        self.calc_fracture_criterion()
+    
+        # 4. calculation of the single failure index of the material
+        self.calc_failure_index()
+
+        self.calc_fn()
+
+        return self.failure_index
+
+
+    
+    # 1. Calculation of the Principal Stresses
+    def calc_PC(self):
+        self.Principal_Stresses = principal_stresses([self.S11, self.S22, self.S33, self.S12, self.S13, self.S23])
+
+
+    # 2 Auxilary Method, calculates the polar coordinates in principal stress space
+    def calc_polar(self):
+        self.rho = np.sqrt(self.Principal_Stresses[0]**2 + self.Principal_Stresses[1]**2 + self.Principal_Stresses[2]**2)
+        self.theta = np.arctan2(np.sqrt(self.Principal_Stresses[0]**2 + self.Principal_Stresses[1]**2), self.Principal_Stresses[2])
+        self.phi = np.arctan2(self.Principal_Stresses[1], self.Principal_Stresses[0])
+    
+        self.sin_t = np.sin(self.theta)
+        self.cos_t = np.cos(self.theta)
+        self.sin_p = np.sin(self.phi)
+        self.cos_p = np.cos(self.phi)
+
+
+
+   # 3.1 Calculation of the Radius rho for the failure surface given the principal stresses and material strength
+    def calc_rho_invariant_criterion(self):
+        # Auxilary variables for the quadratic formula
+        aux_a_1 = 1./(2.*self.T*self.C)
+        aux_a_2 = ((self.sin_t * self.cos_p - self.sin_t * self.sin_p)**2 + (self.sin_t * self.cos_p - self.cos_t)**2 + (self.sin_t * self.sin_p - self.cos_t)**2)
+        self.aux_a = 1./(2.*self.T*self.C) * ((self.sin_t * self.cos_p - self.sin_t * self.sin_p)**2 + (self.sin_t * self.cos_p - self.cos_t)**2 + (self.sin_t * self.sin_p - self.cos_t)**2)
+        self.aux_b = (1./self.T-1/self.C) * (self.sin_t * self.sin_p + self.sin_t * self.cos_p + self.cos_t)
+        self.aux_c = -1.
+
+        if self.aux_a > 10**-20:   # if a is NOT extremely small, proceed with the usual 
+            rho = [np.abs((-self.aux_b + np.sqrt(self.aux_b**2 - 4*self.aux_a*self.aux_c))) / (2*self.aux_a), np.abs((-self.aux_b - np.sqrt(self.aux_b**2 - 4*self.aux_a*self.aux_c)) / (2*self.aux_a))]
+            if self.Principal_Stresses[0]+self.Principal_Stresses[1]+self.Principal_Stresses[2] > 0:
+                self.rho_invariant_criterion = min(rho)
+            else:
+                self.rho_invariant_criterion = max(rho)
+        
+        # if a is extremely small -> hydrostatic stress situation
+        else:
+            # hydrostatic tension
+            if sum(self.Principal_Stresses) > 0:
+                # if T 0/= C
+                if self.aux_b != 0:
+                    self.rho_invariant_criterion = -self.aux_c/self.aux_b
+                else:
+                    self.rho_invariant_criterion = None 
+            
+            # hydrostatic compression
+            else:
+                self.rho_invariant_criterion = None # in the case of hydrostatic pressure, there is no failure
+        
+        return self.rho_invariant_criterion
+
+
+    # 3.2
+    def calc_fracture_criterion(self):
+        self.max_ps = max(self.Principal_Stresses)
+        return self.max_ps
+
+
+    # 4 Calculation of the Failure Index
+    def calc_failure_index(self):
+        
+        # If the stress situation is not one of hydrostostatic pressure or tension for von-Mises like materials
+        if self.rho_invariant_criterion != None: 
+
+            # If T/C is smaller then .5, the fracture criterion is relevant
+            if self.T/self.C < 1./2.:    
+                self.failure_index = max(self.rho / self.rho_invariant_criterion, self.max_ps / self.T)
+    
+            # Otherwise, the fracture criterion is not relevant
+            else:
+                self.failure_index = self.rho/self.rho_invariant_criterion
+
+        else:
+            self.failure_index = float('NaN')
+
+
+    # 5 Calculation of the Failure Number
+    def calc_fn(self):
+        principal_stresses_at_failure = [0., 0., 0.]
+        principal_stresses_at_failure[0] = (self.rho / self.failure_index) * self.sin_t * self.cos_p    
+        principal_stresses_at_failure[1] = (self.rho / self.failure_index) * self.sin_t * self.sin_p
+        principal_stresses_at_failure[2] = (self.rho / self.failure_index) * self.cos_t
+        
+        self.Fn = 1./2. * (3*self.T/self.C-(sum(principal_stresses_at_failure)/self.C))
+        if self.Fn > 1:
+            self.Fn = 1
+        elif self.Fn < 0:
+            self.Fn = 0
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+def calc_fail_ind(data, T=100., C=300.):
+    ChristensenInst = Christensen_class(data, T, C)
+    return [ChristensenInst.calc_main(), ChristensenInst.Fn, ChristensenInst.calc_main() * T]
+
+
+def calc_fail_ind_batch(stresses, T=100., C=300.):
+    """
+    Vectorized version of calc_fail_ind, evaluates all given stress states in one NumPy pass
+
+    Parameters:
+    ---------------
+        stresses: Array
+            shape (N, 6) for threedimensional stress states, (N, 4) for plane stress states or (N, 3) for the
+            section points of shells, same component order as in Christensen_class
+
+        T: Float or Array
+            tensile strength of the material, either one value or one value per stress state
+
+        C: Float or Array
+            compressive strength of the material, either one value or one value per stress state
+
+    Returns:
+    ---------------
+        Array of shape (N, 3) with the failure index, the failure number and the equivalent stress
+        of each stress state, identical to the results of Christensen_class.calc_main
+    """
+    return fail_ind_from_decomposition(StressDecomposition(stresses), T, C)
+
+
+class StressDecomposition:
+
+    def __init__(self, stresses):
+        """
+        Part of the Christensen criterion which does not depend on T and C: principal stresses, radius and direction in
+        principal stress space. One decomposition can be evaluated for any number of strength pairs, see fail_ind_from_decomposition
+
+        Parameters:
+        ---------------
+            stresses: Array
+                shape (N, 6) or (N, 4), same as for calc_fail_ind_batch
+        """
+        stresses = stress_components(stresses)
+        n = stresses.shape[0]
+        self.n = n
+
+        # 1. Calculation of the Principal Stresses
+        self.principal = principal_stresses(stresses)
+
+        # 2. Radius and unit direction in principal stress space, the zero stress state points along the third axis
+        self.rho = np.sqrt(np.sum(self.principal**2, axis=1))
+        direction = np.zeros((n, 3))
+        direction[:, 2] = 1.
+        nonzero = self.rho > 0
+        direction[nonzero] = self.principal[nonzero] / self.rho[nonzero, None]
+
+        # Factors of the coefficients aux_a and aux_b of the invariant criterion
+        self.deviation = (direction[:, 0] - direction[:, 1])**2 + (direction[:, 0] - direction[:, 2])**2 + (direction[:, 1] - direction[:, 2])**2
+        self.direction_sum = np.sum(direction, axis=1)
+        self.max_principal = np.max(self.principal, axis=1)
+        self.tension = np.sum(self.principal, axis=1) > 0
+
+    def subset(self, mask):
+        """
+        Returns the decomposition of the points selected by the boolean or index Array mask
+        """
+        part = StressDecomposition.__new__(StressDecomposition)
+        for name in ('principal', 'rho', 'deviation', 'direction_sum', 'max_principal', 'tension'):
+            setattr(part, name, getattr(self, name)[mask])
+        part.n = len(part.rho)
+        return part
+
+
+def fail_ind_from_decomposition(decomposition, T=100., C=300.):
+    """
+    Evaluates the Christensen criterion of a StressDecomposition for the strengths T and C (Floats or Arrays of shape (N,)),
+    returns the same (N, 3) Array as calc_fail_ind_batch
+    """
+    d = decomposition
+    n = d.n
+    T = np.broadcast_to(np.asarray(T, dtype=float), (n,))
+    C = np.broadcast_to(np.asarray(C, dtype=float), (n,))
+
+    # 3.1 Radius of the invariant criterion, the quadratic formula is only used outside of the hydrostatic axis
+    aux_a = 1./(2.*T*C) * d.deviation
+    aux_b = (1./T - 1./C) * d.direction_sum
+    aux_c = -1.
+    regular = aux_a > 10**-20
+    hydrostatic_tension = ~regular & d.tension & (aux_b != 0)
+
+    rho_invariant_criterion = np.full(n, np.nan)
+    a = aux_a[regular]
+    b = aux_b[regular]
+    root = np.sqrt(b**2 - 4*a*aux_c)
+    rho_1 = np.abs((-b + root) / (2*a))
+    rho_2 = np.abs((-b - root) / (2*a))
+    rho_invariant_criterion[regular] = np.where(d.tension[regular], np.minimum(rho_1, rho_2), np.maximum(rho_1, rho_2))
+    rho_invariant_criterion[hydrostatic_tension] = -aux_c / aux_b[hydrostatic_tension]
+
+    # 3.2 + 4. Failure index, the fracture criterion is only relevant for T/C < 1/2
+    # (hydrostatic compression and hydrostatic tension with T = C stay NaN)
+    results = np.empty((n, 3))
+    failure_index = d.rho / rho_invariant_criterion
+    fracture = T/C < 1./2.
+    failure_index[fracture] = np.fmax(failure_index[fracture], d.max_principal[fracture] / T[fracture])
+    failure_index[np.isnan(rho_invariant_criterion)] = np.nan
+    results[:, 0] = failure_index
+
+    # 5. Failure number from the principal stresses at failure along the same direction
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sum_at_failure = (d.rho / failure_index) * d.direction_sum
+    results[:, 1] = np.clip(1./2. * (3*T/C - sum_at_failure/C), 0, 1)
+    results[:, 2] = failure_index * T
+
+    return results
+
+
+def reserve_factors(failure_index, T=100., C=300.):
+    """
+    Load factor by which each stress state can be scaled proportionally until it reaches the Christensen surface. Both the
+    invariant criterion and the fracture criterion scale linearly with the stresses, so the factor is 1/failure index.
+
+    Parameters:
+    ---------------
+        failure_index: Array
+            shape (N,), e.g. the first column of calc_fail_ind_batch
+
+        T, C: Float or Array
+            strengths used for the failure index, NaN for points without material
+
+    Returns:
+    ---------------
+        Array of shape (N,): inf for the zero stress state and for stress states which never reach the surface (the NaN
+        failure index of hydrostatic compression and of hydrostatic tension with T = C), NaN for points without strengths
+    """
+    failure_index = np.asarray(failure_index, dtype=float)
+    n = len(failure_index)
+    T = np.broadcast_to(np.asarray(T, dtype=float), (n,))
+    C = np.broadcast_to(np.asarray(C, dtype=float), (n,))
+    factors = np.full(n, np.inf)
+    positive = failure_index > 0
+    factors[positive] = 1. / failure_index[positive]
+    factors[np.isnan(T) | np.isnan(C)] = np.nan
+    return factors
+
+
+def calc_reserve_factor_batch(stresses, T=100., C=300.):
+    """
+    Reserve factors of the stress states (shape (N, 6) or (N, 4)), see reserve_factors
+    """
+    return reserve_factors(calc_fail_ind_batch(stresses, T, C)[:, 0], T, C)
+
+
+def calc_fail_ind_sweep(stresses, strengths, threshold=1.):
+    """
+    Evaluates the same stress states for many strength pairs, the principal stresses are calculated only once
+
+    Parameters:
+    ---------------
+        stresses: Array or StressDecomposition
+            shape (N, 6) or (N, 4), or an already decomposed stress field
+
+        strengths: List of Tuples
+            the (T, C) pairs to evaluate, see strength_grid
+
+        threshold: Float
+            points with a failure index of at least threshold count as failed
+
+    Returns:
+    ---------------
+        List with one dictionary per strength pair: T, C, max_failure_index, failed_points (Integer),
+        nan_points (Integer) and critical_point (index of the point with the maximal failure index, None if all are NaN)
+    """
+    if isinstance(stresses, StressDecomposition):
+        decomposition = stresses
+    else:
+        decomposition = StressDecomposition(stresses)
+    summaries = []
+    for T, C in strengths:
+        failure_index = fail_ind_from_decomposition(decomposition, T, C)[:, 0]
+        valid = ~np.isnan(failure_index)
+        summary = {'T': float(T), 'C': float(C), 'max_failure_index': float('nan'), 'critical_point': None,
+                   'failed_points': int(np.sum(failure_index[valid] >= threshold)), 'nan_points': int(np.sum(~valid))}
+        if np.any(valid):
+            critical_point = int(np.nanargmax(failure_index))
+            summary['max_failure_index'] = float(failure_index[critical_point])
+            summary['critical_point'] = critical_point
+        summaries.append(summary)
+    return summaries
+
+
+def strength_grid(T_values, C_values):
+    """
+    Returns all (T, C) pairs of the given tensile and compressive strengths
+    """
+    return [(T, C) for T in T_values for C in C_values]
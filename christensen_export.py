@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+from christensen_criterion import calc_fail_ind_batch
+from christensen_parallel import DEFAULT_CHUNK_SIZE, split_points
+
+# Offline format of the stresses of an odb: one directory with a manifest.json and .npy files
+# (stresses, element labels and integration points of every exported frame, element -> material map of every
+# instance). export_stresses needs Abaqus, evaluate_export runs with plain Python and NumPy on the memory-mapped
+# files, import_results writes the results back into the odb. Evaluated outside of Abaqus, e.g.
+#     python christensen_export.py export_dir STEEL=100,300 ALU=50,200
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def load_manifest(directory):
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+def save_manifest(directory, manifest):
+    with open(os.path.join(directory, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=1)
+
+
+def export_stresses(odb_name, directory, instance_name=None, step_names=None, frames=None, dtype=np.float32):
+    """
+    Writes the stresses at the integration points of the odb into the offline format
+
+    Parameters:
+    ---------------
+        odb_name: String
+
+        directory: String
+            output directory, it is created if it does not exist
+
+        instance_name: String or List of Strings
+            optional, instances to export, see getInstanceNames; by default all instances
+
+        step_names: List of Strings
+            optional, by default all steps
+
+        frames: List of Integers or String
+            optional, indices of the frames of every step, 'ALL' for all frames; by default the last frame
+
+        dtype: numpy dtype
+            precision of the exported stresses, the odb stores single precision unless the analysis was run in double precision
+
+    Returns:
+    ---------------
+        the manifest as Dictionary
+    """
+    from Christensen_Plugin_Backend import openOdb, getInstanceNames, SectionIndex, read_integration_point_stresses
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    odb = openOdb(odb_name, readOnly=True)
+    try:
+        jobData = getattr(odb, 'jobData', None)
+        manifest = {'odb': os.path.abspath(odb_name), 'creation_time': str(getattr(jobData, 'creationTime', '')),
+                    'exported': time.strftime('%Y-%m-%dT%H:%M:%S'), 'instances': {}, 'frames': []}
+
+        instance_names = getInstanceNames(odb, instance_name)
+        for name in instance_names:
+            # 1. Element -> material map, the material id of element label l is material_of_label[l] (-1 without material)
+            section_index = SectionIndex(odb, odb.rootAssembly.instances[name])
+            file_name = '%s_material_of_label.npy' % name
+            np.save(os.path.join(directory, file_name), section_index.material_of_label.astype(np.int32))
+            manifest['instances'][name] = {'material_names': section_index.material_names, 'material_of_label': file_name}
+
+        if step_names is None:
+            step_names = odb.steps.keys()
+        for step_name in step_names:
+            step_frames = odb.steps[step_name].frames
+            if frames is None:
+                frame_numbers = [len(step_frames) - 1]
+            elif frames == 'ALL':
+                frame_numbers = list(range(len(step_frames)))
+            else:
+                frame_numbers = [frame_number % len(step_frames) for frame_number in frames]
+
+            for name in instance_names:
+                instance = odb.rootAssembly.instances[name]
+                previous = None
+                for frame_number in frame_numbers:
+                    # 2. Stresses, element labels and integration points, the points of a frame are only written
+                    # again if they differ from the previous frame of the instance
+                    pointLabels, intPoints, stressData = read_integration_point_stresses(step_frames[frame_number], instance)
+                    base = '%s_%s_%d' % (name, step_name, frame_number)
+                    entry = {'instance': name, 'step': step_name, 'frame': frame_number, 'points': len(pointLabels),
+                             'stresses': base + '_stresses.npy'}
+                    if previous is not None and np.array_equal(previous[0], pointLabels) and np.array_equal(previous[1], intPoints):
+                        entry['labels'], entry['integration_points'] = previous[2]
+                    else:
+                        entry['labels'] = base + '_labels.npy'
+                        entry['integration_points'] = base + '_integration_points.npy'
+                        np.save(os.path.join(directory, entry['labels']), pointLabels.astype(np.int32))
+                        np.save(os.path.join(directory, entry['integration_points']), intPoints.astype(np.int32))
+                        previous = (pointLabels, intPoints, (entry['labels'], entry['integration_points']))
+                    np.save(os.path.join(directory, entry['stresses']), stressData.astype(dtype))
+                    manifest['frames'].append(entry)
+                    print('Exported %s, step %s, frame %d: %d points' % (name, step_name, frame_number, len(pointLabels)))
+    finally:
+        # the odb is only read, it is closed also if the export fails
+        odb.close()
+
+    save_manifest(directory, manifest)
+    return manifest
+
+
+def strength_table(material_names, mat_dict):
+    """
+    Returns the (number of materials + 1, 2) table of T and C, the last row (id -1) and materials which are not in mat_dict are NaN
+    """
+    table = np.full((len(material_names) + 1, 2), np.nan)
+    for i, mat_name in enumerate(material_names):
+        if mat_name in mat_dict:
+            table[i] = mat_dict[mat_name][0], mat_dict[mat_name][1]
+    return table
+
+
+def evaluate_export(directory, mat_dict, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Calculates the Christensen results of every exported frame without Abaqus. The stresses are memory-mapped and
+    evaluated chunk by chunk, the results (failure index, failure number, equivalent stress) are written to a
+    memory-mapped .npy file per frame, so that the memory use is bounded by the chunk size.
+
+    Parameters:
+    ---------------
+        directory: String
+            directory written by export_stresses
+
+        mat_dict: Dictionary
+            key: material name, value: [T, C]; points of other materials get [NaN, 0, 0]
+
+        chunk_size: Integer
+            number of points evaluated at once
+
+    Returns:
+    ---------------
+        the updated manifest as Dictionary
+    """
+    manifest = load_manifest(directory)
+    tables = dict((name, strength_table(instance['material_names'], mat_dict)) for name, instance in manifest['instances'].items())
+    material_of_label = dict((name, np.load(os.path.join(directory, instance['material_of_label'])))
+                             for name, instance in manifest['instances'].items())
+
+    for entry in manifest['frames']:
+        stresses = np.load(os.path.join(directory, entry['stresses']), mmap_mode='r')
+        labels = np.load(os.path.join(directory, entry['labels']), mmap_mode='r')
+        entry['results'] = entry['stresses'].replace('_stresses.npy', '_results.npy')
+        results = np.lib.format.open_memmap(os.path.join(directory, entry['results']), mode='w+', dtype=np.float64,
+                                            shape=(entry['points'], 3))
+        table = tables[entry['instance']]
+        material_map = material_of_label[entry['instance']]
+        for start, stop in split_points(entry['points'], chunk_size):
+            chunk_labels = np.asarray(labels[start:stop])
+            known = chunk_labels < len(material_map)
+            ids = np.full(len(chunk_labels), -1)
+            ids[known] = material_map[chunk_labels[known]]
+            T_values = table[ids, 0]
+            C_values = table[ids, 1]
+            chunk = calc_fail_ind_batch(np.asarray(stresses[start:stop]), T_values, C_values)
+            chunk[np.isnan(T_values)] = [float('NaN'), 0, 0]
+            results[start:stop] = chunk
+        results.flush()
+        del results
+        print('Evaluated %s, step %s, frame %d' % (entry['instance'], entry['step'], entry['frame']))
+
+    manifest['mat_dict'] = mat_dict
+    manifest['evaluated'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    save_manifest(directory, manifest)
+    return manifest
+
+
+def import_results(odb_name, directory, baseName='Christensen', output=None):
+    """
+    Writes the results of evaluate_export into the odb: one FieldOutput Object per exported frame with the data of all
+    instances, the odb is saved once at the end
+
+    Parameters:
+    ---------------
+        output: CompactOutput
+            optional, only the selected components are written as SCALAR FieldOutput Objects, see Christensen_Plugin_Backend.CompactOutput
+
+    Returns:
+    ---------------
+        Dictionary with the name of the FieldOutput Object of every (step, frame)
+    """
+    from Christensen_Plugin_Backend import openOdb, add_integration_point_field, FIELD_DESCRIPTION
+    manifest = load_manifest(directory)
+    if 'mat_dict' not in manifest:
+        raise ValueError('The export in ' + directory + ' has not been evaluated yet, see evaluate_export.')
+    odb = openOdb(odb_name, readOnly=False)
+    jobData = getattr(odb, 'jobData', None)
+    if manifest['creation_time'] and str(getattr(jobData, 'creationTime', '')) != manifest['creation_time']:
+        odb.close()
+        raise ValueError('The export in ' + directory + ' does not belong to the analysis of ' + odb_name + '.')
+
+    fieldVarNames = {}
+    for entry in manifest['frames']:
+        key = (entry['step'], entry['frame'])
+        frame = odb.steps[entry['step']].frames[entry['frame']]
+        labels = np.load(os.path.join(directory, entry['labels']))
+        results = np.load(os.path.join(directory, entry['results']))
+        fieldVarNames[key] = add_integration_point_field(frame, odb.rootAssembly.instances[entry['instance']], baseName, FIELD_DESCRIPTION,
+                ['Failure Index', 'Failure Number', 'Equivalent Stress'], labels, results, fieldVarNames.get(key), output=output)
+
+    # update the odb in the GUI
+    odb.save()
+    odb.close()
+    odb = openOdb(odb_name, readOnly=False)
+    print('The results of %d frames were added to %s' % (len(manifest['frames']), odb_name))
+    return fieldVarNames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Evaluates the Christensen criterion on stresses exported by export_stresses')
+    parser.add_argument('directory', help='directory with the manifest.json')
+    parser.add_argument('materials', nargs='+', help='strengths as NAME=T,C, e.g. STEEL=100,300')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    mat_dict = {}
+    for material in args.materials:
+        name, strengths = material.split('=')
+        T, C = strengths.split(',')
+        mat_dict[name] = [float(T), float(C)]
+    return evaluate_export(args.directory, mat_dict, args.chunk_size)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,360 @@
+import sys
+import time
+import types
+from collections import OrderedDict
+import numpy as np
+
+# Lightweight in-memory stand-in for the parts of the Abaqus odb object model which are used by
+# Christensen_Plugin_Backend (instances, sectionAssignments, sections, steps, frames, fieldOutputs,
+# getSubset, getScalarField, bulkDataBlocks, values, addData and element sets). It is meant for benchmarks and checks without an
+# Abaqus license, install() registers it as the modules abaqusConstants, odbAccess and abaqus.
+
+INTEGRATION_POINT = 'INTEGRATION_POINT'
+CENTROID = 'CENTROID'
+NODAL = 'NODAL'
+ELEMENT_NODAL = 'ELEMENT_NODAL'
+WHOLE_ELEMENT = 'WHOLE_ELEMENT'
+SCALAR = 'SCALAR'
+VECTOR = 'VECTOR'
+TENSOR_3D_FULL = 'TENSOR_3D_FULL'
+TENSOR_3D_PLANAR = 'TENSOR_3D_PLANAR'
+FLOAT = 'FLOAT'
+DOUBLE = 'DOUBLE'
+MISES = 'MISES'
+
+# all opened fake odbs, key: path
+odbs = {}
+
+
+class FakeRepository(OrderedDict):
+
+    # keys() returns a list, as the repositories of the odb do
+    def keys(self):
+        return list(OrderedDict.keys(self))
+
+
+class FakeSession:
+
+    def __init__(self):
+        self.odbs = odbs
+
+
+class FakeElement:
+
+    def __init__(self, label, connectivity=(), type='C3D10'):
+        self.label = label
+        self.connectivity = tuple(connectivity)
+        self.type = type
+
+
+class FakeNode:
+
+    def __init__(self, label, coordinates):
+        self.label = label
+        self.coordinates = tuple(coordinates)
+
+
+class FakeRegion:
+
+    def __init__(self, elements, instance=None, name=''):
+        self.name = name
+        self.elements = elements
+        self.instance = instance
+
+
+class FakeSectionPoint:
+
+    def __init__(self, number, description=''):
+        self.number = number
+        self.description = description
+
+
+class FakeSectionAssignment:
+
+    def __init__(self, sectionName, region):
+        self.sectionName = sectionName
+        self.region = region
+
+
+class FakeSection:
+
+    def __init__(self, name, material):
+        self.name = name
+        self.material = material
+
+
+class FakeInstance:
+
+    def __init__(self, name, elements, nodes=()):
+        self.name = name
+        self.elements = elements
+        self.nodes = list(nodes)
+        self.sectionAssignments = []
+        self.elementSets = FakeRepository()
+
+    def getElementFromLabel(self, label):
+        if not hasattr(self, 'element_of_label'):
+            self.element_of_label = dict((element.label, element) for element in self.elements)
+        return self.element_of_label[label]
+
+    def getNodeFromLabel(self, label):
+        if not hasattr(self, 'node_of_label'):
+            self.node_of_label = dict((node.label, node) for node in self.nodes)
+        return self.node_of_label[label]
+
+    def ElementSetFromElementLabels(self, name, elementLabels):
+        labels = set(elementLabels)
+        self.elementSets[name] = FakeRegion([element for element in self.elements if element.label in labels], self, name)
+        return self.elementSets[name]
+
+
+class FakeFieldValue:
+
+    def __init__(self, instance, elementLabel, integrationPoint, data):
+        self.instance = instance
+        self.elementLabel = elementLabel
+        self.integrationPoint = integrationPoint
+        self.data = data
+        self.position = INTEGRATION_POINT
+
+
+class FakeBulkData:
+
+    def __init__(self, instance, elementLabels, integrationPoints, data, position=INTEGRATION_POINT, sectionPoint=None, baseElementType='C3D10'):
+        self.instance = instance
+        self.elementLabels = elementLabels
+        self.integrationPoints = integrationPoints
+        self.data = data
+        self.position = position
+        self.sectionPoint = sectionPoint
+        self.baseElementType = baseElementType
+
+
+class FakeFieldOutput:
+
+    def __init__(self, name, description='', type=TENSOR_3D_FULL, componentLabels=(), blocks=None, **kwargs):
+        """
+        blocks: List of FakeBulkData, the data of the field output
+        """
+        self.name = name
+        self.description = description
+        self.type = type
+        self.componentLabels = tuple(componentLabels)
+        self.blocks = blocks if blocks is not None else []
+        # calls of addData as (position, instance, labels, data) for later checks
+        self.addedData = []
+
+    def getSubset(self, position=None, region=None, sectionPoint=None, elementType=None):
+        if region is None:
+            return FakeFieldOutput(self.name, self.description, self.type, self.componentLabels, list(self.blocks))
+        instance = region if isinstance(region, FakeInstance) else region.instance
+        blocks = []
+        for block in self.blocks:
+            if instance is not None and block.instance is not instance:
+                continue
+            if sectionPoint is not None and (block.sectionPoint is None or block.sectionPoint.number != sectionPoint.number):
+                continue
+            if region is instance:
+                blocks.append(block)
+            else:
+                mask = np.isin(block.elementLabels, [el.label for el in region.elements])
+                blocks.append(FakeBulkData(block.instance, block.elementLabels[mask], block.integrationPoints[mask], block.data[mask], block.position,
+                                           block.sectionPoint, block.baseElementType))
+        return FakeFieldOutput(self.name, self.description, self.type, self.componentLabels, blocks)
+
+    def getScalarField(self, invariant=MISES):
+        # only the von Mises stress of S (S11, S22, S33, S12, S13, S23 or the plane components) is supported
+        blocks = []
+        for block in self.blocks:
+            data = np.asarray(block.data, dtype=float)
+            if data.shape[1] == 3:
+                s11, s22, s33, s12, s13, s23 = data[:, 0], data[:, 1], 0., data[:, 2], 0., 0.
+            else:
+                data = np.hstack((data, np.zeros((len(data), 6 - data.shape[1]))))
+                s11, s22, s33, s12, s13, s23 = data.T
+            mises = np.sqrt(0.5 * ((s11 - s22)**2 + (s22 - s33)**2 + (s33 - s11)**2) + 3. * (s12**2 + s13**2 + s23**2))
+            blocks.append(FakeBulkData(block.instance, block.elementLabels, block.integrationPoints, mises.reshape(-1, 1).astype(np.float32),
+                                       block.position, block.sectionPoint, block.baseElementType))
+        return FakeFieldOutput(self.name, self.description, SCALAR, (), blocks)
+
+    @property
+    def bulkDataBlocks(self):
+        return self.blocks
+
+    @property
+    def values(self):
+        # one Python object per value, as the real odb API
+        values = []
+        for block in self.blocks:
+            for i in range(len(block.elementLabels)):
+                values.append(FakeFieldValue(block.instance, int(block.elementLabels[i]), int(block.integrationPoints[i]), block.data[i]))
+        return values
+
+    def addData(self, position, instance, labels, data, sectionPoint=None, localCoordSystem=None):
+        labels = np.asarray(labels)
+        data = np.asarray(data)
+        self.addedData.append((position, instance, labels, data))
+        if position == INTEGRATION_POINT:
+            # the rows of the data belong to the integration points of the labelled elements
+            points_per_element = len(data) // max(len(labels), 1)
+            elementLabels = np.repeat(labels, points_per_element)
+            integrationPoints = np.tile(np.arange(1, points_per_element + 1), len(labels))
+        else:
+            elementLabels = labels
+            integrationPoints = np.zeros(len(labels), dtype=int)
+        self.blocks.append(FakeBulkData(instance, elementLabels, integrationPoints, data.reshape(len(data), -1), position, sectionPoint))
+
+
+class FakeFrame:
+
+    def __init__(self, frameId, frameValue=0.):
+        self.frameId = frameId
+        self.frameValue = frameValue
+        self.fieldOutputs = FakeRepository()
+
+    def FieldOutput(self, name, description='', type=SCALAR, componentLabels=(), validInvariants=None):
+        field = FakeFieldOutput(name, description, type, componentLabels)
+        self.fieldOutputs[name] = field
+        return field
+
+
+class FakeStep:
+
+    def __init__(self, name):
+        self.name = name
+        self.frames = []
+
+
+class FakeAssembly:
+
+    def __init__(self):
+        self.instances = FakeRepository()
+        self.elementSets = FakeRepository()
+
+
+class FakeJobData:
+
+    def __init__(self, name):
+        self.name = name
+        self.creationTime = time.ctime()
+
+
+class FakeOdb:
+
+    def __init__(self, path):
+        self.path = path
+        self.name = path
+        self.jobData = FakeJobData(path)
+        self.rootAssembly = FakeAssembly()
+        self.sections = FakeRepository()
+        self.materials = FakeRepository()
+        self.steps = FakeRepository()
+        self.isReadOnly = False
+        self.openCount = 0
+        self.saveCount = 0
+        self.closeCount = 0
+
+    def save(self):
+        self.saveCount += 1
+
+    def close(self):
+        self.closeCount += 1
+
+
+def openOdb(path, readOnly=False, readInternalSets=False):
+    odb = odbs[path]
+    odb.isReadOnly = readOnly
+    odb.openCount += 1
+    return odb
+
+
+def create_fake_odb(path='fake.odb', num_elements=1000, points_per_element=4, step_names=('Step-1',), frames_per_step=1,
+                    materials=None, instance_name='PART-1-1', stresses=None, seed=0, section_points=None):
+    """
+    Creates and registers a fake odb with one instance of tetrahedral elements
+
+    Parameters:
+    ---------------
+        path: String
+            name under which openOdb finds the odb
+
+        num_elements, points_per_element: Integer
+            size of the instance, the stresses have num_elements*points_per_element integration points
+
+        step_names: List of Strings
+
+        frames_per_step: Integer
+
+        materials: List of Strings
+            one section per material, the elements are divided into equal consecutive blocks; by default STEEL and ALU
+
+        stresses: Function
+            optional, stresses(n, rng) returns an array (n, 6), (n, 4) or (n, 3) per frame (and section point); by default
+            random stresses
+
+        section_points: List of Strings
+            optional, descriptions of the section points of shell elements (S4R), e.g. ['SNEG, (fraction = -1.0)',
+            'SPOS, (fraction = 1.0)'], the stresses of every section point are one bulk data block
+
+    Returns:
+    ---------------
+        FakeOdb
+    """
+    rng = np.random.RandomState(seed)
+    if materials is None:
+        materials = ['STEEL', 'ALU']
+    if stresses is None:
+        stresses = lambda n, rng: 100. * rng.standard_normal((n, 6))
+    odb = FakeOdb(path)
+
+    # 1. Mesh of a row of tetrahedra, every element has 4 corner nodes
+    num_nodes = num_elements + 3
+    nodes = [FakeNode(i + 1, (float(i), float(i % 2), float(i % 3))) for i in range(num_nodes)]
+    element_type = 'S4R' if section_points else 'C3D10'
+    elements = [FakeElement(i + 1, (i + 1, i + 2, i + 3, i + 4), element_type) for i in range(num_elements)]
+    instance = FakeInstance(instance_name, elements, nodes)
+    odb.rootAssembly.instances[instance_name] = instance
+
+    # 2. One section per material
+    bounds = np.linspace(0, num_elements, len(materials) + 1).astype(int)
+    for i, mat_name in enumerate(materials):
+        odb.materials[mat_name] = mat_name
+        odb.sections['Section-' + mat_name] = FakeSection('Section-' + mat_name, mat_name)
+        region = FakeRegion(elements[bounds[i]:bounds[i + 1]], instance)
+        instance.sectionAssignments.append(FakeSectionAssignment('Section-' + mat_name, region))
+
+    # 3. Stresses at the integration points of every frame
+    elementLabels = np.repeat(np.arange(1, num_elements + 1), points_per_element)
+    integrationPoints = np.tile(np.arange(1, points_per_element + 1), num_elements)
+    for step_name in step_names:
+        step = FakeStep(step_name)
+        for frameId in range(frames_per_step):
+            frame = FakeFrame(frameId, float(frameId + 1) / frames_per_step)
+            if section_points:
+                blocks = [FakeBulkData(instance, elementLabels, integrationPoints, np.asarray(stresses(len(elementLabels), rng), dtype=np.float32),
+                                       sectionPoint=FakeSectionPoint(i + 1, description), baseElementType=element_type)
+                          for i, description in enumerate(section_points)]
+            else:
+                blocks = [FakeBulkData(instance, elementLabels, integrationPoints, np.asarray(stresses(len(elementLabels), rng), dtype=np.float32))]
+            num_components = blocks[0].data.shape[1]
+            componentLabels = ('S11', 'S22', 'S12') if num_components == 3 else ('S11', 'S22', 'S33', 'S12', 'S13', 'S23')[:num_components]
+            frame.fieldOutputs['S'] = FakeFieldOutput('S', 'Stress components', TENSOR_3D_PLANAR if num_components < 6 else TENSOR_3D_FULL,
+                    componentLabels, blocks)
+            step.frames.append(frame)
+        odb.steps[step_name] = step
+
+    odbs[path] = odb
+    return odb
+
+
+def install():
+    """
+    Registers this module as abaqusConstants, odbAccess and abaqus (with session.odbs), so that the
+    Abaqus dependent functions of Christensen_Plugin_Backend run on fake odbs. Only for use outside of Abaqus.
+    """
+    this = sys.modules[__name__]
+    abaqus = types.ModuleType('abaqus')
+    abaqus.session = FakeSession()
+    sys.modules['abaqusConstants'] = this
+    sys.modules['odbAccess'] = this
+    sys.modules['abaqus'] = abaqus
@@ -0,0 +1,176 @@
+import numpy as np
+
+# Extrapolation of integration point values to the nodes and averaging at the nodes. The element -> node relation is kept
+# as index arrays (a sparse matrix in coordinate form), the averaging is a sparse matrix product done with np.bincount,
+# so there is no loop over nodes or elements after the ElementNodeMap has been built.
+#
+# Extrapolation matrices (number of nodes x number of integration points) exist for the full integration of linear
+# hexahedra and quadrilaterals (2x2x2 and 2x2 Gauss points), the reduced integration of quadratic hexahedra and
+# quadrilaterals (corner nodes as for the linear elements, midside nodes averaged from the corners) and quadratic
+# tetrahedra with 4 integration points. All other elements get the mean of their integration points at every node.
+
+# Corner nodes in the natural coordinates, in the node order of Abaqus
+HEX_CORNERS = [(-1, -1, -1), (1, -1, -1), (1, 1, -1), (-1, 1, -1), (-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1)]
+QUAD_CORNERS = [(-1, -1), (1, -1), (1, 1), (-1, 1)]
+# Corner nodes of the midside nodes of the quadratic elements
+HEX_EDGES = [(0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 6), (6, 7), (7, 4), (0, 4), (1, 5), (2, 6), (3, 7)]
+QUAD_EDGES = [(0, 1), (1, 2), (2, 3), (3, 0)]
+TET_EDGES = [(0, 1), (1, 2), (2, 0), (0, 3), (1, 3), (2, 3)]
+# Volume coordinates of the 4 point rule of the tetrahedron: each point has TET_B for its own corner node, TET_A for the others
+TET_A = 0.1381966011250105
+TET_B = 0.5854101966249685
+
+
+def gauss_points(dim):
+    """
+    Signs of the natural coordinates of the 2x2(x2) Gauss points in the order of Abaqus, the first coordinate changes fastest
+    """
+    return [tuple(1 if (j >> d) & 1 else -1 for d in range(dim)) for j in range(2**dim)]
+
+
+def tensor_extrapolation(corners):
+    """
+    Extrapolation from the Gauss points at +-1/sqrt(3) to the corner nodes with the (bi/tri)linear shape functions
+    """
+    dim = len(corners[0])
+    points = gauss_points(dim)
+    matrix = np.ones((len(corners), len(points)))
+    for i, corner in enumerate(corners):
+        for j, point in enumerate(points):
+            for d in range(dim):
+                matrix[i, j] *= (1. + np.sqrt(3.) * corner[d] * point[d]) / 2.
+    return matrix
+
+
+def tet_extrapolation():
+    """
+    Extrapolation from the 4 integration points of the tetrahedron to its corner nodes, inverse of the linear interpolation
+    """
+    interpolation = np.full((4, 4), TET_A)
+    np.fill_diagonal(interpolation, TET_B)
+    return np.linalg.inv(interpolation)
+
+
+def with_midside_nodes(corner_matrix, edges):
+    """
+    Adds the rows of the midside nodes as mean of the rows of their corner nodes
+    """
+    midside = [(corner_matrix[a] + corner_matrix[b]) / 2. for a, b in edges]
+    return np.vstack([corner_matrix] + midside)
+
+
+def extrapolation_matrix(num_nodes, num_points, three_dimensional=True):
+    """
+    Returns the matrix (num_nodes, num_points) which maps the integration point values of an element to its nodes
+    """
+    if three_dimensional and num_points == 8 and num_nodes in (8, 20):
+        return with_midside_nodes(tensor_extrapolation(HEX_CORNERS), HEX_EDGES)[:num_nodes]
+    if three_dimensional and num_points == 4 and num_nodes in (4, 10):
+        return with_midside_nodes(tet_extrapolation(), TET_EDGES)[:num_nodes]
+    if not three_dimensional and num_points == 4 and num_nodes in (4, 8):
+        return with_midside_nodes(tensor_extrapolation(QUAD_CORNERS), QUAD_EDGES)[:num_nodes]
+    return np.full((num_nodes, num_points), 1. / num_points)
+
+
+class ElementNodeMap:
+
+    def __init__(self, instance):
+        """
+        Element -> node relation of an instance, built by a single pass over its elements and reused for all frames
+
+        Parameters:
+        ---------------
+            instance: OdbInstance
+        """
+        node_labels = set()
+        groups = {}
+        for element in instance.elements:
+            # continuum elements (C3D...) are three dimensional, all others are treated as plane elements
+            key = (len(element.connectivity), element.type.startswith('C3D'))
+            groups.setdefault(key, ([], []))
+            groups[key][0].append(element.label)
+            groups[key][1].append(element.connectivity)
+            node_labels.update(element.connectivity)
+
+        # Dense arrays indexed by the element label: group and row of the element, -1 for unknown labels
+        self.node_labels = np.array(sorted(node_labels), dtype=int)
+        self.groups = []
+        max_label = max([max(labels) for labels, connectivity in groups.values()]) if groups else 0
+        self.group_of_label = np.full(max_label + 1, -1, dtype=int)
+        self.row_of_label = np.full(max_label + 1, -1, dtype=int)
+        for (num_nodes, three_dimensional), (labels, connectivity) in sorted(groups.items()):
+            self.group_of_label[labels] = len(self.groups)
+            self.row_of_label[labels] = np.arange(len(labels))
+            nodes = np.searchsorted(self.node_labels, np.array(connectivity, dtype=int))
+            self.groups.append((num_nodes, three_dimensional, nodes))
+
+    def extrapolate(self, pointLabels, values):
+        """
+        Extrapolates the values at the integration points to the nodes of their elements
+
+        Parameters:
+        ---------------
+            pointLabels: Array
+                element label of every integration point, sorted by element and integration point
+
+            values: Array
+                shape (N, k), values at the integration points
+
+        Returns:
+        ---------------
+            node index (into self.node_labels), element label and extrapolated values (M, k) of every element node
+        """
+        values = np.asarray(values, dtype=float)
+        elements, starts, counts = np.unique(pointLabels, return_index=True, return_counts=True)
+        groups = self.group_of_label[elements]
+        nodes_out, elements_out, values_out = [], [], []
+        for group, num_points in set(zip(groups.tolist(), counts.tolist())):
+            if group < 0:
+                continue
+            num_nodes, three_dimensional, nodes = self.groups[group]
+            selected = (groups == group) & (counts == num_points)
+            rows = self.row_of_label[elements[selected]]
+            point_values = values[starts[selected][:, None] + np.arange(num_points)]
+            matrix = extrapolation_matrix(num_nodes, num_points, three_dimensional)
+            values_out.append(np.einsum('ij,ejk->eik', matrix, point_values).reshape(-1, values.shape[1]))
+            nodes_out.append(nodes[rows].ravel())
+            elements_out.append(np.repeat(elements[selected], num_nodes))
+        if len(values_out) == 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros((0, values.shape[1]))
+        return np.concatenate(nodes_out), np.concatenate(elements_out), np.concatenate(values_out)
+
+
+def average(keys, values):
+    """
+    Averages the rows of values with the same key, NaN values are left out
+
+    Returns:
+    ---------------
+        the unique keys and the averaged values (NaN if a key only has NaN values)
+    """
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.ravel()
+    averaged = np.full((len(unique_keys), values.shape[1]), np.nan)
+    for column in range(values.shape[1]):
+        valid = ~np.isnan(values[:, column])
+        sums = np.bincount(inverse[valid], weights=values[valid, column], minlength=len(unique_keys))
+        counts = np.bincount(inverse[valid], minlength=len(unique_keys))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            averaged[:, column] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    return unique_keys, averaged
+
+
+def maximum_per_node(nodes, values):
+    """
+    Keeps for every node the row of values with the largest first column (a number is preferred over NaN)
+
+    Returns:
+    ---------------
+        the unique nodes and their rows
+    """
+    # sort by node and failure index, NaN first, and take the last row of every node
+    index = np.where(np.isnan(values[:, 0]), -np.inf, values[:, 0])
+    order = np.lexsort((index, nodes))
+    sorted_nodes = nodes[order]
+    last = np.append(sorted_nodes[1:] != sorted_nodes[:-1], True)
+    return sorted_nodes[last], values[order][last]
@@ -0,0 +1,121 @@
+import multiprocessing
+import os
+import sys
+import numpy as np
+from christensen_criterion import calc_fail_ind_batch
+
+# The pool is meant for scripts run with "abaqus python" (e.g. christensen_batch.py), whose executable is a Python
+# interpreter. Inside the Abaqus/CAE kernel, sys.executable is the kernel itself and the worker processes would start
+# new kernels (on Windows multiprocessing spawns sys.executable), so create_pool evaluates in the calling process there.
+
+# Number of points per task of the process pool, large enough that the transfer of the arrays
+# to the workers is small compared to the evaluation
+DEFAULT_CHUNK_SIZE = 200000
+
+
+def evaluate_chunk(args):
+    """
+    Task of the worker processes, evaluates one contiguous block of points with calc_fail_ind_batch
+    """
+    stresses, T, C = args
+    return calc_fail_ind_batch(stresses, T, C)
+
+
+def split_points(n, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Returns the (start, stop) index pairs of the contiguous blocks of at most chunk_size points
+    """
+    return [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+
+
+def in_cae_kernel():
+    """
+    True inside the Abaqus/CAE kernel (ABQcaeK), where no worker processes are started
+    """
+    return os.path.basename(sys.executable).lower().startswith('abqcaek')
+
+
+def create_pool(workers):
+    """
+    Returns a ChristensenPool with the given number of worker processes, or None (evaluation in the calling process)
+    if workers is 1 or smaller or if it is called inside the Abaqus/CAE kernel
+    """
+    if not workers or workers <= 1:
+        return None
+    if in_cae_kernel():
+        print('Worker processes are only started in abaqus python, the points are evaluated in the kernel process.')
+        return None
+    return ChristensenPool(workers)
+
+
+class PendingResult:
+
+    def __init__(self, asyncResults):
+        """
+        Result of ChristensenPool.submit, get() waits for all blocks and returns the (N, 3) array
+        """
+        self.asyncResults = asyncResults
+
+    def ready(self):
+        return all([result.ready() for result in self.asyncResults])
+
+    def get(self):
+        if len(self.asyncResults) == 0:
+            return np.zeros((0, 3))
+        return np.concatenate([result.get() for result in self.asyncResults])
+
+
+class ChristensenPool:
+
+    def __init__(self, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Process pool for the evaluation of the Christensen criterion. The stress data of a frame is split into contiguous
+        point ranges, several submitted frames, steps or instances are evaluated at the same time. The pool only computes,
+        reading and writing the odb stays in the calling process, so all addData calls are made by a single writer.
+        Only for abaqus python and plain Python, see create_pool.
+
+        Parameters:
+        ---------------
+            workers: Integer
+                number of worker processes, by default the number of CPUs
+
+            chunk_size: Integer
+                maximal number of points per task
+        """
+        self.workers = workers or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.pool = multiprocessing.Pool(self.workers)
+
+    def submit(self, stresses, T=100., C=300.):
+        """
+        Starts the evaluation of the stresses (shape (N, 6) or (N, 4)) with the strengths T and C (Floats or Arrays of shape (N,))
+        and returns a PendingResult without waiting for it
+        """
+        stresses = np.asarray(stresses, dtype=float)
+        n = len(stresses)
+        T = np.broadcast_to(np.asarray(T, dtype=float), (n,))
+        C = np.broadcast_to(np.asarray(C, dtype=float), (n,))
+        asyncResults = []
+        for start, stop in split_points(n, self.chunk_size):
+            asyncResults.append(self.pool.apply_async(evaluate_chunk, ((stresses[start:stop], T[start:stop], C[start:stop]),)))
+        return PendingResult(asyncResults)
+
+    def calc_fail_ind(self, stresses, T=100., C=300.):
+        """
+        Same as calc_fail_ind_batch, but evaluated by the worker processes
+        """
+        return self.submit(stresses, T, C).get()
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.pool.terminate()
+        return False
@@ -0,0 +1,95 @@
+import numpy as np
+
+
+# Tolerance on |cos(3*lode_angle)| above which two principal stresses are treated as (almost) equal.
+# The trigonometric solution looses accuracy there, so these points are solved numerically instead.
+DEGENERATE_TOL = 1.e-6
+
+
+def stress_components(stresses):
+    """
+    Brings stress data into the (N, 6) layout S11, S22, S33, S12, S13, S23
+
+    Parameters:
+    ---------------
+        stresses: Array
+            shape (N, 6) for threedimensional stress states, (N, 4) for plane stress states (S13 = S23 = 0) or
+            (N, 3) for the section points of shells with S11, S22, S12 (S33 = S13 = S23 = 0)
+    """
+    stresses = np.asarray(stresses, dtype=float)
+    if stresses.ndim != 2 or stresses.shape[1] not in (3, 4, 6):
+        raise ValueError('The stresses have to be given as an array of shape (N, 6), (N, 4) or (N, 3).')
+    if stresses.shape[1] == 6:
+        return stresses
+    components = np.zeros((stresses.shape[0], 6))
+    if stresses.shape[1] == 3:
+        components[:, :2] = stresses[:, :2]
+        components[:, 3] = stresses[:, 2]
+    else:
+        components[:, :4] = stresses
+    return components
+
+
+def principal_stresses(stresses, degenerate_tol=DEGENERATE_TOL):
+    """
+    Calculates the principal stresses of symmetric 3x3 stress tensors with the closed-form
+    solution via the invariants and the Lode angle
+
+    Parameters:
+    ---------------
+        stresses: Array
+            shape (N, 6), (N, 4) or (N, 3) for N stress states, or a single stress state with 6, 4 or 3 entries
+
+        degenerate_tol: Float
+            points with 1 - |cos(3*lode_angle)| below this value have (almost) coinciding principal stresses
+            and are calculated with np.linalg.eigvalsh instead
+
+    Returns:
+    ---------------
+        real Array of shape (N, 3), or (3,) for a single stress state, sorted in descending order
+    """
+    single = np.ndim(stresses) == 1
+    S = stress_components(np.atleast_2d(stresses))
+    n = S.shape[0]
+
+    # 1. Invariants of the deviatoric stress tensor
+    mean = (S[:, 0] + S[:, 1] + S[:, 2]) / 3.
+    s11 = S[:, 0] - mean
+    s22 = S[:, 1] - mean
+    s33 = S[:, 2] - mean
+    s12 = S[:, 3]
+    s13 = S[:, 4]
+    s23 = S[:, 5]
+    J2 = (s11**2 + s22**2 + s33**2) / 2. + s12**2 + s13**2 + s23**2
+    J3 = s11*s22*s33 + 2.*s12*s13*s23 - s11*s23**2 - s22*s13**2 - s33*s12**2
+
+    # 2. Lode angle, the pure hydrostatic state (J2 = 0) gets an arbitrary angle
+    cos_3_lode = np.zeros(n)
+    deviatoric = J2 > 0
+    cos_3_lode[deviatoric] = 3.*np.sqrt(3.)/2. * J3[deviatoric] / J2[deviatoric]**1.5
+    cos_3_lode = np.clip(cos_3_lode, -1., 1.)
+    lode = np.arccos(cos_3_lode) / 3.
+
+    # 3. Principal stresses
+    radius = 2.*np.sqrt(J2/3.)
+    result = np.empty((n, 3))
+    result[:, 0] = mean + radius * np.cos(lode)
+    result[:, 1] = mean + radius * np.cos(lode - 2.*np.pi/3.)
+    result[:, 2] = mean + radius * np.cos(lode + 2.*np.pi/3.)
+
+    # 4. Fallback for near-degenerate stress states
+    degenerate = deviatoric & (1. - np.abs(cos_3_lode) < degenerate_tol)
+    if np.any(degenerate):
+        D = S[degenerate]
+        tensors = np.empty((D.shape[0], 3, 3))
+        tensors[:, 0, 0] = D[:, 0]
+        tensors[:, 1, 1] = D[:, 1]
+        tensors[:, 2, 2] = D[:, 2]
+        tensors[:, 0, 1] = tensors[:, 1, 0] = D[:, 3]
+        tensors[:, 0, 2] = tensors[:, 2, 0] = D[:, 4]
+        tensors[:, 1, 2] = tensors[:, 2, 1] = D[:, 5]
+        result[degenerate] = np.linalg.eigvalsh(tensors)[:, ::-1]
+
+    if single:
+        return result[0]
+    return result
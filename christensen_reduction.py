@@ -0,0 +1,95 @@
+import numpy as np
+
+# Default bin edges of the failure index histograms, values above the last edge are counted in the last bin
+DEFAULT_BINS = np.linspace(0., 2., 41)
+
+
+class CriticalPointReduction:
+
+    def __init__(self, top_k=10, bins=None, threshold=1.):
+        """
+        Streaming reduction of Christensen results: keeps the top_k points with the largest failure index and per
+        material a histogram of the failure index, the number of exceedances (failure index > threshold), the maximum
+        and the number of NaN results. The results are added chunk by chunk with add(), only O(top_k + bins) values are kept.
+
+        Parameters:
+        ---------------
+            top_k: Integer
+                number of kept critical points
+
+            bins: Array
+                edges of the histogram bins, by default 0 to 2 in steps of 0.05
+
+            threshold: Float
+                failure index above which a point counts as exceedance
+        """
+        self.top_k = top_k
+        self.bins = np.asarray(DEFAULT_BINS if bins is None else bins, dtype=float)
+        self.threshold = threshold
+        # columns of the kept points: failure index, failure number
+        self.top_values = np.zeros((0, 2))
+        # instance, element label, integration point, material, step, frame of the kept points
+        self.top_points = []
+        self.materials = {}
+
+    def material(self, mat_name):
+        if mat_name not in self.materials:
+            self.materials[mat_name] = {'points': 0, 'nan_points': 0, 'exceedances': 0, 'max_failure_index': None,
+                                        'histogram': np.zeros(len(self.bins) - 1, dtype=int)}
+        return self.materials[mat_name]
+
+    def add(self, instance_name, step_name, frame_number, pointLabels, intPoints, material_ids, material_names, results):
+        """
+        Adds the results (N, 3) of the points with the given element labels, integration points and material ids
+        (index into material_names, -1 for points without material, which are skipped)
+        """
+        failure_index = results[:, 0]
+
+        # 1. Statistics per material
+        for i, mat_name in enumerate(material_names):
+            values = failure_index[material_ids == i]
+            if len(values) == 0:
+                continue
+            stats = self.material(mat_name)
+            valid = values[~np.isnan(values)]
+            stats['points'] += len(values)
+            stats['nan_points'] += len(values) - len(valid)
+            stats['exceedances'] += int(np.sum(valid > self.threshold))
+            if len(valid) > 0:
+                stats['max_failure_index'] = max(stats['max_failure_index'], float(np.max(valid))) if stats['max_failure_index'] is not None else float(np.max(valid))
+                stats['histogram'] += np.histogram(np.clip(valid, self.bins[0], self.bins[-1]), self.bins)[0]
+
+        # 2. Candidates of the chunk, merged with the kept points
+        candidates = np.flatnonzero(~np.isnan(failure_index) & (material_ids >= 0))
+        if len(candidates) > self.top_k:
+            candidates = candidates[np.argpartition(-failure_index[candidates], self.top_k - 1)[:self.top_k]]
+        values = np.vstack((self.top_values, results[candidates, :2]))
+        points = self.top_points + [(instance_name, int(pointLabels[i]), int(intPoints[i]), material_names[material_ids[i]], step_name, frame_number)
+                                    for i in candidates]
+        order = np.argsort(-values[:, 0], kind='mergesort')[:self.top_k]
+        self.top_values = values[order]
+        self.top_points = [points[i] for i in order]
+
+    def report(self, coordinates=None):
+        """
+        Returns the compact report as Dictionary: the kept points sorted by decreasing failure index and the statistics
+        per material
+
+        Parameters:
+        ---------------
+            coordinates: Function
+                optional, coordinates(instance_name, element_label, integration_point, step_name, frame_number)
+                returns the coordinates of a kept point
+        """
+        top = []
+        for (instance_name, label, intPoint, mat_name, step_name, frame_number), (fi, fn) in zip(self.top_points, self.top_values):
+            point = {'instance': instance_name, 'element': label, 'integration_point': intPoint, 'material': mat_name,
+                     'step': step_name, 'frame': frame_number, 'failure_index': float(fi), 'failure_number': float(fn)}
+            if coordinates is not None:
+                point['coordinates'] = coordinates(instance_name, label, intPoint, step_name, frame_number)
+            top.append(point)
+        materials = {}
+        for mat_name, stats in self.materials.items():
+            materials[mat_name] = dict(stats)
+            materials[mat_name]['histogram'] = {'edges': self.bins.tolist(), 'counts': stats['histogram'].tolist()}
+        return {'top': top, 'materials': materials, 'threshold': self.threshold}
@@ -0,0 +1,160 @@
+import hashlib
+import numpy as np
+
+# Restriction of the evaluation to a region of an instance: named element sets, a bounding box of the element centroids
+# and a prefilter on the von Mises stress. The selected elements are turned into one element set of the odb, which is
+# passed as region to getSubset, so that only the stresses of the region are read and evaluated and only the region is
+# written to the fields.
+# The element sets are saved with the odb and stay in it: the odb API cannot delete a set. They are named after the
+# selected elements, so a later run with the same selection reuses its set instead of adding another one.
+
+# Prefix of the element sets created for a region, the rest of the name identifies the selected elements
+SET_PREFIX = 'CHRISTENSEN_REGION_'
+
+
+def element_centroids(instance):
+    """
+    Returns the element labels (Array of shape (N,)) and the centroids of the undeformed elements (mean of the node
+    coordinates, Array of shape (N, 3)) of an instance
+    """
+    nodes = instance.nodes
+    node_labels = np.array([node.label for node in nodes], dtype=int)
+    coordinates = np.array([node.coordinates for node in nodes], dtype=float).reshape(len(nodes), -1)
+    order = np.argsort(node_labels)
+    node_labels = node_labels[order]
+    coordinates = coordinates[order]
+
+    # Elements with the same number of nodes are handled together
+    groups = {}
+    for element in instance.elements:
+        groups.setdefault(len(element.connectivity), ([], []))
+        groups[len(element.connectivity)][0].append(element.label)
+        groups[len(element.connectivity)][1].append(element.connectivity)
+    labels_out, centroids_out = [], []
+    for labels, connectivity in groups.values():
+        indices = np.searchsorted(node_labels, np.array(connectivity, dtype=int))
+        labels_out.append(np.array(labels, dtype=int))
+        centroids_out.append(coordinates[indices].mean(axis=1))
+    if len(labels_out) == 0:
+        return np.zeros(0, dtype=int), np.zeros((0, 3))
+    return np.concatenate(labels_out), np.concatenate(centroids_out)
+
+
+def set_labels(odb, instance, set_name):
+    """
+    Element labels of a named element set of the instance or of the assembly (only the elements of this instance)
+    """
+    if set_name in instance.elementSets:
+        return np.array([element.label for element in instance.elementSets[set_name].elements], dtype=int)
+    assembly_sets = getattr(odb.rootAssembly, 'elementSets', {})
+    if set_name not in assembly_sets:
+        raise ValueError('The element set ' + set_name + ' does not exist in the instance ' + instance.name + ' or the assembly.')
+    assembly_set = assembly_sets[set_name]
+    # the elements of an assembly set are given per instance
+    for set_instance, elements in zip(assembly_set.instances, assembly_set.elements):
+        if set_instance.name == instance.name:
+            return np.array([element.label for element in elements], dtype=int)
+    return np.zeros(0, dtype=int)
+
+
+class RegionSelection:
+
+    def __init__(self, element_sets=None, bounding_box=None, mises_threshold=None):
+        """
+        Selection of the evaluated elements, all given criteria have to be met
+
+        Parameters:
+        ---------------
+            element_sets: List of Strings
+                optional, names of element sets of the instance or the assembly, the union of the sets is selected
+
+            bounding_box: List
+                optional, [[xmin, ymin, zmin], [xmax, ymax, zmax]], elements whose centroid lies in the box are selected
+
+            mises_threshold: Float
+                optional, only elements with at least one integration point with a von Mises stress of at least this value
+                in one of the evaluated frames are selected. The prefilter reads the von Mises stress of the whole instance
+                (or of the only given element set) and keeps the elements which meet the other criteria, so that no
+                intermediate element set is added to the odb.
+        """
+        self.element_sets = list(element_sets or [])
+        self.bounding_box = np.asarray(bounding_box, dtype=float) if bounding_box is not None else None
+        self.mises_threshold = mises_threshold
+        # element labels of the sets and the box per instance, they do not change between steps
+        self.static = {}
+
+    def static_labels(self, odb, instance):
+        """
+        Sorted labels of the elements in the element sets and the bounding box, None if neither is given
+        """
+        if not self.element_sets and self.bounding_box is None:
+            return None
+        if instance.name not in self.static:
+            labels = None
+            if self.element_sets:
+                labels = np.unique(np.concatenate([set_labels(odb, instance, set_name) for set_name in self.element_sets]))
+            if self.bounding_box is not None:
+                centroid_labels, centroids = element_centroids(instance)
+                dim = min(centroids.shape[1], self.bounding_box.shape[1])
+                inside = np.all((centroids[:, :dim] >= self.bounding_box[0, :dim]) & (centroids[:, :dim] <= self.bounding_box[1, :dim]), axis=1)
+                box_labels = np.unique(centroid_labels[inside])
+                labels = box_labels if labels is None else np.intersect1d(labels, box_labels)
+            self.static[instance.name] = labels
+        return self.static[instance.name]
+
+    def mises_labels(self, frames, region, candidates=None):
+        """
+        Sorted labels of the elements of the region (an instance or element set) with a von Mises stress of at least
+        mises_threshold at one of their integration points in one of the frames, i.e. their maximum over the frames
+        reaches the threshold. If sorted candidate labels are given, only these elements are kept.
+        """
+        from abaqusConstants import INTEGRATION_POINT, MISES
+        labels = []
+        for frame in frames:
+            mises = frame.fieldOutputs['S'].getSubset(position=INTEGRATION_POINT, region=region).getScalarField(invariant=MISES)
+            labels += [np.asarray(block.elementLabels, dtype=int).ravel()[np.asarray(block.data, dtype=float).ravel() >= self.mises_threshold]
+                       for block in mises.bulkDataBlocks]
+        labels = np.unique(np.concatenate(labels)) if labels else np.zeros(0, dtype=int)
+        if candidates is not None:
+            labels = np.intersect1d(labels, candidates, assume_unique=True)
+        return labels
+
+    def region(self, odb, instance, frames):
+        """
+        Returns the region of the instance for getSubset: the instance itself if nothing is selected, a given element set
+        if it is the only criterion, otherwise an element set of the selected elements, which is created in the odb
+        (named CHRISTENSEN_REGION_<hash of the labels>, an existing set with this name is reused; the set stays in the
+        odb once it is saved). Returns None if no element is selected. The von Mises prefilter uses the stresses of the
+        given frame or list of frames, e.g. all evaluated frames of an envelope.
+        """
+        if not isinstance(frames, (list, tuple)):
+            frames = [frames]
+        labels = self.static_labels(odb, instance)
+        if labels is None and self.mises_threshold is None:
+            return instance
+        if len(self.element_sets) == 1 and self.bounding_box is None and self.mises_threshold is None and self.element_sets[0] in instance.elementSets:
+            return instance.elementSets[self.element_sets[0]]
+
+        if self.mises_threshold is not None:
+            if labels is not None and len(labels) == 0:
+                return None
+            # only the final selection becomes an element set of the odb, the prefilter reads a given set or the whole
+            # instance and filters its labels
+            if len(self.element_sets) == 1 and self.bounding_box is None and self.element_sets[0] in instance.elementSets:
+                labels = self.mises_labels(frames, instance.elementSets[self.element_sets[0]])
+            else:
+                labels = self.mises_labels(frames, instance, labels)
+        return element_set(instance, labels)
+
+
+def element_set(instance, labels, prefix=SET_PREFIX):
+    """
+    Element set of the instance with the given sorted element labels, named <prefix><hash of the labels>. An existing set
+    with this name is reused, so that the same selection does not add another set. Returns None for no labels.
+    """
+    if len(labels) == 0:
+        return None
+    name = prefix + hashlib.sha1(np.ascontiguousarray(labels, dtype=np.int64).tobytes()).hexdigest()[:12].upper()
+    if name in instance.elementSets:
+        return instance.elementSets[name]
+    return instance.ElementSetFromElementLabels(name=name, elementLabels=tuple(int(label) for label in labels))
@@ -0,0 +1,197 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import numpy as np
+from christensen_benchmark import STRESS_CASES, TC_RATIOS, synthetic_stresses
+from christensen_criterion import calc_fail_ind_batch
+
+# Builds the UMAT of christensen_subroutine.for with gfortran and a local stand-in for SPRINC (umat_driver/), checks
+# STATEV(1) and STATEV(2) against calc_fail_ind_batch, the stress update and DDSDDE against Hooke's law and measures
+# the time per UMAT call, e.g.
+#     python christensen_umat_check.py --calls 5000000
+#     python christensen_umat_check.py --reference old_subroutine.for
+# The UMAT returns a failure index of 0 where the Python criterion returns NaN (hydrostatic compression and hydrostatic
+# tension with T = C never reach the failure surface). The check covers the stress layouts of all element types.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DRIVER_DIRECTORY = os.path.join(ROOT, 'umat_driver')
+DRIVER_SOURCES = [os.path.join(DRIVER_DIRECTORY, 'christensen_umat_driver.for'),
+                  os.path.join(DRIVER_DIRECTORY, 'christensen_sprinc_stub.for')]
+FLAGS = ['-O2', '-ffixed-line-length-none', '-std=legacy']
+
+# Stress layouts of the UMAT as (NDI, NSHR): 3D elements, plane strain and axisymmetric elements, plane stress
+LAYOUTS = [('3D', 3, 3), ('plane strain', 3, 1), ('plane stress', 2, 1)]
+
+# Elasticity modulus and Poisson's ratio passed to the UMAT
+E_MODULUS = 210000.
+POISSON = 0.3
+
+# Scale of the random strain increments of the check of the stress update, the stress increments are then of the order of the stresses
+STRAIN_INCREMENT = 1.e-3
+
+
+def build(subroutine, executable, compiler='gfortran'):
+    """
+    Compiles the UMAT in the file subroutine together with the driver into executable
+    """
+    command = [compiler] + FLAGS + ['-I', DRIVER_DIRECTORY, subroutine] + DRIVER_SOURCES + ['-o', executable]
+    subprocess.check_call(command)
+    return executable
+
+
+def umat_components(stresses, ndi, nshr):
+    """
+    Returns the components of the stress states (N, 6) which the UMAT gets for NDI direct and NSHR shear components,
+    e.g. S11, S22, S12 for plane stress
+    """
+    return np.hstack((stresses[:, :ndi], stresses[:, 3:3 + nshr]))
+
+
+def full_components(stresses, ndi, nshr):
+    """
+    Inverse of umat_components: the stress states (N, 6), missing components are zero
+    """
+    full = np.zeros((len(stresses), 6))
+    full[:, :ndi] = stresses[:, :ndi]
+    full[:, 3:3 + nshr] = stresses[:, ndi:]
+    return full
+
+
+def elastic_stiffness(ndi, nshr, E=E_MODULUS, nu=POISSON):
+    """
+    Isotropic stiffness (NDI + NSHR, NDI + NSHR) for engineering shear strains: the 3D matrix for NDI = 3, the plane stress
+    matrix E/(1-nu**2)*[1 nu; nu 1] for NDI = 2
+    """
+    G = E / (2. * (1. + nu))
+    if ndi == 2:
+        direct = E / (1. - nu**2) * np.array([[1., nu], [nu, 1.]])
+    else:
+        direct = E / ((1. + nu) * (1. - 2. * nu)) * ((1. - 2. * nu) * np.eye(3) + nu * np.ones((3, 3)))
+    stiffness = G * np.eye(ndi + nshr)
+    stiffness[:ndi, :ndi] = direct
+    return stiffness
+
+
+def write_input(path, stresses, T, C, ndi=3, nshr=3, strain_increments=None):
+    if strain_increments is None:
+        strain_increments = np.zeros_like(stresses)
+    with open(path, 'w') as f:
+        f.write('%r %r %r %r\n%d %d %d\n' % (float(T), float(C), E_MODULUS, POISSON, len(stresses), ndi, nshr))
+        np.savetxt(f, np.hstack((stresses, strain_increments)), fmt='%.17g')
+
+
+def check(executable, stresses, T, C, directory, rtol=1.e-9, ndi=3, nshr=3, strain_increments=None):
+    """
+    Evaluates the stress states (N, NDI + NSHR, see umat_components) with the UMAT and compares the updated stresses
+    and DDSDDE with elastic_stiffness and STATEV with calc_fail_ind_batch of the updated stresses
+
+    Parameters:
+    ---------------
+        strain_increments: Array
+            optional, DSTRAN of every stress state (N, NDI + NSHR), by default zero
+
+    Returns:
+    ---------------
+        largest relative deviation of the failure index, largest absolute deviation of the failure number and
+        largest deviation of the stresses and of DDSDDE relative to the largest stress and stiffness
+    """
+    input_path = os.path.join(directory, 'check_input.txt')
+    output_path = os.path.join(directory, 'check_output.txt')
+    write_input(input_path, stresses, T, C, ndi, nshr, strain_increments)
+    subprocess.check_call([executable, 'check', input_path, output_path])
+    ntens = ndi + nshr
+    output = np.loadtxt(output_path).reshape(len(stresses), 2 + ntens + ntens**2)
+    statev = output[:, :2]
+
+    # 1. Hooke's law, DDSDDE is written column by column
+    stiffness = elastic_stiffness(ndi, nshr)
+    if strain_increments is not None:
+        stresses = stresses + strain_increments.dot(stiffness.T)
+    stress_error = np.max(np.abs(output[:, 2:2 + ntens] - stresses)) / max(np.max(np.abs(stresses)), 1.)
+    ddsdde = output[:, 2 + ntens:].reshape(-1, ntens, ntens).transpose(0, 2, 1)
+    stiffness_error = np.max(np.abs(ddsdde - stiffness)) / np.max(np.abs(stiffness))
+    if stress_error > rtol or stiffness_error > rtol:
+        raise AssertionError('The stress update of the UMAT differs from Hooke\'s law for NDI = %d, NSHR = %d: stresses %g, DDSDDE %g'
+                             % (ndi, nshr, stress_error, stiffness_error))
+
+    # 2. Criterion of the updated stresses
+    expected = calc_fail_ind_batch(full_components(stresses, ndi, nshr), T, C)
+    never_fails = np.isnan(expected[:, 0])
+    failure_index_error = np.max(np.abs(statev[~never_fails, 0] - expected[~never_fails, 0]) /
+                                 np.maximum(np.abs(expected[~never_fails, 0]), 1.e-12)) if np.any(~never_fails) else 0.
+    failure_number_error = np.max(np.abs(statev[~never_fails, 1] - expected[~never_fails, 1])) if np.any(~never_fails) else 0.
+    if failure_index_error > rtol or failure_number_error > rtol or np.any(statev[never_fails, 0] != 0.):
+        raise AssertionError('STATEV differs from calc_fail_ind_batch for T = %g, C = %g, NDI = %d, NSHR = %d: failure index %g, failure number %g'
+                             % (T, C, ndi, nshr, failure_index_error, failure_number_error))
+    return failure_index_error, failure_number_error, max(stress_error, stiffness_error)
+
+
+def bench(executable, stresses, T, C, calls, directory):
+    """
+    Returns the time per UMAT call in nanoseconds
+    """
+    input_path = os.path.join(directory, 'bench_input.txt')
+    write_input(input_path, stresses, T, C)
+    output = subprocess.check_output([executable, 'bench', input_path, str(calls)])
+    return float(output.split()[0])
+
+
+def test_stresses(n, rng):
+    """
+    Stress states of all cases of christensen_benchmark, plane stress states are padded to 6 components
+    """
+    stresses = []
+    for case in STRESS_CASES:
+        case_stresses = synthetic_stresses(case, n, rng)
+        if case_stresses.shape[1] == 4:
+            case_stresses = np.hstack((case_stresses, np.zeros((n, 2))))
+        stresses.append(case_stresses)
+    return np.vstack(stresses)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Checks and times the UMAT of christensen_subroutine.for with gfortran')
+    parser.add_argument('--subroutine', default=os.path.join(ROOT, 'christensen_subroutine.for'))
+    parser.add_argument('--reference', default=None, help='another version of the subroutine, timed for comparison')
+    parser.add_argument('--compiler', default='gfortran')
+    parser.add_argument('--points', type=int, default=2000, help='stress states per stress case')
+    parser.add_argument('--calls', type=int, default=2000000, help='UMAT calls per timing')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.RandomState(args.seed)
+    stresses = test_stresses(args.points, rng)
+    directory = tempfile.mkdtemp()
+    try:
+        executable = build(args.subroutine, os.path.join(directory, 'umat_driver'), args.compiler)
+        reference = None
+        if args.reference:
+            reference = build(args.reference, os.path.join(directory, 'reference_driver'), args.compiler)
+
+        for ratio in TC_RATIOS:
+            T, C = 100. * ratio, 100.
+            for layout, ndi, nshr in LAYOUTS:
+                layout_stresses = umat_components(stresses, ndi, nshr)
+                failure_index_error, failure_number_error, stress_error = check(executable, layout_stresses, T, C, directory, ndi=ndi, nshr=nshr)
+                # the same stress states with a strain increment
+                strain_increments = STRAIN_INCREMENT * rng.standard_normal(layout_stresses.shape)
+                errors = check(executable, layout_stresses, T, C, directory, ndi=ndi, nshr=nshr, strain_increments=strain_increments)
+                failure_index_error, failure_number_error, stress_error = [max(a, b) for a, b in zip((failure_index_error, failure_number_error, stress_error), errors)]
+                line = 'T/C = %.2f, %s (NDI = %d, NSHR = %d): max. error failure index %.2e, failure number %.2e, stress update %.2e' % (
+                    ratio, layout, ndi, nshr, failure_index_error, failure_number_error, stress_error)
+                # the timing uses the 3D stress states
+                if nshr == 3:
+                    line += ', %8.1f ns/call' % bench(executable, stresses, T, C, args.calls, directory)
+                    if reference is not None:
+                        line += ', reference %8.1f ns/call' % bench(reference, stresses, T, C, args.calls, directory)
+                print(line)
+    finally:
+        shutil.rmtree(directory)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,42 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+# The tests run without Abaqus: christensen_fake_odb stands in for abaqusConstants, odbAccess and abaqus
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import christensen_fake_odb
+christensen_fake_odb.install()
+
+MAT_DICT = {'STEEL': [100., 300.], 'ALU': [50., 200.]}
+
+
+@pytest.fixture(autouse=True)
+def fake_odbs():
+    christensen_fake_odb.odbs.clear()
+    yield christensen_fake_odb.odbs
+    christensen_fake_odb.odbs.clear()
+
+
+@pytest.fixture
+def mat_dict():
+    return dict((name, list(strengths)) for name, strengths in MAT_DICT.items())
+
+
+def christensen_fields(frame, prefix='Christensen'):
+    """
+    Names of the fields with the given base name in the frame, in the order they were added
+    """
+    return [name for name in frame.fieldOutputs.keys() if name.rstrip('0123456789') == prefix]
+
+
+def field_values(frame, name):
+    """
+    Element labels, integration points and data of a field, sorted by element label and integration point
+    """
+    blocks = frame.fieldOutputs[name].bulkDataBlocks
+    labels = np.concatenate([block.elementLabels for block in blocks])
+    points = np.concatenate([block.integrationPoints for block in blocks])
+    data = np.concatenate([np.asarray(block.data, dtype=float).reshape(len(block.elementLabels), -1) for block in blocks])
+    order = np.lexsort((points, labels))
+    return labels[order], points[order], data[order]
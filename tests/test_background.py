@@ -0,0 +1,82 @@
+import json
+import sys
+import pytest
+import christensen_background as background
+import christensen_fake_odb as fake
+from christensen_background import Progress, RunCancelled, run_in_process
+from conftest import MAT_DICT, christensen_fields
+
+# Process which writes the final status of a finished run
+FINISHED_RUN = """import json, sys
+run = json.load(open(sys.argv[1]))
+json.dump({'finished': True, 'cancelled': False, 'error': None, 'message': 'done'}, open(run['status_file'], 'w'))
+"""
+
+
+@pytest.fixture(autouse=True)
+def no_current_run():
+    background.current_run = None
+    yield
+    background.current_run = None
+
+
+def test_progress_and_eta():
+    reports = []
+    progress = Progress(total_units=4, report=reports.append, interval=0.)
+    progress.update(100)
+    assert progress.status()['eta'] is None
+    progress.finish_unit()
+    status = progress.status()
+    assert (status['points'], status['units_done']) == (100, 1)
+    # the three open units are expected to have as many points as the finished one
+    assert status['eta'] == pytest.approx(300. / status['points_per_second'], rel=0.1)
+    assert len(reports) == 2 and reports[-1]['message'].startswith('Christensen: 100 points, 1/4')
+
+    progress.cancel()
+    with pytest.raises(RunCancelled):
+        progress.update(10)
+
+
+def run_file(tmpdir, odb_name, cancel=False):
+    status_file, cancel_file = str(tmpdir.join('status.json')), str(tmpdir.join('cancel'))
+    if cancel:
+        open(cancel_file, 'w').close()
+    path = tmpdir.join('run.json')
+    path.write(json.dumps({'options': {'odb_name': odb_name, 'instance_name': 'ALL', 'step_names': None, 'mat_dict': MAT_DICT, 'chunk_size': 40},
+                           'status_file': status_file, 'cancel_file': cancel_file}))
+    return str(path), status_file
+
+
+def test_run_in_process_writes_the_final_status(tmpdir):
+    odb = fake.create_fake_odb('background.odb', 40, 4)
+    path, status_file = run_file(tmpdir, 'background.odb')
+    assert run_in_process(path) == 0
+    status = background.read_status(status_file)
+    assert status['finished'] and not status['cancelled'] and status['error'] is None
+    assert status['points'] == 160
+    assert odb.saveCount == 1
+    assert christensen_fields(odb.steps['Step-1'].frames[-1]) == ['Christensen']
+
+
+def test_cancelled_run_does_not_save_the_odb(tmpdir):
+    odb = fake.create_fake_odb('background.odb', 40, 4)
+    path, status_file = run_file(tmpdir, 'background.odb', cancel=True)
+    assert run_in_process(path) == 0
+    status = background.read_status(status_file)
+    assert status['finished'] and status['cancelled']
+    assert (odb.saveCount, odb.closeCount) == (0, 1)
+
+
+@pytest.mark.parametrize('script, error', [(FINISHED_RUN, False), ('pass', True)])
+def test_poll_opens_the_odb_once_the_run_is_finished(tmpdir, script, error):
+    odb = fake.create_fake_odb(str(tmpdir.join('background.odb')), 10, 4)
+    run = background.start_background({'odb_name': odb.path}, command=[sys.executable, '-c', script])
+    assert background.background_odb() == odb.path
+    run.join()
+    assert not background.poll_background()
+    assert odb.openCount == 1
+    # the final status, also the one of a process which ended without a result, stops the timer of the GUI
+    status = background.read_status(run.status_file)
+    assert status['finished'] and bool(status['error']) == error
+    assert not background.poll_background()
+    assert odb.openCount == 1
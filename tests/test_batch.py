@@ -0,0 +1,50 @@
+import json
+import christensen_fake_odb as fake
+from christensen_batch import run_campaign
+from conftest import MAT_DICT, christensen_fields
+
+
+def write_campaign(tmpdir, names, options=None):
+    odbs = {}
+    for name in names:
+        path = tmpdir.join(name)
+        path.write('results of ' + name)
+        odbs[name] = fake.create_fake_odb(str(path), 20, 4)
+    manifest = tmpdir.join('campaign.json')
+    manifest.write(json.dumps({'defaults': {'materials': MAT_DICT, 'options': options or {}},
+                               'odbs': [{'path': name} for name in names]}))
+    return str(manifest), odbs
+
+
+def test_every_odb_is_closed_after_it_was_saved(tmpdir):
+    # reopen of the manifest options is ignored, there is no session to show the fields in
+    manifest, odbs = write_campaign(tmpdir, ['job1.odb', 'job2.odb'], {'reopen': True})
+    records = run_campaign(manifest)
+    assert [record['status'] for record in records] == ['done', 'done']
+    for odb in odbs.values():
+        assert (odb.openCount, odb.saveCount, odb.closeCount) == (1, 1, 1)
+        assert christensen_fields(odb.steps['Step-1'].frames[-1]) == ['Christensen']
+    assert tmpdir.join('campaign_summary.csv').check()
+
+
+def test_restart_skips_finished_and_unchanged_odbs(tmpdir):
+    manifest, odbs = write_campaign(tmpdir, ['job1.odb', 'job2.odb'])
+    run_campaign(manifest)
+    run_campaign(manifest)
+    assert [odb.openCount for odb in odbs.values()] == [1, 1]
+
+    # a new analysis changes the odb file, only this odb is processed again
+    tmpdir.join('job2.odb').write('results of a new analysis')
+    records = run_campaign(manifest)
+    assert [odbs[name].openCount for name in ['job1.odb', 'job2.odb']] == [1, 2]
+    assert len(tmpdir.join('campaign_checkpoint.jsonl').readlines()) == 3
+    assert records[1]['odb_identity'][1] == len('results of a new analysis')
+
+
+def test_failed_odbs_are_retried(tmpdir):
+    manifest, odbs = write_campaign(tmpdir, ['job1.odb'])
+    broken = fake.odbs.pop(odbs['job1.odb'].path)
+    assert run_campaign(manifest)[0]['status'] == 'failed'
+    assert run_campaign(manifest, retry_failed=False)[0]['status'] == 'failed'
+    fake.odbs[broken.path] = broken
+    assert run_campaign(manifest)[0]['status'] == 'done'
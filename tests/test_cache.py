@@ -0,0 +1,40 @@
+import numpy as np
+import christensen_fake_odb as fake
+import Christensen_Plugin_Backend as backend
+from conftest import christensen_fields, field_values
+
+
+def test_unchanged_inputs_keep_the_field(tmpdir, mat_dict):
+    odb = fake.create_fake_odb('cache.odb', 50, 4)
+    frame = odb.steps['Step-1'].frames[-1]
+    backend.create_Christensen_fields('cache.odb', 'ALL', None, mat_dict, cache=str(tmpdir))
+    report = backend.create_Christensen_fields('cache.odb', 'ALL', None, mat_dict, cache=str(tmpdir))
+    assert christensen_fields(frame) == ['Christensen']
+    assert report['counters'].get('points', 0) == 0
+
+
+def test_changed_strengths_invalidate_the_cache(tmpdir, mat_dict):
+    odb = fake.create_fake_odb('cache.odb', 50, 4, frames_per_step=2)
+    frame = odb.steps['Step-1'].frames[-1]
+    for all_frames in (False, True):
+        backend.create_Christensen_fields('cache.odb', 'ALL', None, mat_dict, all_frames=all_frames, cache=str(tmpdir))
+        changed = dict(mat_dict, ALU=[60., 200.])
+        backend.create_Christensen_fields('cache.odb', 'ALL', None, changed, all_frames=all_frames, cache=str(tmpdir))
+        backend.create_Christensen_fields('cache.odb', 'ALL', None, changed, all_frames=all_frames)
+        cached, uncached = christensen_fields(frame, 'ChristensenEnvelope' if all_frames else 'Christensen')[-2:]
+        for result, expected in zip(field_values(frame, cached), field_values(frame, uncached)):
+            np.testing.assert_array_equal(result, expected)
+
+
+def test_nodal_and_section_fields_are_cached_on_their_own(tmpdir, mat_dict):
+    odb = fake.create_fake_odb('cache.odb', 50, 4)
+    frame = odb.steps['Step-1'].frames[-1]
+    backend.create_Christensen_fields('cache.odb', 'ALL', None, mat_dict, cache=str(tmpdir), nodal_policy='index')
+    # the main field is kept, the new nodal policy and the section points are written
+    backend.create_Christensen_fields('cache.odb', 'ALL', None, mat_dict, cache=str(tmpdir), nodal_policy='stress', section_points='max')
+    assert christensen_fields(frame) == ['Christensen']
+    assert christensen_fields(frame, 'ChristensenNodal') == ['ChristensenNodal', 'ChristensenNodal1']
+    assert christensen_fields(frame, 'ChristensenSection') == ['ChristensenSection']
+    names = sorted(frame.fieldOutputs.keys())
+    backend.create_Christensen_fields('cache.odb', 'ALL', None, mat_dict, cache=str(tmpdir), nodal_policy='stress', section_points='max')
+    assert sorted(frame.fieldOutputs.keys()) == names
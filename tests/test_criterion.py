@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from christensen_criterion import calc_fail_ind, calc_fail_ind_batch
+
+
+def stress_states(rng):
+    return [100. * rng.standard_normal((200, 6)),
+            np.array([[100., 0., 0., 0., 0., 0.], [-100., 0., 0., 0., 0., 0.], [0., 0., 0., 80., 0., 0.]]),
+            np.tile([50., 50., 50., 0., 0., 0.], (3, 1)),
+            np.tile([-50., -50., -50., 0., 0., 0.], (3, 1)),
+            100. * rng.standard_normal((50, 4)),
+            100. * rng.standard_normal((50, 3))]
+
+
+@pytest.mark.parametrize('T, C', [(100., 300.), (100., 150.), (100., 100.), (1., 2.)])
+def test_batch_matches_class(T, C):
+    # both sides of the switch at T/C = 1/2, plane stress and shell states
+    for stresses in stress_states(np.random.RandomState(0)):
+        expected = np.array([calc_fail_ind(stress, T, C) for stress in stresses], dtype=float)
+        np.testing.assert_allclose(calc_fail_ind_batch(stresses, T, C), expected, rtol=1.e-9, atol=1.e-9)
+
+
+def test_batch_with_strengths_per_point():
+    rng = np.random.RandomState(1)
+    stresses = 100. * rng.standard_normal((100, 6))
+    T = rng.uniform(50., 150., 100)
+    C = rng.uniform(150., 400., 100)
+    expected = np.array([calc_fail_ind(stress, t, c) for stress, t, c in zip(stresses, T, C)], dtype=float)
+    np.testing.assert_allclose(calc_fail_ind_batch(stresses, T, C), expected, rtol=1.e-9, atol=1.e-9)
+
+
+def test_hydrostatic_compression_never_fails():
+    assert np.all(np.isnan(calc_fail_ind_batch(np.tile([-50., -50., -50., 0., 0., 0.], (3, 1)), 100., 300.)[:, 0]))
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+import christensen_fake_odb as fake
+import Christensen_Plugin_Backend as backend
+from christensen_export import export_stresses, evaluate_export, import_results, main
+from conftest import christensen_fields, field_values
+
+
+def test_export_closes_the_odb(tmpdir):
+    odb = fake.create_fake_odb('export.odb', 20, 4, frames_per_step=3)
+    manifest = export_stresses('export.odb', str(tmpdir), frames='ALL')
+    assert odb.closeCount == 1 and odb.saveCount == 0
+    assert [entry['frame'] for entry in manifest['frames']] == [0, 1, 2]
+    # the labels of the later frames are the same and only written once
+    assert len(set(entry['labels'] for entry in manifest['frames'])) == 1
+
+    # an export which fails still closes the odb
+    with pytest.raises(KeyError):
+        export_stresses('export.odb', str(tmpdir), step_names=['Step-2'])
+    assert odb.closeCount == 2
+
+
+def test_round_trip_equals_the_field_of_the_odb(tmpdir, mat_dict):
+    odb = fake.create_fake_odb('export.odb', 50, 4, frames_per_step=2)
+    export_stresses('export.odb', str(tmpdir), frames='ALL')
+    evaluate_export(str(tmpdir), mat_dict, chunk_size=37)
+    fieldVarNames = import_results('export.odb', str(tmpdir))
+    assert sorted(fieldVarNames.values()) == ['Christensen', 'Christensen']
+
+    backend.create_Christensen_fields('export.odb', 'ALL', None, mat_dict)
+    frame = odb.steps['Step-1'].frames[-1]
+    imported, calculated = christensen_fields(frame)
+    for result, expected in zip(field_values(frame, imported), field_values(frame, calculated)):
+        np.testing.assert_allclose(result, expected, rtol=1.e-6)
+    assert christensen_fields(odb.steps['Step-1'].frames[0]) == ['Christensen']
+
+
+def test_command_line_evaluation(tmpdir, mat_dict):
+    fake.create_fake_odb('export.odb', 20, 4)
+    export_stresses('export.odb', str(tmpdir))
+    manifest = main([str(tmpdir), 'STEEL=%g,%g' % tuple(mat_dict['STEEL'])])
+    results = np.load(str(tmpdir.join(manifest['frames'][0]['results'])))
+    # the ALU elements are not evaluated
+    assert results.shape == (80, 3)
+    assert np.all(np.isnan(results[40:, 0])) and not np.any(np.isnan(results[:40, 2]))
+
+
+def test_import_of_another_analysis_is_rejected(tmpdir, mat_dict):
+    odb = fake.create_fake_odb('export.odb', 20, 4)
+    export_stresses('export.odb', str(tmpdir))
+    evaluate_export(str(tmpdir), mat_dict)
+    odb.jobData.creationTime = 'a new analysis'
+    with pytest.raises(ValueError):
+        import_results('export.odb', str(tmpdir))
+    assert odb.saveCount == 0 and odb.closeCount == 2
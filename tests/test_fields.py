@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+import christensen_fake_odb as fake
+import Christensen_Plugin_Backend as backend
+from christensen_principal_stresses import stress_components
+from christensen_region import SET_PREFIX
+from conftest import christensen_fields, field_values
+
+
+def evaluate_frame(odb, frame, mat_dict, instance_name='PART-1-1'):
+    instance = odb.rootAssembly.instances[instance_name]
+    pointLabels, intPoints, stressData = backend.read_integration_point_stresses(frame, instance)
+    return pointLabels, intPoints, backend.evaluate_integration_points(pointLabels, stressData, backend.SectionIndex(odb, instance), mat_dict)
+
+
+@pytest.mark.parametrize('points_per_element', [1, 4])
+def test_chunked_field_equals_whole_field(mat_dict, points_per_element):
+    odb = fake.create_fake_odb('chunks.odb', 101, points_per_element)
+    backend.create_Christensen_fields('chunks.odb', 'ALL', None, mat_dict)
+    backend.create_Christensen_fields('chunks.odb', 'ALL', None, mat_dict, chunk_size=37)
+    frame = odb.steps['Step-1'].frames[-1]
+    whole, chunked = christensen_fields(frame)
+    for expected, result in zip(field_values(frame, whole), field_values(frame, chunked)):
+        np.testing.assert_array_equal(result, expected)
+
+
+def test_chunked_read_is_bounded(mat_dict, monkeypatch):
+    odb = fake.create_fake_odb('chunks.odb', 101, 4)
+    instance = odb.rootAssembly.instances['PART-1-1']
+    read_points = []
+    getSubset = fake.FakeFieldOutput.getSubset
+
+    def counted_getSubset(field, *args, **kwargs):
+        subset = getSubset(field, *args, **kwargs)
+        if field.name == 'S':
+            read_points.append(sum([len(block.elementLabels) for block in subset.bulkDataBlocks]))
+        return subset
+    monkeypatch.setattr(fake.FakeFieldOutput, 'getSubset', counted_getSubset)
+
+    backend.create_Christensen_fields('chunks.odb', 'ALL', None, mat_dict, chunk_size=37)
+    assert max(read_points) <= 37
+    chunk_sets = [name for name in instance.elementSets.keys() if name.startswith(backend.CHUNK_SET_PREFIX)]
+    # a second run reuses the sets of the chunks
+    backend.create_Christensen_fields('chunks.odb', 'ALL', None, mat_dict, chunk_size=37)
+    assert [name for name in instance.elementSets.keys() if name.startswith(backend.CHUNK_SET_PREFIX)] == chunk_sets
+
+    labels, points, data = field_values(odb.steps['Step-1'].frames[-1], 'Christensen')
+    assert len(labels) == 101 * 4
+    assert max(len(added[2]) for added in odb.steps['Step-1'].frames[-1].fieldOutputs['Christensen'].addedData) * 4 <= 37
+
+
+def test_field_matches_criterion(mat_dict):
+    odb = fake.create_fake_odb('field.odb', 40, 4)
+    backend.create_Christensen_fields('field.odb', 'ALL', None, mat_dict)
+    frame = odb.steps['Step-1'].frames[-1]
+    labels, points, data = field_values(frame, 'Christensen')
+    expected_labels, expected_points, expected = evaluate_frame(odb, frame, mat_dict)
+    np.testing.assert_array_equal(labels, expected_labels)
+    np.testing.assert_allclose(data, expected, rtol=1.e-6)
+
+
+@pytest.mark.parametrize('frame_stride', [1, 2])
+def test_envelope_is_maximum_over_frames(mat_dict, frame_stride):
+    odb = fake.create_fake_odb('envelope.odb', 30, 4, frames_per_step=5)
+    backend.create_Christensen_fields('envelope.odb', 'ALL', None, mat_dict, all_frames=True, frame_stride=frame_stride)
+    frames = odb.steps['Step-1'].frames
+    labels, points, envelope = field_values(frames[-1], 'ChristensenEnvelope')
+
+    evaluated = backend.evaluatedFrames(len(frames), True, frame_stride)
+    failure_index = np.array([evaluate_frame(odb, frames[frame_number], mat_dict)[2][:, 0] for frame_number in evaluated])
+    np.testing.assert_allclose(envelope[:, 0], np.nanmax(failure_index, axis=0), rtol=1.e-6)
+    np.testing.assert_array_equal(envelope[:, 2], np.array(evaluated)[np.nanargmax(failure_index, axis=0)])
+
+
+def test_section_points_are_not_read_as_integration_points(mat_dict):
+    odb = fake.create_fake_odb('shell.odb', 50, 4, section_points=['SNEG', 'SPOS'],
+                               stresses=lambda n, rng: 100. * rng.standard_normal((n, 3)))
+    frame = odb.steps['Step-1'].frames[-1]
+    instance = odb.rootAssembly.instances['PART-1-1']
+    with pytest.raises(ValueError):
+        backend.read_integration_point_stresses(frame, instance)
+    assert not backend.hasOnePointPerElement(frame, instance)
+
+    # the shell instance gets the maximum through the thickness instead of the main field
+    backend.create_Christensen_fields('shell.odb', 'ALL', None, mat_dict)
+    assert christensen_fields(frame) == []
+    labels, points, data = field_values(frame, 'ChristensenSection')
+    assert len(labels) == 50 * 4
+
+    section_index = backend.SectionIndex(odb, instance)
+    failure_index = np.array([backend.evaluate_integration_points(block.elementLabels, stress_components(block.data), section_index, mat_dict)[:, 0]
+                              for block in frame.fieldOutputs['S'].bulkDataBlocks])
+    np.testing.assert_allclose(data[:, 0], np.nanmax(failure_index, axis=0), rtol=1.e-6)
+    np.testing.assert_array_equal(data[:, 3], np.nanargmax(failure_index, axis=0) + 1)
+
+
+def test_region_of_interest(mat_dict):
+    odb = fake.create_fake_odb('region.odb', 60, 4)
+    frame = odb.steps['Step-1'].frames[-1]
+    instance = odb.rootAssembly.instances['PART-1-1']
+    backend.create_Christensen_fields('region.odb', 'ALL', None, mat_dict)
+    # the centroid of element l lies at x = l + 0.5
+    backend.create_Christensen_fields('region.odb', 'ALL', None, mat_dict, bounding_box=[[10., -10., -10.], [20., 10., 10.]])
+    whole, region = christensen_fields(frame)
+
+    labels, points, data = field_values(frame, region)
+    np.testing.assert_array_equal(np.unique(labels), np.arange(10, 20))
+    whole_labels, whole_points, whole_data = field_values(frame, whole)
+    np.testing.assert_array_equal(data, whole_data[np.isin(whole_labels, labels)])
+    assert len([name for name in instance.elementSets.keys() if name.startswith(SET_PREFIX)]) == 1
+
+
+def test_mises_prefilter_uses_all_evaluated_frames(mat_dict):
+    odb = fake.create_fake_odb('prefilter.odb', 40, 4, frames_per_step=3)
+    frames = odb.steps['Step-1'].frames
+    # element 5 is only critical in the first frame
+    for frame_number, frame in enumerate(frames):
+        block = frame.fieldOutputs['S'].bulkDataBlocks[0]
+        block.data[:] = 1.
+        if frame_number == 0:
+            block.data[block.elementLabels == 5] = 1000.
+    backend.create_Christensen_fields('prefilter.odb', 'ALL', None, mat_dict, all_frames=True, mises_threshold=500.)
+    labels, points, data = field_values(frames[-1], 'ChristensenEnvelope')
+    np.testing.assert_array_equal(np.unique(labels), [5])
+
+
+def test_prefilter_of_a_box_adds_only_the_final_set(mat_dict):
+    odb = fake.create_fake_odb('prefilter.odb', 40, 4)
+    instance = odb.rootAssembly.instances['PART-1-1']
+    block = odb.steps['Step-1'].frames[-1].fieldOutputs['S'].bulkDataBlocks[0]
+    block.data[:] = 1.
+    # element 25 is critical but outside of the box
+    block.data[np.isin(block.elementLabels, [5, 12, 25])] = 1000.
+    backend.create_Christensen_fields('prefilter.odb', 'ALL', None, mat_dict, bounding_box=[[0., -10., -10.], [20., 10., 10.]], mises_threshold=500.)
+    labels, points, data = field_values(odb.steps['Step-1'].frames[-1], 'Christensen')
+    np.testing.assert_array_equal(np.unique(labels), [5, 12])
+    region_sets = [name for name in instance.elementSets.keys() if name.startswith(SET_PREFIX)]
+    assert len(region_sets) == 1
+    assert sorted(element.label for element in instance.elementSets[region_sets[0]].elements) == [5, 12]
@@ -0,0 +1,43 @@
+import pytest
+import christensen_fake_odb as fake
+import Christensen_Plugin_Backend as backend
+from conftest import christensen_fields
+
+
+def two_instance_odb(path):
+    """
+    Fake odb with the instances PART-1-1 (40 elements) and PART-2-1 (30 elements)
+    """
+    odb = fake.create_fake_odb(path, 40, 4)
+    other = fake.create_fake_odb('other.odb', 30, 4, instance_name='PART-2-1', seed=1)
+    odb.rootAssembly.instances['PART-2-1'] = other.rootAssembly.instances['PART-2-1']
+    odb.steps['Step-1'].frames[-1].fieldOutputs['S'].blocks += other.steps['Step-1'].frames[-1].fieldOutputs['S'].blocks
+    return odb
+
+
+def evaluated_instances(frame):
+    return sorted(set(block.instance.name for block in frame.fieldOutputs['Christensen'].bulkDataBlocks))
+
+
+@pytest.mark.parametrize('instance_name', ['ALL', None, 'PART-1-1, PART-2-1', ['PART-2-1', 'PART-1-1'], u'PART-1-1,PART-2-1'])
+def test_all_selected_instances_share_one_field(mat_dict, instance_name):
+    odb = two_instance_odb('instances.odb')
+    backend.create_Christensen_fields('instances.odb', instance_name, None, mat_dict)
+    frame = odb.steps['Step-1'].frames[-1]
+    assert christensen_fields(frame) == ['Christensen']
+    assert evaluated_instances(frame) == ['PART-1-1', 'PART-2-1']
+    assert odb.saveCount == 1
+
+
+@pytest.mark.parametrize('instance_name', ['PART-2-1', u'PART-2-1', ['PART-2-1']])
+def test_single_instance_is_not_split_into_letters(mat_dict, instance_name):
+    odb = two_instance_odb('instances.odb')
+    assert backend.getInstanceNames(odb, instance_name) == ['PART-2-1']
+    backend.create_Christensen_fields('instances.odb', instance_name, None, mat_dict)
+    assert evaluated_instances(odb.steps['Step-1'].frames[-1]) == ['PART-2-1']
+
+
+def test_unknown_instance_is_rejected():
+    odb = two_instance_odb('instances.odb')
+    with pytest.raises(ValueError):
+        backend.getInstanceNames(odb, 'PART-1-1, PART-3-1')
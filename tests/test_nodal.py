@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+import christensen_fake_odb as fake
+import Christensen_Plugin_Backend as backend
+from christensen_criterion import calc_fail_ind_batch
+from christensen_nodal import HEX_CORNERS, QUAD_CORNERS, TET_A, TET_B, extrapolation_matrix, gauss_points
+from conftest import field_values
+
+STEEL_STRESS = [80., 0., 0., 0., 0., 0.]
+ALU_STRESS = [0., 0., 0., 30., 0., 0.]
+
+
+@pytest.mark.parametrize('num_nodes, num_points, three_dimensional', [(8, 8, True), (20, 8, True), (4, 4, True), (10, 4, True),
+                                                                      (4, 4, False), (8, 4, False), (6, 2, True)])
+def test_extrapolation_keeps_constant_values(num_nodes, num_points, three_dimensional):
+    matrix = extrapolation_matrix(num_nodes, num_points, three_dimensional)
+    assert matrix.shape == (num_nodes, num_points)
+    np.testing.assert_allclose(matrix.sum(axis=1), 1.)
+
+
+@pytest.mark.parametrize('corners', [HEX_CORNERS, QUAD_CORNERS])
+def test_extrapolation_of_a_linear_field_is_exact(corners):
+    dim = len(corners[0])
+    gradient = np.array([2., -1., 0.5])[:dim]
+    points = np.array(gauss_points(dim)) / np.sqrt(3.)
+    matrix = extrapolation_matrix(len(corners), len(points), dim == 3)
+    np.testing.assert_allclose(matrix.dot(1. + points.dot(gradient)), 1. + np.array(corners).dot(gradient))
+
+
+def test_tetrahedron_extrapolation_inverts_the_interpolation():
+    interpolation = np.full((4, 4), TET_A)
+    np.fill_diagonal(interpolation, TET_B)
+    np.testing.assert_allclose(extrapolation_matrix(4, 4).dot(interpolation), np.eye(4), atol=1.e-12)
+
+
+def material_odb(path):
+    """
+    Fake odb with a uniform stress per material, the nodes 21 to 23 belong to STEEL and ALU elements
+    """
+    def stresses(n, rng):
+        return np.where(np.arange(n)[:, None] < n // 2, STEEL_STRESS, ALU_STRESS)
+    return fake.create_fake_odb(path, 40, 4, stresses=stresses)
+
+
+def node_values(odb, name):
+    labels, points, data = field_values(odb.steps['Step-1'].frames[-1], name)
+    return labels, data[:, 0]
+
+
+@pytest.mark.parametrize('policy', ['index', 'stress'])
+def test_material_boundary_gets_the_larger_index(mat_dict, policy):
+    odb = material_odb('nodal.odb')
+    backend.create_Christensen_fields('nodal.odb', 'ALL', None, mat_dict, nodal_policy=policy)
+    labels, failure_index = node_values(odb, 'ChristensenNodal')
+    steel, alu = calc_fail_ind_batch(np.array([STEEL_STRESS, ALU_STRESS]), np.array([100., 50.]), np.array([300., 200.]))[:, 0]
+    np.testing.assert_array_equal(labels, np.arange(1, 44))
+    np.testing.assert_allclose(failure_index[labels <= 20], steel)
+    np.testing.assert_allclose(failure_index[(labels >= 21) & (labels <= 23)], max(steel, alu))
+    np.testing.assert_allclose(failure_index[labels >= 24], alu)
+
+
+def test_averaging_over_materials(mat_dict):
+    odb = material_odb('nodal.odb')
+    steel, alu = calc_fail_ind_batch(np.array([STEEL_STRESS, ALU_STRESS]), np.array([100., 50.]), np.array([300., 200.]))[:, 0]
+    # node 22 belongs to the elements 19 and 20 (STEEL) and 21 and 22 (ALU)
+    backend.create_Christensen_fields('nodal.odb', 'ALL', None, mat_dict, nodal_policy='index', material_averaging=False)
+    labels, failure_index = node_values(odb, 'ChristensenNodal')
+    np.testing.assert_allclose(failure_index[labels == 22], (steel + alu) / 2.)
+
+    # the averaged stress is evaluated with the strengths of both materials
+    backend.create_Christensen_fields('nodal.odb', 'ALL', None, mat_dict, nodal_policy='stress', material_averaging=False)
+    labels, failure_index = node_values(odb, 'ChristensenNodal1')
+    stress = (np.array(STEEL_STRESS) + np.array(ALU_STRESS)) / 2.
+    expected = calc_fail_ind_batch(np.array([stress, stress]), np.array([100., 50.]), np.array([300., 200.]))[:, 0].max()
+    np.testing.assert_allclose(failure_index[labels == 22], expected)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+import christensen_fake_odb as fake
+import Christensen_Plugin_Backend as backend
+from conftest import field_values
+
+
+def test_scalar_fields_in_single_precision(mat_dict):
+    odb = fake.create_fake_odb('output.odb', 30, 4)
+    frame = odb.steps['Step-1'].frames[-1]
+    backend.create_Christensen_fields('output.odb', 'ALL', None, mat_dict)
+    backend.create_Christensen_fields('output.odb', 'ALL', None, mat_dict, outputs=['FI', 'FN'])
+    assert 'Christensen_FI' in frame.fieldOutputs.keys() and 'Christensen_FN' in frame.fieldOutputs.keys()
+    assert 'Christensen_SEQ' not in frame.fieldOutputs.keys()
+
+    labels, points, vector = field_values(frame, 'Christensen')
+    for column, component in enumerate(['FI', 'FN']):
+        field = frame.fieldOutputs['Christensen_' + component]
+        assert all(block.data.dtype == np.float32 for block in field.bulkDataBlocks)
+        np.testing.assert_allclose(field_values(frame, field.name)[2][:, 0], vector[:, column].astype(np.float32))
+
+
+def test_threshold_keeps_whole_critical_elements(mat_dict):
+    odb = fake.create_fake_odb('output.odb', 30, 4)
+    frame = odb.steps['Step-1'].frames[-1]
+    backend.create_Christensen_fields('output.odb', 'ALL', None, mat_dict)
+    labels, points, vector = field_values(frame, 'Christensen')
+    threshold = np.percentile(vector[:, 0], 90)
+    backend.create_Christensen_fields('output.odb', 'ALL', None, mat_dict, outputs=['FI'], output_threshold=threshold)
+    critical = np.unique(labels[vector[:, 0] >= threshold])
+    assert 0 < len(critical) < 30
+
+    kept_labels, kept_points, kept = field_values(frame, 'Christensen_FI')
+    np.testing.assert_array_equal(np.unique(kept_labels), critical)
+    # all integration points of a critical element are written
+    assert len(kept_labels) == 4 * len(critical)
+    np.testing.assert_allclose(kept[:, 0], vector[np.isin(labels, critical), 0].astype(np.float32))
+
+
+def test_unknown_component_is_rejected():
+    with pytest.raises(ValueError):
+        backend.CompactOutput(['FI', 'S11'])
@@ -0,0 +1,30 @@
+import numpy as np
+import christensen_fake_odb as fake
+import Christensen_Plugin_Backend as backend
+from christensen_criterion import calc_fail_ind_batch
+from christensen_parallel import ChristensenPool, create_pool
+from conftest import christensen_fields, field_values
+
+
+def test_pool_equals_serial_evaluation():
+    rng = np.random.RandomState(0)
+    stresses = 100. * rng.standard_normal((1000, 6))
+    T = rng.uniform(50., 150., 1000)
+    C = rng.uniform(150., 400., 1000)
+    assert create_pool(1) is None
+    # blocks of 300 points, the last one is smaller
+    with ChristensenPool(2, chunk_size=300) as pool:
+        np.testing.assert_array_equal(pool.calc_fail_ind(stresses, T, C), calc_fail_ind_batch(stresses, T, C))
+        assert pool.calc_fail_ind(np.zeros((0, 6))).shape == (0, 3)
+
+
+def test_fields_with_workers_equal_serial_fields(mat_dict):
+    odb = fake.create_fake_odb('parallel.odb', 50, 4, frames_per_step=3)
+    frame = odb.steps['Step-1'].frames[-1]
+    for workers in (1, 2):
+        backend.create_Christensen_fields('parallel.odb', 'ALL', None, mat_dict, workers=workers)
+        backend.create_Christensen_fields('parallel.odb', 'ALL', None, mat_dict, all_frames=True, workers=workers)
+    for name in ('Christensen', 'ChristensenEnvelope'):
+        serial, parallel = christensen_fields(frame, name)
+        for expected, result in zip(field_values(frame, serial), field_values(frame, parallel)):
+            np.testing.assert_array_equal(result, expected)
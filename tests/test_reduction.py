@@ -0,0 +1,48 @@
+import numpy as np
+import christensen_fake_odb as fake
+import Christensen_Plugin_Backend as backend
+from christensen_reduction import CriticalPointReduction
+from conftest import field_values
+
+
+def test_streaming_equals_one_pass():
+    rng = np.random.RandomState(0)
+    labels = np.repeat(np.arange(1, 101), 4)
+    points = np.tile(np.arange(1, 5), 100)
+    material_ids = np.where(labels <= 50, 0, np.where(labels <= 90, 1, -1))
+    results = np.column_stack((rng.uniform(0., 2.5, 400), rng.uniform(size=400), rng.uniform(size=400)))
+    results[::7, 0] = np.nan
+
+    whole = CriticalPointReduction(top_k=5)
+    whole.add('PART-1-1', 'Step-1', 0, labels, points, material_ids, ['STEEL', 'ALU'], results)
+    streamed = CriticalPointReduction(top_k=5)
+    for chunk in np.array_split(np.arange(400), 7):
+        streamed.add('PART-1-1', 'Step-1', 0, labels[chunk], points[chunk], material_ids[chunk], ['STEEL', 'ALU'], results[chunk])
+    assert streamed.report() == whole.report()
+
+    report = whole.report()
+    valid = ~np.isnan(results[:, 0]) & (material_ids >= 0)
+    expected = np.sort(results[valid, 0])[::-1][:5]
+    np.testing.assert_allclose([point['failure_index'] for point in report['top']], expected)
+    steel = report['materials']['STEEL']
+    assert steel['points'] == 200 and steel['nan_points'] == np.sum(np.isnan(results[:200, 0]))
+    assert sum(steel['histogram']['counts']) == steel['points'] - steel['nan_points']
+    assert steel['exceedances'] == np.sum(results[:200, 0][~np.isnan(results[:200, 0])] > 1.)
+
+
+def test_critical_points_of_an_odb(mat_dict):
+    odb = fake.create_fake_odb('critical.odb', 60, 4, frames_per_step=3)
+    report = backend.find_critical_points('critical.odb', 'ALL', None, mat_dict, top_k=3, all_frames=True, chunk_size=50)
+    assert (odb.saveCount, odb.closeCount) == (0, 1)
+
+    # the same points as the maximum of the envelope field
+    backend.create_Christensen_fields('critical.odb', 'ALL', None, mat_dict, all_frames=True)
+    labels, points, envelope = field_values(odb.steps['Step-1'].frames[-1], 'ChristensenEnvelope')
+    order = np.argsort(-envelope[:, 0])[:3]
+    assert [(point['element'], point['integration_point'], point['frame']) for point in report['top']] == \
+        list(zip(labels[order], points[order], envelope[order, 2].astype(int)))
+    np.testing.assert_allclose([point['failure_index'] for point in report['top']], envelope[order, 0], rtol=1.e-6)
+    # without a COORD field the coordinates are those of the centroid, x = label + 0.5
+    assert [point['coordinates'][0] for point in report['top']] == [label + 0.5 for label in labels[order]]
+    assert sorted(report['materials']) == ['ALU', 'STEEL']
+    assert sum(stats['points'] for stats in report['materials'].values()) == 60 * 4 * 3
@@ -0,0 +1,38 @@
+import numpy as np
+import christensen_fake_odb as fake
+import Christensen_Plugin_Backend as backend
+from christensen_criterion import calc_fail_ind_batch, calc_reserve_factor_batch, reserve_factors
+
+
+def test_scaled_stresses_reach_the_surface():
+    stresses = 100. * np.random.RandomState(0).standard_normal((200, 6))
+    factors = calc_reserve_factor_batch(stresses, 100., 300.)
+    assert np.all(np.isfinite(factors))
+    np.testing.assert_allclose(calc_fail_ind_batch(stresses * factors[:, None], 100., 300.)[:, 0], 1., rtol=1.e-9)
+
+
+def test_states_which_never_fail():
+    stresses = np.array([[0., 0., 0., 0., 0., 0.], [-50., -50., -50., 0., 0., 0.], [50., 50., 50., 0., 0., 0.], [100., 0., 0., 0., 0., 0.]])
+    assert np.all(np.isinf(calc_reserve_factor_batch(stresses[:2], 100., 300.)))
+    assert np.isinf(calc_reserve_factor_batch(stresses[2:3], 100., 100.)[0])
+    factors = reserve_factors(calc_fail_ind_batch(stresses, 100., 300.)[:, 0], [100., 100., 100., np.nan], [300., 300., 300., np.nan])
+    assert np.isnan(factors[3])
+
+
+def test_load_cases_are_sorted_by_the_minimum(mat_dict):
+    odb = fake.create_fake_odb('reserve.odb', 40, 4, step_names=['Step-1', 'Step-2'], frames_per_step=2)
+    # the last frame of Step-2 is the most critical load case
+    odb.steps['Step-2'].frames[-1].fieldOutputs['S'].bulkDataBlocks[0].data *= 3.
+    load_cases = backend.calc_Christensen_reserve_factors('reserve.odb', 'ALL', None, mat_dict, all_frames=True, return_arrays=True)
+    assert (odb.saveCount, odb.closeCount) == (0, 1)
+    assert len(load_cases) == 4
+    assert (load_cases[0]['step'], load_cases[0]['frame']) == ('Step-2', 1)
+    minima = [load_case['minimum'] for load_case in load_cases]
+    assert minima == sorted(minima)
+
+    for load_case in load_cases:
+        factors = load_case['reserve_factors']
+        i = np.nanargmin(factors)
+        assert load_case['minimum'] == factors[i]
+        assert (load_case['element'], load_case['integration_point']) == (load_case['labels'][i], load_case['integration_points'][i])
+        assert load_case['material'] == ('STEEL' if load_case['element'] <= 20 else 'ALU')
@@ -0,0 +1,36 @@
+import numpy as np
+import christensen_fake_odb as fake
+import Christensen_Plugin_Backend as backend
+from christensen_criterion import StressDecomposition, calc_fail_ind_batch, calc_fail_ind_sweep, strength_grid
+from christensen_principal_stresses import stress_components
+from conftest import christensen_fields
+
+
+def test_sweep_equals_one_evaluation_per_strength_pair():
+    stresses = 100. * np.random.RandomState(0).standard_normal((300, 6))
+    strengths = strength_grid([50., 100.], [100., 150., 300.])
+    for summaries in (calc_fail_ind_sweep(stresses, strengths, 0.5), calc_fail_ind_sweep(StressDecomposition(stresses), strengths, 0.5)):
+        assert [(summary['T'], summary['C']) for summary in summaries] == strengths
+        for (T, C), summary in zip(strengths, summaries):
+            failure_index = calc_fail_ind_batch(stresses, T, C)[:, 0]
+            np.testing.assert_allclose(summary['max_failure_index'], np.nanmax(failure_index), rtol=1.e-9)
+            assert summary['critical_point'] == np.nanargmax(failure_index)
+            assert summary['failed_points'] == np.sum(failure_index[~np.isnan(failure_index)] >= 0.5)
+            assert summary['nan_points'] == np.sum(np.isnan(failure_index))
+
+
+def test_sweep_of_an_odb_is_read_only():
+    odb = fake.create_fake_odb('sweep.odb', 40, 4)
+    summaries = backend.sweep_Christensen_strengths('sweep.odb', 'ALL', 'Step-1', [(100., 300.), (50., 200.)], materials=['ALU'])
+    assert (odb.saveCount, odb.closeCount) == (0, 1)
+    assert christensen_fields(odb.steps['Step-1'].frames[-1]) == []
+
+    # only the points of the ALU elements 21 to 40 are swept
+    block = odb.steps['Step-1'].frames[-1].fieldOutputs['S'].bulkDataBlocks[0]
+    alu = block.elementLabels > 20
+    for (T, C), summary in zip([(100., 300.), (50., 200.)], summaries):
+        failure_index = calc_fail_ind_batch(stress_components(block.data[alu]), T, C)[:, 0]
+        np.testing.assert_allclose(summary['max_failure_index'], np.nanmax(failure_index), rtol=1.e-6)
+        critical_point = np.nanargmax(failure_index)
+        assert summary['location'] == {'instance': 'PART-1-1', 'element': block.elementLabels[alu][critical_point],
+                                       'integration_point': block.integrationPoints[alu][critical_point], 'material': 'ALU'}